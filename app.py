@@ -1,9 +1,11 @@
 # Standard Library Imports
 import ast
 import csv
+import hashlib
 import json
 import os
-import re
+import secrets
+import time
 from contextlib import contextmanager
 import datetime
 
@@ -23,11 +25,22 @@ from flask_login import (  # type: ignore
     logout_user,
 )
 from pymongo import MongoClient
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy.sparse import issparse
 from sklearn.metrics.pairwise import cosine_similarity
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
-from recommender_engine import dapatkan_rekomendasi as get_recommendations_from_engine # Impor engine
+from recommender_engine import dapatkan_peringkat as get_ranking_from_engine # Impor engine
+from recommender_engine import CANDIDATE_POOL_SIZE
+from recommender_engine import bangun_indeks_katalog, normalisasi_preferensi
+from recommender_engine import pasang_pengamat_tahap
+from instrumentasi import HistogramTahap
+from cache_rekomendasi import CacheRekomendasi
+from artefak_model import ModelArtefak, kunci_artefak, muat_artefak, simpan_artefak
+from pemegang_model import PemegangModel
+from model_inkremental import perbarui_model
+from vektorisasi import buat_vectorizer, frekuensi_dokumen
+from indeks_ann import bangun_indeks_ann
+from indeks_posting import bangun_indeks_posting
 
 APP_ROOT = os.path.dirname(os.path.abspath(__file__))
 
@@ -49,11 +62,54 @@ MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
 DB_NAME = "cbf_program_db"
 PROGRAM_COLLECTION_NAME = "programs" # Menggunakan data_latihan.csv sebagai sumber utama
 USER_COLLECTION_NAME = "users" # Definisikan nama koleksi pengguna
+KATALOG_META_COLLECTION_NAME = "katalog_meta" # Penghitung revisi katalog program (ditulis populate_db.py)
 
 # Path ke file kuesioner
 KUESIONER_CSV_PATH = 'data/kuesioner_bersih.csv'
 EXERCISES_CSV_PATH = 'data/exercises.csv' # Path untuk data latihan
 
+# Konfigurasi cache hasil rekomendasi (LRU + TTL)
+REKOMENDASI_CACHE_SIZE = int(os.getenv("REKOMENDASI_CACHE_SIZE", "1024"))
+REKOMENDASI_CACHE_TTL = float(os.getenv("REKOMENDASI_CACHE_TTL", "600")) # Detik
+# Cursor paginasi tombol "More": peringkat disimpan sebentar di server
+PAGINASI_CURSOR_SIZE = int(os.getenv("PAGINASI_CURSOR_SIZE", "4096"))
+PAGINASI_CURSOR_TTL = float(os.getenv("PAGINASI_CURSOR_TTL", "900")) # Detik
+# Artefak model di disk (lihat bangun_artefak.py); kosongkan MODEL_ARTEFAK_DIR untuk selalu melatih ulang
+MODEL_ARTEFAK_DIR = os.getenv("MODEL_ARTEFAK_DIR", os.path.join(APP_ROOT, 'data', 'model_artefak'))
+MODEL_ARTEFAK_TULIS_OTOMATIS = os.getenv("MODEL_ARTEFAK_TULIS_OTOMATIS", "1") == "1" # Simpan artefak setelah melatih ulang
+MODEL_CEK_VERSI_INTERVAL = float(os.getenv("MODEL_CEK_VERSI_INTERVAL", "30")) # Detik; 0 = tanpa hot-reload
+# Pembaruan inkremental TF-IDF saat hanya sebagian program berubah
+MODEL_INKREMENTAL = os.getenv("MODEL_INKREMENTAL", "1") == "1"
+MODEL_AMBANG_DRIFT_IDF = float(os.getenv("MODEL_AMBANG_DRIFT_IDF", "0.05")) # Drift IDF relatif sebelum refit penuh
+MODEL_BATAS_PERUBAHAN_INKREMENTAL = float(os.getenv("MODEL_BATAS_PERUBAHAN_INKREMENTAL", "0.5")) # Fraksi katalog
+# Featurisasi: 'tfidf' (vocabulary penuh), 'hashing' (ruang fitur tetap, memori konstan),
+# atau 'lsa' (TF-IDF diproyeksikan ke ruang laten truncated SVD, matriks padat float32)
+MODEL_VECTORIZER = os.getenv("MODEL_VECTORIZER", "tfidf")
+MODEL_HASHING_N_FITUR = int(os.getenv("MODEL_HASHING_N_FITUR", str(2 ** 18)))
+MODEL_LSA_RANK = int(os.getenv("MODEL_LSA_RANK", "128")) # Dimensi laten mode LSA (misalnya 64-256)
+# Indeks ANN (IVF) untuk candidate generation pada katalog besar; 0 = skor eksak ke semua program yang lolos filter
+MODEL_ANN = os.getenv("MODEL_ANN", "0") == "1"
+MODEL_ANN_N_LIST = int(os.getenv("MODEL_ANN_N_LIST", "0")) # Jumlah cluster; 0 = otomatis (akar jumlah program)
+MODEL_ANN_N_PROBE = int(os.getenv("MODEL_ANN_N_PROBE", "32")) # Cluster minimum per kueri (recall vs latensi)
+# Top-k eksak lewat posting list (akumulasi skor per term profil); hasil identik, dipakai jika indeks ANN tidak aktif
+# (mode sparse saja)
+MODEL_POSTING = os.getenv("MODEL_POSTING", "0") == "1"
+
+# Instrumentasi durasi per tahap pipeline rekomendasi (histogram di /instrumentasi/stats)
+INSTRUMENTASI_TAHAP = os.getenv("INSTRUMENTASI_TAHAP", "0") == "1"
+
+# Pilihan jawaban form rekomendasi (juga dipakai benchmark_rekomendasi.py untuk membuat profil sintetis)
+OPSI_FORM_REKOMENDASI = {
+    "jenis_kelamin": ["Pria", "Wanita"],
+    "tujuan": ["Menurunkan berat badan", "Meningkatkan massa otot", "Menjaga kesehatan"],
+    "jenis_latihan": ["Kardio (Lari, Sepeda, Renang)", "Latihan Fisik (Angkat Beban, Push up, Squat)", "HIIT"],
+    "hari_sibuk": ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"],
+    "waktu_luang": ["Pagi (06:00-09:00)", "Siang (12:00-14:00)", "Sore (16:00-18:00)"],
+    "tempat": ["Rumah", "Gym/Fitness Center", "Outdoor (Taman, Lapangan)"],
+    "pengalaman": ["Pemula (Baru memulai atau jarang)", "Menengah (Cukup rutin, paham dasar)", "Mahir (Sangat rutin, teknik bagus)"]
+}
+RENTANG_USIA_FORM = (18, 35) # Batas input usia di templates/index.html
+
 # Konstanta untuk nama kolom kuesioner (diurutkan berdasarkan nomor)
 COL_KUESIONER_USIA = '1. Usia'
 COL_KUESIONER_JENIS_KELAMIN = '2. Jenis Kelamin'
@@ -78,10 +134,12 @@ def mongo_db_connection():
 IMAGE_SUBDIR = 'images'
 
 # --- Variabel Global untuk Data dan Model ---
-df_prog = None
-tfidf_vectorizer = None
+# Model program (df_prog, vectorizer, matriks TF-IDF, indeks atribut) ada di `model_holder`
 df_exercises = None # Tambahkan variabel global untuk data latihan
-tfidf_matrix_prog = None
+cache_rekomendasi = CacheRekomendasi(kapasitas=REKOMENDASI_CACHE_SIZE, ttl_detik=REKOMENDASI_CACHE_TTL)
+cursor_rekomendasi = CacheRekomendasi(kapasitas=PAGINASI_CURSOR_SIZE, ttl_detik=PAGINASI_CURSOR_TTL) # token -> peringkat
+histogram_tahap = HistogramTahap() if INSTRUMENTASI_TAHAP else None
+pasang_pengamat_tahap(histogram_tahap)
 
 class User(UserMixin):
     def __init__(self, user_doc):
@@ -207,51 +265,222 @@ def create_feature_string_for_historical_user(row):
     except Exception as e:
         return ""
 
-def load_and_preprocess_data_from_db():
-    global df_prog, tfidf_vectorizer, tfidf_matrix_prog
+def get_questionnaire_signature():
+    """Tanda file kuesioner (ukuran + mtime); berubah berarti korpus fitting TF-IDF ikut berubah."""
+    if not os.path.exists(KUESIONER_CSV_PATH):
+        return ''
+    stat_kuesioner = os.stat(KUESIONER_CSV_PATH)
+    return f"{stat_kuesioner.st_size}-{stat_kuesioner.st_mtime_ns}"
+
+def get_catalog_version():
+    """
+    Versi katalog yang murah dihitung: jumlah dokumen program, _id terbaru, penghitung perubahan
+    di koleksi katalog_meta (dinaikkan populate_db.py), dan tanda file kuesioner.
+    """
+    with mongo_db_connection() as db:
+        programs_collection = db[PROGRAM_COLLECTION_NAME]
+        jumlah_program = programs_collection.count_documents({})
+        dokumen_terbaru = programs_collection.find_one({}, projection={'_id': 1}, sort=[('_id', -1)])
+        meta = db[KATALOG_META_COLLECTION_NAME].find_one({'_id': PROGRAM_COLLECTION_NAME})
+    id_terbaru = str(dokumen_terbaru['_id']) if dokumen_terbaru else ''
+    revisi = meta.get('revisi', 0) if meta else 0
+    info = f"{jumlah_program}|{id_terbaru}|{revisi}|{get_questionnaire_signature()}"
+    return hashlib.sha1(info.encode('utf-8')).hexdigest()[:16]
+
+def konfigurasi_model():
+    """
+    Pengaturan featurisasi yang menentukan isi model; disimpan di manifest artefak. Artefak atau model
+    aktif dengan konfigurasi lain tidak dipakai ulang, sehingga perubahan env berlaku setelah restart.
+    """
+    konfigurasi = {'vectorizer': MODEL_VECTORIZER}
+    if MODEL_VECTORIZER == 'hashing':
+        konfigurasi['n_fitur'] = MODEL_HASHING_N_FITUR
+    elif MODEL_VECTORIZER == 'lsa':
+        konfigurasi['rank'] = MODEL_LSA_RANK
+    if MODEL_ANN: # Jumlah cluster menentukan isi indeks; n_probe cukup diterapkan saat memuat
+        konfigurasi['ann_n_list'] = MODEL_ANN_N_LIST
+    return konfigurasi
+
+def _programs_to_dataframe(df_prog_list):
+    df_prog_baru = pd.DataFrame(df_prog_list)
+    if '_id' in df_prog_baru.columns: df_prog_baru = df_prog_baru.drop('_id', axis=1) # Gunakan df_prog = df_prog.drop() untuk menghindari SettingWithCopyWarning
+    return df_prog_baru.astype(str).fillna('')
+
+def load_historical_user_features():
+    """String fitur setiap baris kuesioner historis (ikut korpus fitting TF-IDF); list kosong jika tidak tersedia."""
+    if not os.path.exists(KUESIONER_CSV_PATH):
+        print(f"PERINGATAN: File '{KUESIONER_CSV_PATH}' tidak ditemukan.")
+        return []
     try:
-        with mongo_db_connection() as db:
-            programs_collection = db[PROGRAM_COLLECTION_NAME]
-            programs_cursor = programs_collection.find({})
-            df_prog_list = list(programs_cursor)
-            if not df_prog_list:
-                print("PERINGATAN: Tidak ada data program ditemukan di MongoDB.")
-                df_prog = pd.DataFrame()
-                return False
+        df_user_historical = pd.read_csv(KUESIONER_CSV_PATH)
+        df_user_historical.fillna('', inplace=True)
+        historical_user_features_list = df_user_historical.apply(create_feature_string_for_historical_user, axis=1).tolist()
+        print(f"Data kuesioner historis dimuat ({len(df_user_historical)} rekaman).")
+        return historical_user_features_list
+    except Exception as e:
+        print(f"Error memproses '{KUESIONER_CSV_PATH}': {e}")
+        return []
 
-        df_prog = pd.DataFrame(df_prog_list)
-        if '_id' in df_prog.columns: df_prog = df_prog.drop('_id', axis=1) # Gunakan df_prog = df_prog.drop() untuk menghindari SettingWithCopyWarning
-        df_prog = df_prog.astype(str).fillna('')
-        if 'fitur_gabungan_program' not in df_prog.columns or df_prog['fitur_gabungan_program'].isnull().all():
-            print("PERINGATAN: Kolom 'fitur_gabungan_program' tidak ada atau kosong.")
-            return False
-        program_features_list = df_prog['fitur_gabungan_program'].tolist()
-        historical_user_features_list = []
-        if os.path.exists(KUESIONER_CSV_PATH):
-            try:
-                df_user_historical = pd.read_csv(KUESIONER_CSV_PATH)
-                df_user_historical.fillna('', inplace=True)
-                historical_user_features_list = df_user_historical.apply(create_feature_string_for_historical_user, axis=1).tolist()
-                print(f"Data kuesioner historis dimuat ({len(df_user_historical)} rekaman).")
-            except Exception as e:
-                print(f"Error memproses '{KUESIONER_CSV_PATH}': {e}")
+def build_model_from_db(versi_katalog=None):
+    """Mengambil semua program dari MongoDB dan melatih TF-IDF dari awal. Mengembalikan ModelArtefak atau None."""
+    with mongo_db_connection() as db:
+        programs_collection = db[PROGRAM_COLLECTION_NAME]
+        programs_cursor = programs_collection.find({})
+        df_prog_list = list(programs_cursor)
+        if not df_prog_list:
+            print("PERINGATAN: Tidak ada data program ditemukan di MongoDB.")
+            return None
+
+    df_prog_baru = _programs_to_dataframe(df_prog_list)
+    if 'fitur_gabungan_program' not in df_prog_baru.columns or df_prog_baru['fitur_gabungan_program'].isnull().all():
+        print("PERINGATAN: Kolom 'fitur_gabungan_program' tidak ada atau kosong.")
+        return None
+    program_features_list = df_prog_baru['fitur_gabungan_program'].tolist()
+    tanda_kuesioner = get_questionnaire_signature()
+    historical_user_features_list = load_historical_user_features()
+    all_text_features_for_fitting = program_features_list[:]
+    if historical_user_features_list:
+        all_text_features_for_fitting.extend(filter(None, historical_user_features_list))
+    if not all_text_features_for_fitting:
+        print("ERROR: Tidak ada fitur teks untuk melatih TF-IDF.")
+        return None
+    vectorizer_baru = buat_vectorizer(MODEL_VECTORIZER, MODEL_HASHING_N_FITUR, MODEL_LSA_RANK)
+    vectorizer_baru.fit(all_text_features_for_fitting)
+    print(f"TF-IDF Vectorizer dilatih pada {len(all_text_features_for_fitting)} dokumen.")
+    matrix_baru = vectorizer_baru.transform(program_features_list)
+    print(f"Matriks TF-IDF program: {matrix_baru.shape}")
+    # Statistik frekuensi dokumen korpus fitting, dipakai pembaruan inkremental untuk melacak drift IDF.
+    # Mode LSA (matriks padat) selalu dilatih ulang penuh karena basis SVD ikut berubah.
+    frekuensi = None
+    if issparse(matrix_baru):
+        jumlah_kolom = matrix_baru.shape[1]
+        frekuensi = frekuensi_dokumen(matrix_baru, jumlah_kolom)
+        fitur_historis = [fitur for fitur in historical_user_features_list if fitur]
+        if fitur_historis:
+            frekuensi += frekuensi_dokumen(vectorizer_baru.transform(fitur_historis), jumlah_kolom)
+    indeks_ann = None
+    if MODEL_ANN: # Dibangun offline di sini agar ikut tersimpan di artefak (bangun_artefak.py)
+        indeks_ann = bangun_indeks_ann(matrix_baru, n_list=MODEL_ANN_N_LIST, n_probe=MODEL_ANN_N_PROBE)
+        print(f"Indeks ANN dibangun: {indeks_ann.n_list} cluster, n_probe {indeks_ann.n_probe}.")
+    return ModelArtefak(df_prog_baru, vectorizer_baru, matrix_baru, bangun_indeks_katalog(df_prog_baru), versi_katalog,
+                        frekuensi_dokumen=frekuensi, jumlah_dokumen=len(all_text_features_for_fitting),
+                        tanda_kuesioner=tanda_kuesioner, indeks_ann=indeks_ann, konfigurasi=konfigurasi_model())
+
+def update_model_incrementally(model_lama, versi_katalog):
+    """
+    Memperbarui `model_lama` hanya dengan program yang berubah sejak model itu dibuat, berdasarkan
+    field `hash_dokumen` yang ditulis populate_db.py. Mengembalikan ModelArtefak baru, atau None jika
+    perlu refit penuh (kuesioner atau konfigurasi model berubah, hash tidak tersedia, perubahan terlalu
+    besar, atau drift IDF). Bagian yang tetap sebanding dengan ukuran katalog: lihat `perbarui_model`.
+    """
+    if model_lama.tanda_kuesioner != get_questionnaire_signature() or 'hash_dokumen' not in model_lama.df_prog.columns:
+        return None
+    if model_lama.konfigurasi != konfigurasi_model():
+        return None
+    hash_lama = dict(zip(model_lama.df_prog['ID Program'], model_lama.df_prog['hash_dokumen']))
+    with mongo_db_connection() as db:
+        programs_collection = db[PROGRAM_COLLECTION_NAME]
+        ringkasan = list(programs_collection.find({}, projection={'_id': 0, 'ID Program': 1, 'hash_dokumen': 1}))
+        id_asli = {str(doc.get('ID Program')): doc.get('ID Program') for doc in ringkasan}
+        id_berubah = [str(doc.get('ID Program')) for doc in ringkasan
+                      if 'hash_dokumen' not in doc or hash_lama.get(str(doc.get('ID Program'))) != str(doc['hash_dokumen'])]
+        id_dihapus = [id_program for id_program in hash_lama if id_program not in id_asli]
+        if len(id_berubah) + len(id_dihapus) > MODEL_BATAS_PERUBAHAN_INKREMENTAL * max(len(hash_lama), 1):
+            return None
+        dokumen_berubah = list(programs_collection.find({'ID Program': {'$in': [id_asli[i] for i in id_berubah]}})) if id_berubah else []
+
+    df_berubah = _programs_to_dataframe(dokumen_berubah) if dokumen_berubah else model_lama.df_prog.iloc[:0]
+    model_baru, drift = perbarui_model(model_lama, df_berubah, id_dihapus, ambang_drift=MODEL_AMBANG_DRIFT_IDF,
+                                       dokumen_kuesioner=[fitur for fitur in load_historical_user_features() if fitur])
+    if model_baru is None:
+        if drift is None:
+            print("Pembaruan inkremental tidak didukung untuk model ini, model dilatih ulang penuh.")
         else:
-            print(f"PERINGATAN: File '{KUESIONER_CSV_PATH}' tidak ditemukan.")
-        all_text_features_for_fitting = program_features_list[:]
-        if historical_user_features_list:
-            all_text_features_for_fitting.extend(filter(None, historical_user_features_list))
-        if not all_text_features_for_fitting:
-            print("ERROR: Tidak ada fitur teks untuk melatih TF-IDF.")
-            return False
-        tfidf_vectorizer = TfidfVectorizer(stop_words='english')
-        tfidf_vectorizer.fit(all_text_features_for_fitting)
-        print(f"TF-IDF Vectorizer dilatih pada {len(all_text_features_for_fitting)} dokumen.")
-        tfidf_matrix_prog = tfidf_vectorizer.transform(program_features_list)
-        print(f"Matriks TF-IDF program: {tfidf_matrix_prog.shape}")
-        return True
-    except Exception as e:
-        print(f"Error signifikan saat load/preprocess data: {e}")
-        return False
+            print(f"Drift IDF {drift:.4f} melewati ambang {MODEL_AMBANG_DRIFT_IDF}, model dilatih ulang penuh.")
+        return None
+    model_baru.versi_katalog = versi_katalog
+    print(f"Model diperbarui inkremental: {len(id_berubah)} program baru/berubah, {len(id_dihapus)} dihapus, drift IDF {drift:.4f}.")
+    return model_baru
+
+def _pasang_indeks_posting(artefak):
+    """Membangun posting list untuk top-k eksak (tidak disimpan di artefak) jika MODEL_POSTING aktif."""
+    if artefak is not None and MODEL_POSTING and not MODEL_ANN and issparse(artefak.tfidf_matrix_prog):
+        artefak.indeks_posting = bangun_indeks_posting(artefak.tfidf_matrix_prog)
+    return artefak
+
+def _muat_artefak_cocok(versi_katalog):
+    """
+    Artefak mmap di disk jika versinya sama dengan katalog saat ini dan dibangun dengan konfigurasi
+    saat ini (lihat `konfigurasi_model`, termasuk mode ANN dan jumlah cluster), atau None.
+    n_probe indeks ANN selalu diambil dari MODEL_ANN_N_PROBE, bukan dari artefak.
+    """
+    artefak = muat_artefak(MODEL_ARTEFAK_DIR, versi_katalog, konfigurasi=konfigurasi_model()) if MODEL_ARTEFAK_DIR else None
+    if artefak is None:
+        return None
+    if artefak.indeks_ann is not None:
+        artefak.indeks_ann.n_probe = MODEL_ANN_N_PROBE
+    print(f"Artefak model versi {versi_katalog} dimuat dari '{MODEL_ARTEFAK_DIR}'.")
+    return artefak
+
+def load_model(versi_katalog):
+    """
+    Memuat model untuk `versi_katalog`: artefak mmap jika cocok, lalu pembaruan inkremental dari
+    model aktif, dan terakhir pelatihan ulang penuh dari MongoDB.
+    Jika artefak ditulis otomatis, membangun + menyimpan dilakukan di bawah kunci file lintas proses:
+    satu worker WSGI membangun, worker lain menunggu lalu memory-map artefak yang sama.
+    """
+    # Jalur cepat: memory-map artefak di disk jika versinya sama dengan katalog saat ini
+    artefak = _muat_artefak_cocok(versi_katalog)
+    if artefak is not None:
+        return _pasang_indeks_posting(artefak)
+    if not (MODEL_ARTEFAK_DIR and MODEL_ARTEFAK_TULIS_OTOMATIS):
+        return _pasang_indeks_posting(_bangun_model(versi_katalog))
+    with kunci_artefak(MODEL_ARTEFAK_DIR):
+        # Worker lain mungkin sudah menulis artefak versi ini selama kita menunggu kunci
+        artefak = _muat_artefak_cocok(versi_katalog)
+        if artefak is not None:
+            return _pasang_indeks_posting(artefak)
+        artefak = _bangun_model(versi_katalog)
+        if artefak is not None:
+            try:
+                simpan_artefak(MODEL_ARTEFAK_DIR, artefak)
+                # Pakai versi mmap dari disk, bukan salinan privat hasil fitting, agar semua
+                # worker WSGI berbagi halaman yang sama lewat page cache
+                artefak = muat_artefak(MODEL_ARTEFAK_DIR, versi_katalog, konfigurasi=artefak.konfigurasi) or artefak
+            except OSError as e:
+                print(f"PERINGATAN: Gagal menyimpan artefak model: {e}")
+    return _pasang_indeks_posting(artefak)
+
+def _bangun_model(versi_katalog):
+    """Pembaruan inkremental dari model aktif jika memungkinkan, selain itu pelatihan ulang penuh."""
+    model_lama = model_holder.model
+    artefak = None
+    if model_lama is not None and MODEL_INKREMENTAL:
+        try:
+            artefak = update_model_incrementally(model_lama, versi_katalog)
+        except Exception as e: # Jangan batalkan pemuatan; refit penuh di bawah
+            print(f"Error pembaruan inkremental, model dilatih ulang penuh: {e}")
+    if artefak is None:
+        artefak = build_model_from_db(versi_katalog)
+    if artefak is not None and MODEL_ANN and artefak.indeks_ann is None:
+        artefak.indeks_ann = bangun_indeks_ann(artefak.tfidf_matrix_prog, n_list=MODEL_ANN_N_LIST, n_probe=MODEL_ANN_N_PROBE)
+    elif artefak is not None and not MODEL_ANN:
+        artefak.indeks_ann = None
+    return artefak
+
+def on_model_swapped(model):
+    cache_rekomendasi.ganti_versi_katalog() # Katalog baru, hasil rekomendasi lama tidak berlaku lagi
+    cursor_rekomendasi.ganti_versi_katalog() # Indeks baris di cursor lama tidak lagi cocok dengan katalog baru
+
+model_holder = PemegangModel(load_model, get_catalog_version, interval_cek=MODEL_CEK_VERSI_INTERVAL, saat_ganti=on_model_swapped)
+
+def load_and_preprocess_data_from_db():
+    """
+    Memaksa pemuatan ulang model (single-flight). Jika pemuatan lain sedang berjalan, satu pemuatan
+    paksa lagi dijalankan setelahnya. Mengembalikan True jika ada model yang siap dipakai.
+    """
+    model = model_holder.muat(paksa=True)
+    return model is not None and not model.df_prog.empty
 
 # Fungsi untuk memuat data latihan dari CSV
 def load_exercises_data():
@@ -273,33 +502,61 @@ def load_exercises_data():
             return False
     return True
 
-def get_recommendations_from_model(user_input_data, top_n=10):
-    global df_prog, tfidf_vectorizer, tfidf_matrix_prog
-    if df_prog is None or tfidf_vectorizer is None or tfidf_matrix_prog is None or df_prog.empty:
-        if not load_and_preprocess_data_from_db():
-            flash("Sistem sedang mempersiapkan data, mohon coba lagi.", "warning")
-            return []
+def get_ranking_from_model(user_input_data):
+    """
+    Mengembalikan (model, peringkat) untuk satu profil, dengan peringkat berupa (indeks baris df_prog,
+    original_similarity, adjusted_similarity), atau None jika data belum siap.
+    Hasil di-cache per profil ternormalisasi.
+    """
+    model = model_holder.pastikan_termuat() # Satu snapshot model dipakai sampai hidrasi selesai
+    if model is None:
+        flash("Sistem sedang mempersiapkan data, mohon coba lagi.", "warning")
+        return None
 
-    if df_prog.empty:
+    if model.df_prog.empty:
         flash("Tidak ada data program untuk rekomendasi.", "error")
-        return []
+        return None
 
     user_feature_string = create_feature_string_for_new_user(user_input_data)
-    
-    # Panggil engine rekomendasi yang sudah terpusat
-    recommendations_df = get_recommendations_from_engine(
+
+    # Profil yang sama (string fitur + preferensi ternormalisasi) menghasilkan peringkat yang sama
+    kunci_cache = (model.versi_katalog, user_feature_string, tuple(sorted(normalisasi_preferensi(user_input_data).items())))
+    ranking = cache_rekomendasi.ambil(kunci_cache)
+    if ranking is not None:
+        return model, ranking
+
+    # Panggil engine rekomendasi yang sudah terpusat. Seluruh pool kandidat diperingkat sekali
+    # agar setiap jumlah tampilan (tombol "More") cukup mengambil potongan dari hasil ini.
+    ranking = get_ranking_from_engine(
         profil_pengguna_string=user_feature_string,
         profil_pengguna_dict=user_input_data,
-        df_latihan=df_prog,
-        tfidf_vectorizer=tfidf_vectorizer,
-        tfidf_matrix_latihan=tfidf_matrix_prog,
-        final_top_n=top_n
+        tfidf_vectorizer=model.tfidf_vectorizer,
+        tfidf_matrix_latihan=model.tfidf_matrix_prog,
+        indeks_katalog=model.indeks_katalog,
+        final_top_n=CANDIDATE_POOL_SIZE,
+        indeks_ann=model.indeks_ann,
+        indeks_posting=model.indeks_posting
     )
-
-    # Ubah DataFrame hasil menjadi list of dictionaries untuk template
-    recommendations_list = recommendations_df.to_dict(orient='records')
+    cache_rekomendasi.simpan(kunci_cache, ranking)
+    return model, ranking
+
+def hydrate_recommendations(model, ranking, top_n):
+    """Mengubah `top_n` teratas dari peringkat menjadi list of dictionaries untuk template."""
+    mulai = time.perf_counter()
+    indeks_baris, original_similarity, adjusted_similarity = ranking
+    # Hanya baris yang ditampilkan yang dihidrasi, dari store rekaman yang dibangun saat model dimuat
+    recommendations_list = model.rekaman_program.hidrasi(indeks_baris[:top_n], original_similarity[:top_n],
+                                                         adjusted_similarity[:top_n])
+    if histogram_tahap is not None:
+        histogram_tahap('hidrasi', time.perf_counter() - mulai, len(recommendations_list))
     return recommendations_list
 
+def get_recommendations_from_model(user_input_data, top_n=10):
+    hasil = get_ranking_from_model(user_input_data)
+    if hasil is None:
+        return []
+    return hydrate_recommendations(*hasil, top_n)
+
 def get_hari_luang(hari_sibuk_str, waktu_luang_user=None):
     semua_hari = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"]
     hari_sibuk_input = [h.strip().capitalize() for h in hari_sibuk_str.split(',') if h.strip()]
@@ -328,30 +585,6 @@ def get_program_details_by_id(program_id):
 
     return None # Kembalikan None jika tidak ditemukan sama sekali
 
-def parse_age_range(age_range_str):
-    """
-    Parses an age range string like '18-25 Tahun' or '26-35' into (min_age, max_age).
-    Returns (None, None) if parsing fails.
-    """
-    if not age_range_str or not isinstance(age_range_str, str):
-        return None, None
-    
-    # Find all numbers in the string
-    numbers = re.findall(r'\d+', age_range_str)
-    
-    if len(numbers) >= 2: # Use >= 2 to be safe
-        try:
-            # Assume first two numbers are min and max
-            return int(numbers[0]), int(numbers[1])
-        except (ValueError, IndexError):
-            return None, None
-    elif len(numbers) == 1:
-        try:
-            return int(numbers[0]), int(numbers[0])
-        except ValueError:
-            return None, None
-    return None, None
-
 def format_description_for_html(description_str):
     return description_str.replace('\n', '<br>') if isinstance(description_str, str) else "Deskripsi tidak tersedia."
 
@@ -415,20 +648,33 @@ def recommend_route():
         except ValueError:
             num_to_display = 4 # Fallback jika ada error konversi
 
-        # Simpan 'pengalaman' ke profil pengguna
-        with mongo_db_connection() as db:
-            user_col = db[USER_COLLECTION_NAME]
-            user_col.update_one({'_id': ObjectId(current_user.id)}, {'$set': {'pengalaman': user_input_from_form['pengalaman']}})
-
-        # Perbarui current_user object agar perubahan tercermin segera
-        current_user.pengalaman = user_input_from_form['pengalaman']
-
-
         user_input_from_form['hari_luang_user'] = get_hari_luang(
             user_input_from_form['hari_sibuk'], user_input_from_form['waktu_luang']
         )
 
-        recommendations = get_recommendations_from_model(user_input_from_form, top_n=num_to_display)
+        # Halaman berikutnya (tombol "More") cukup mengambil peringkat dari cursor, tanpa menghitung ulang
+        hasil_peringkat = None
+        cursor = request.form.get('cursor')
+        if cursor:
+            cursor_data = cursor_rekomendasi.ambil(cursor)
+            if cursor_data and cursor_data['user_id'] == current_user.id:
+                hasil_peringkat = cursor_data['hasil_peringkat']
+
+        if hasil_peringkat is None:
+            # Simpan 'pengalaman' ke profil pengguna
+            with mongo_db_connection() as db:
+                user_col = db[USER_COLLECTION_NAME]
+                user_col.update_one({'_id': ObjectId(current_user.id)}, {'$set': {'pengalaman': user_input_from_form['pengalaman']}})
+
+            # Perbarui current_user object agar perubahan tercermin segera
+            current_user.pengalaman = user_input_from_form['pengalaman']
+
+            hasil_peringkat = get_ranking_from_model(user_input_from_form)
+            cursor = secrets.token_urlsafe(16)
+            if hasil_peringkat is not None:
+                cursor_rekomendasi.simpan(cursor, {'user_id': current_user.id, 'hasil_peringkat': hasil_peringkat})
+
+        recommendations = hydrate_recommendations(*hasil_peringkat, num_to_display) if hasil_peringkat is not None else []
         
         actual_num_shown = len(recommendations)
         # Tampilkan tombol "More" jika jumlah rekomendasi yang didapat sama dengan yang diminta,
@@ -479,9 +725,24 @@ def recommend_route():
                                recommendations=recommendations,
                                activity_schedule_suggestion=activity_schedule_suggestion_html,
                                show_more_button_flag=show_more_button_flag,
-                               next_num_to_show_for_button=next_num_to_show_for_button_val)
+                               next_num_to_show_for_button=next_num_to_show_for_button_val,
+                               cursor=cursor)
     return redirect(url_for('form_rekomendasi'))
 
+@app.route('/cache_rekomendasi/stats')
+@login_required
+def cache_rekomendasi_stats():
+    # Statistik hit/miss/eviction cache rekomendasi dan status model dalam format JSON
+    return {**cache_rekomendasi.statistik(), 'model': model_holder.statistik()}
+
+@app.route('/instrumentasi/stats')
+@login_required
+def instrumentasi_stats():
+    # Histogram durasi per tahap pipeline rekomendasi (aktif jika INSTRUMENTASI_TAHAP=1)
+    if histogram_tahap is None:
+        return {'aktif': False}
+    return {'aktif': True, 'tahap': histogram_tahap.statistik()}
+
 @app.route('/program/<program_id>')
 def program_detail_route(program_id):
     program_details = get_program_details_by_id(program_id)
@@ -509,15 +770,9 @@ def dashboard():
     try:
         df_kuesioner = pd.read_csv(KUESIONER_CSV_PATH)
         stats["total_historical_users"] = len(df_kuesioner)
-        # Ambil total program dari df_prog yang sudah dimuat
-        if df_prog is not None and not df_prog.empty:
-            stats["total_programs"] = len(df_prog)
-        else:
-            # Coba muat jika belum ada
-            if load_and_preprocess_data_from_db() and df_prog is not None:
-                stats["total_programs"] = len(df_prog)
-            else:
-                stats["total_programs"] = 0
+        # Ambil total program dari model yang sudah dimuat (dimuat sekali jika belum ada)
+        model = model_holder.pastikan_termuat()
+        stats["total_programs"] = len(model.df_prog) if model is not None else 0
     except Exception as e:
         print(f"Error saat mengambil statistik program: {e}") # Logging error
         flash(f"Gagal mengambil data statistik program: {e}", "error")
@@ -609,15 +864,7 @@ def form_rekomendasi():
         "tempat": "8. Di mana Anda biasanya berolahraga?",
         "pengalaman": "9. Bagaimana tingkat pengalaman Anda dalam berolahraga?"
     }
-    options_for_form = {
-        "jenis_kelamin": ["Pria", "Wanita"],
-        "tujuan": ["Menurunkan berat badan", "Meningkatkan massa otot", "Menjaga kesehatan"],
-        "jenis_latihan": ["Kardio (Lari, Sepeda, Renang)", "Latihan Fisik (Angkat Beban, Push up, Squat)", "HIIT"],
-        "hari_sibuk": ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"],
-        "waktu_luang": ["Pagi (06:00-09:00)", "Siang (12:00-14:00)", "Sore (16:00-18:00)"],
-        "tempat": ["Rumah", "Gym/Fitness Center", "Outdoor (Taman, Lapangan)"],
-        "pengalaman": ["Pemula (Baru memulai atau jarang)", "Menengah (Cukup rutin, paham dasar)", "Mahir (Sangat rutin, teknik bagus)"]
-    }
+    options_for_form = OPSI_FORM_REKOMENDASI
 
     # Coba ambil preferensi terakhir dari session, jika ada
     last_preferences = session.pop('last_preferences', None) # Gunakan pop untuk menghapus dari session setelah diambil
@@ -635,10 +882,9 @@ def form_rekomendasi():
         user_data_for_form['jenis_kelamin'] = current_user.jenis_kelamin
         user_data_for_form['pengalaman'] = current_user.pengalaman
     
-    global df_prog
-    if df_prog is None or df_prog.empty:
-        if not load_and_preprocess_data_from_db():
-            flash("Gagal memuat data program yang diperlukan.", "warning")
+    model = model_holder.pastikan_termuat()
+    if model is None or model.df_prog.empty:
+        flash("Gagal memuat data program yang diperlukan.", "warning")
     current_year = datetime.datetime.now().year # Dapatkan tahun saat ini
     return render_template('index.html', fields=form_fields_desc, options=options_for_form,
                            salam_pembuka=salam_pembuka, user_data=user_data_for_form,
@@ -1099,6 +1345,11 @@ def advanced_exercises_recommendations():
     }
     return resp
 
+@app.before_request
+def start_model_monitor():
+    # Pemantau versi katalog dijalankan di setiap proses worker (thread tidak ikut ter-fork)
+    model_holder.mulai_pemantauan()
+
 # --- Inisialisasi Aplikasi ---
 if __name__ == '__main__':
     print("Memulai aplikasi CBF Rekomendasi...")
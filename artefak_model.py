@@ -0,0 +1,259 @@
+import contextlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError: # Windows: tanpa kunci lintas proses
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from recommender_engine import IndeksKatalog, RekamanProgram
+from indeks_ann import IndeksANN
+from vektorisasi import VectorizerHashing, VectorizerLSA
+
+# Versi format artefak; naikkan jika struktur file di bawah berubah
+FORMAT_ARTEFAK = 5
+FILE_AKTIF = 'AKTIF' # Berisi nama subdirektori artefak yang sedang dipakai
+FILE_MANIFEST = 'manifest.json'
+FILE_PROGRAM = 'program.pkl'
+FILE_KUNCI = '.kunci' # File kunci flock untuk membangun + menyimpan artefak (lintas proses)
+MASA_TENGGANG_HAPUS = 300 # Detik sejak artefak digantikan sebelum direktorinya boleh dihapus
+
+# Atribut IndeksKatalog yang disimpan sebagai array .npy
+ATRIBUT_INDEKS = ('kebugaran', 'kebugaran_persis', 'tempat', 'gender', 'gender_netral',
+                  'tujuan', 'jenis_latihan', 'usia_min', 'usia_max')
+# Parameter TfidfVectorizer yang ikut disimpan agar transform() identik setelah dimuat
+PARAMETER_VECTORIZER = ('analyzer', 'lowercase', 'ngram_range', 'norm', 'smooth_idf', 'stop_words',
+                        'strip_accents', 'sublinear_tf', 'token_pattern', 'use_idf')
+
+class ModelArtefak:
+    """
+    Isi satu artefak model: katalog program, vectorizer, matriks TF-IDF program, dan indeks atribut.
+    `frekuensi_dokumen`/`jumlah_dokumen` adalah statistik korpus fitting (untuk pembaruan inkremental),
+    `tanda_kuesioner` menandai file kuesioner yang ikut dipakai saat fitting.
+    `indeks_ann` (opsional) adalah indeks IVF untuk candidate generation aproksimasi.
+    `indeks_posting` (opsional) adalah posting list untuk top-k eksak; tidak ikut disimpan karena
+    cukup murah dibangun ulang dari matriks saat dimuat.
+    `rekaman_program` adalah store rekaman untuk hidrasi hasil, dibangun dari `df_prog` saat dibuat.
+    `konfigurasi` (opsional) adalah pengaturan pembuatan model (jenis vectorizer dan parameternya) yang
+    dicatat di manifest; artefak dengan konfigurasi lain ditolak saat dimuat (lihat `muat_artefak`).
+    """
+    def __init__(self, df_prog, tfidf_vectorizer, tfidf_matrix_prog, indeks_katalog, versi_katalog,
+                 frekuensi_dokumen=None, jumlah_dokumen=None, tanda_kuesioner=None, indeks_ann=None,
+                 konfigurasi=None):
+        self.df_prog = df_prog
+        self.tfidf_vectorizer = tfidf_vectorizer
+        self.tfidf_matrix_prog = tfidf_matrix_prog
+        self.indeks_katalog = indeks_katalog
+        self.versi_katalog = versi_katalog
+        self.frekuensi_dokumen = frekuensi_dokumen
+        self.jumlah_dokumen = jumlah_dokumen
+        self.tanda_kuesioner = tanda_kuesioner
+        self.indeks_ann = indeks_ann
+        self.konfigurasi = konfigurasi
+        self.indeks_posting = None
+        self.rekaman_program = RekamanProgram(df_prog)
+
+def simpan_artefak(direktori: str, artefak: ModelArtefak) -> str:
+    """
+    Menulis artefak ke subdirektori baru di `direktori`, lalu mengganti file AKTIF secara atomik.
+    Pembaca yang sedang memuat artefak lama tidak terganggu: artefak lama baru dihapus setelah
+    digantikan lebih dari `MASA_TENGGANG_HAPUS` detik (lihat `_hapus_artefak_lama`).
+    Mengembalikan path subdirektori.
+    """
+    os.makedirs(direktori, exist_ok=True)
+    nama = f"{artefak.versi_katalog}-{uuid.uuid4().hex[:8]}"
+    path = os.path.join(direktori, nama)
+    os.makedirs(path)
+
+    if isinstance(artefak.tfidf_matrix_prog, np.ndarray):
+        # Mode LSA: embedding padat float32 disimpan apa adanya agar bisa di-memory-map
+        matriks = artefak.tfidf_matrix_prog
+        np.save(os.path.join(path, 'embedding.npy'), np.ascontiguousarray(matriks, dtype=np.float32))
+    else:
+        matriks = csr_matrix(artefak.tfidf_matrix_prog)
+        np.save(os.path.join(path, 'data.npy'), matriks.data)
+        np.save(os.path.join(path, 'indices.npy'), matriks.indices)
+        np.save(os.path.join(path, 'indptr.npy'), matriks.indptr)
+    np.save(os.path.join(path, 'idf.npy'), artefak.tfidf_vectorizer.idf_)
+    if artefak.frekuensi_dokumen is not None:
+        np.save(os.path.join(path, 'frekuensi_dokumen.npy'), artefak.frekuensi_dokumen)
+    for atribut in ATRIBUT_INDEKS:
+        np.save(os.path.join(path, f'{atribut}.npy'), getattr(artefak.indeks_katalog, atribut))
+    # Semua posting list indeks terbalik digabung dalam satu array; manifest mencatat offset tiap kunci
+    kunci_indeks, offset_indeks, daftar_posting = [], [0], []
+    for (atribut, nilai), baris in artefak.indeks_katalog.indeks_terbalik.items():
+        kunci_indeks.append([atribut, list(nilai) if isinstance(nilai, tuple) else nilai])
+        daftar_posting.append(baris)
+        offset_indeks.append(offset_indeks[-1] + len(baris))
+    np.save(os.path.join(path, 'posting.npy'),
+            np.concatenate(daftar_posting) if daftar_posting else np.empty(0, dtype=np.int64))
+    artefak.df_prog.to_pickle(os.path.join(path, FILE_PROGRAM))
+    if artefak.indeks_ann is not None:
+        np.save(os.path.join(path, 'ann_sentroid.npy'), artefak.indeks_ann.sentroid)
+        np.save(os.path.join(path, 'ann_baris.npy'), artefak.indeks_ann.baris)
+        np.save(os.path.join(path, 'ann_offset.npy'), artefak.indeks_ann.offset)
+
+    vectorizer = artefak.tfidf_vectorizer
+    if isinstance(vectorizer, VectorizerLSA):
+        # Mode LSA: komponen SVD disimpan terpisah, vocabulary dan IDF milik TfidfVectorizer dasarnya
+        np.save(os.path.join(path, 'lsa_komponen.npy'), vectorizer.komponen_)
+        info_vectorizer, daftar_term = _info_vectorizer(vectorizer.dasar)
+        info_vectorizer = {'jenis': 'lsa', 'rank': vectorizer.rank, 'seed': vectorizer.seed, 'dasar': info_vectorizer}
+    else:
+        info_vectorizer, daftar_term = _info_vectorizer(vectorizer)
+    manifest = {
+        'format': FORMAT_ARTEFAK,
+        'versi_katalog': artefak.versi_katalog,
+        'dibuat': time.time(),
+        'shape': list(matriks.shape),
+        'jumlah_program': artefak.indeks_katalog.jumlah_program,
+        'jumlah_dokumen': artefak.jumlah_dokumen,
+        'frekuensi_dokumen': artefak.frekuensi_dokumen is not None,
+        'tanda_kuesioner': artefak.tanda_kuesioner,
+        'konfigurasi': artefak.konfigurasi,
+        'ann': {'n_probe': artefak.indeks_ann.n_probe} if artefak.indeks_ann is not None else None,
+        'indeks_terbalik': {'kunci': kunci_indeks, 'offset': offset_indeks},
+        'vectorizer': info_vectorizer,
+        'vocabulary': daftar_term,
+    }
+    with open(os.path.join(path, FILE_MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+    # Ganti penunjuk AKTIF secara atomik
+    path_sementara = os.path.join(direktori, f'{FILE_AKTIF}.{uuid.uuid4().hex[:8]}')
+    with open(path_sementara, 'w', encoding='utf-8') as f:
+        f.write(nama)
+    os.replace(path_sementara, os.path.join(direktori, FILE_AKTIF))
+    _hapus_artefak_lama(direktori, nama)
+    return path
+
+def _info_vectorizer(vectorizer):
+    """Parameter vectorizer untuk manifest, beserta vocabulary (list term urut kolom) jika ada."""
+    if isinstance(vectorizer, VectorizerHashing):
+        # Mode hashing tidak punya vocabulary; cukup lebar ruang hash dan IDF per kolom
+        return {'jenis': 'hashing', 'n_fitur': vectorizer.n_fitur,
+                'stop_words': vectorizer.stop_words, 'smooth_idf': vectorizer.smooth_idf}, None
+    # Vocabulary disimpan sebagai list term, urut sesuai kolom matriks
+    daftar_term = [None] * len(vectorizer.vocabulary_)
+    for term, kolom in vectorizer.vocabulary_.items():
+        daftar_term[kolom] = term
+    parameter = vectorizer.get_params()
+    return {'jenis': 'tfidf', 'parameter': {nama_param: parameter[nama_param] for nama_param in PARAMETER_VECTORIZER}}, daftar_term
+
+def _vectorizer_dari_manifest(info_vectorizer: dict, manifest: dict, idf: np.ndarray):
+    """Membangun ulang vectorizer TF-IDF/hashing dari manifest tanpa fitting."""
+    if info_vectorizer['jenis'] == 'hashing':
+        vectorizer = VectorizerHashing(n_fitur=info_vectorizer['n_fitur'], stop_words=info_vectorizer['stop_words'],
+                                       smooth_idf=info_vectorizer['smooth_idf'])
+        vectorizer.jumlah_dokumen = manifest['jumlah_dokumen'] or 0
+    else:
+        parameter = dict(info_vectorizer['parameter'])
+        parameter['ngram_range'] = tuple(parameter['ngram_range'])
+        vectorizer = TfidfVectorizer(**parameter)
+        vectorizer.vocabulary_ = {term: kolom for kolom, term in enumerate(manifest['vocabulary'])}
+    vectorizer.idf_ = idf
+    return vectorizer
+
+def _hapus_artefak_lama(direktori: str, nama_aktif: str, masa_tenggang: float = MASA_TENGGANG_HAPUS):
+    """
+    Menghapus subdirektori artefak yang lebih lama dari artefak aktif dan sudah digantikan (oleh
+    subdirektori berikutnya) lebih dari `masa_tenggang` detik, agar worker yang baru saja membuka
+    artefak lama masih sempat memuatnya. Subdirektori yang lebih baru dari artefak aktif tidak disentuh.
+    Gagal diam-diam jika file masih dipakai.
+    """
+    daftar = sorted((os.path.getmtime(os.path.join(direktori, nama)), nama) for nama in os.listdir(direktori)
+                    if os.path.isdir(os.path.join(direktori, nama)))
+    urutan_aktif = next((i for i, (_, nama) in enumerate(daftar) if nama == nama_aktif), None)
+    if urutan_aktif is None:
+        return
+    sekarang = time.time()
+    for i in range(urutan_aktif):
+        waktu_diganti = daftar[i + 1][0]
+        if sekarang - waktu_diganti >= masa_tenggang:
+            shutil.rmtree(os.path.join(direktori, daftar[i][1]), ignore_errors=True)
+
+@contextlib.contextmanager
+def kunci_artefak(direktori: str):
+    """
+    Kunci eksklusif lintas proses (flock) pada `direktori`, dipegang selama membangun + menyimpan
+    artefak. Worker lain menunggu lalu memuat artefak yang sudah ditulis pemegang kunci, bukan
+    melatih ulang sendiri. Tanpa fcntl (Windows) kunci ini tidak berbuat apa-apa.
+    """
+    os.makedirs(direktori, exist_ok=True)
+    with open(os.path.join(direktori, FILE_KUNCI), 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def path_artefak_aktif(direktori: str):
+    """Mengembalikan path subdirektori artefak yang aktif, atau None jika belum ada."""
+    try:
+        with open(os.path.join(direktori, FILE_AKTIF), encoding='utf-8') as f:
+            nama = f.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(direktori, nama)
+    return path if os.path.isdir(path) else None
+
+def muat_artefak(direktori: str, versi_katalog=None, mmap_mode='r', konfigurasi=None):
+    """
+    Memuat artefak aktif. Array besar di-memory-map (`mmap_mode='r'`) sehingga tidak ada
+    fitting ulang dan halaman hanya dibaca saat dipakai. Mengembalikan None jika artefak
+    tidak ada, formatnya berbeda, versi katalognya tidak sama dengan `versi_katalog`, atau
+    konfigurasi pembuatannya tidak sama dengan `konfigurasi` (jika diberikan).
+    """
+    path = path_artefak_aktif(direktori)
+    if path is None:
+        return None
+    with open(os.path.join(path, FILE_MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT_ARTEFAK:
+        return None
+    if versi_katalog is not None and manifest['versi_katalog'] != versi_katalog:
+        return None
+    if konfigurasi is not None and manifest.get('konfigurasi') != konfigurasi:
+        return None
+
+    def _array(nama):
+        return np.load(os.path.join(path, f'{nama}.npy'), mmap_mode=mmap_mode)
+
+    info_vectorizer = manifest['vectorizer']
+    if info_vectorizer['jenis'] == 'lsa':
+        matriks = _array('embedding')
+        vectorizer = VectorizerLSA(rank=info_vectorizer['rank'], seed=info_vectorizer['seed'],
+                                   dasar=_vectorizer_dari_manifest(info_vectorizer['dasar'], manifest, np.asarray(_array('idf'))))
+        vectorizer.komponen_ = np.asarray(_array('lsa_komponen'))
+    else:
+        matriks = csr_matrix((_array('data'), _array('indices'), _array('indptr')), shape=tuple(manifest['shape']), copy=False)
+        vectorizer = _vectorizer_dari_manifest(info_vectorizer, manifest, np.asarray(_array('idf')))
+
+    # Posting list berupa view ke satu array mmap, jadi dibagi antar proses tanpa salinan
+    posting = _array('posting')
+    offset = manifest['indeks_terbalik']['offset']
+    indeks_terbalik = {}
+    for i, (atribut, nilai) in enumerate(manifest['indeks_terbalik']['kunci']):
+        indeks_terbalik[(atribut, tuple(nilai) if isinstance(nilai, list) else nilai)] = posting[offset[i]:offset[i + 1]]
+    indeks_katalog = IndeksKatalog(manifest['jumlah_program'], *(_array(atribut) for atribut in ATRIBUT_INDEKS),
+                                   indeks_terbalik=indeks_terbalik)
+    df_prog = pd.read_pickle(os.path.join(path, FILE_PROGRAM))
+    frekuensi_dokumen = _array('frekuensi_dokumen') if manifest['frekuensi_dokumen'] else None
+    info_ann = manifest.get('ann')
+    indeks_ann = (IndeksANN(_array('ann_sentroid'), _array('ann_baris'), _array('ann_offset'), info_ann['n_probe'])
+                  if info_ann else None)
+    return ModelArtefak(df_prog, vectorizer, matriks, indeks_katalog, manifest['versi_katalog'],
+                        frekuensi_dokumen=frekuensi_dokumen, jumlah_dokumen=manifest['jumlah_dokumen'],
+                        tanda_kuesioner=manifest['tanda_kuesioner'], indeks_ann=indeks_ann,
+                        konfigurasi=manifest.get('konfigurasi'))
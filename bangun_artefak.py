@@ -0,0 +1,30 @@
+import time
+
+import app
+from artefak_model import muat_artefak, simpan_artefak
+
+# Langkah build: latih model dari MongoDB sekali, lalu tulis artefak yang bisa di-memory-map oleh app.py
+def main():
+    if not app.MODEL_ARTEFAK_DIR:
+        print("ERROR: MODEL_ARTEFAK_DIR kosong, tidak ada tujuan artefak.")
+        return
+
+    versi_katalog = app.get_catalog_version()
+    print(f"Versi katalog saat ini: {versi_katalog}")
+
+    mulai = time.perf_counter()
+    artefak = app.build_model_from_db(versi_katalog)
+    if artefak is None:
+        print("ERROR: Gagal membangun model dari database.")
+        return
+    print(f"Model dilatih dalam {(time.perf_counter() - mulai) * 1000:.1f} ms.")
+
+    path = simpan_artefak(app.MODEL_ARTEFAK_DIR, artefak)
+    print(f"Artefak ditulis ke '{path}'.")
+
+    mulai = time.perf_counter()
+    muat_artefak(app.MODEL_ARTEFAK_DIR, versi_katalog)
+    print(f"Artefak dimuat ulang (mmap) dalam {(time.perf_counter() - mulai) * 1000:.1f} ms.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import time
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from data_benchmark import gandakan_katalog, muat_katalog, profil_kuesioner
+from indeks_posting import bangun_indeks_posting
+from recommender_engine import CANDIDATE_POOL_SIZE, _top_k_menurun, _urutan_menurun, bangun_indeks_katalog, dapatkan_peringkat
+
+# --- Konfigurasi Benchmark ---
+UKURAN_KATALOG = (10_000, 100_000, 1_000_000) # Jumlah program sintetis
+ULANGAN = 20 # Jumlah pengulangan per skenario, waktu yang dilaporkan adalah median
+UKURAN_KATALOG_POSTING = (400, 10_000, 100_000, 300_000) # 400 = katalog asli, selebihnya sintetis
+
+def _skor_sintetis(jumlah_program: int, seed: int = 42) -> np.ndarray:
+    """
+    Membuat skor cosine sintetis di [0, 1]. Skor dibulatkan agar ada nilai yang seri,
+    seperti program duplikat di katalog asli.
+    """
+    rng = np.random.default_rng(seed)
+    return np.round(rng.beta(2, 8, size=jumlah_program), 4)
+
+def _median_waktu_ms(fungsi, ulangan: int = ULANGAN) -> float:
+    """Menjalankan `fungsi` beberapa kali dan mengembalikan median durasinya dalam milidetik."""
+    durasi = []
+    for _ in range(ulangan):
+        mulai = time.perf_counter()
+        fungsi()
+        durasi.append((time.perf_counter() - mulai) * 1000)
+    return float(np.median(durasi))
+
+def benchmark_top_k(ukuran_katalog=UKURAN_KATALOG, k: int = CANDIDATE_POOL_SIZE, ulangan: int = ULANGAN) -> list:
+    """
+    Membandingkan pengurutan penuh (cara lama Pass 1) dengan seleksi parsial `_top_k_menurun`.
+    Mengembalikan list dict berisi waktu per ukuran katalog dan status kesamaan hasil.
+    """
+    hasil = []
+    for jumlah_program in ukuran_katalog:
+        skor = _skor_sintetis(jumlah_program)
+        baris = np.arange(jumlah_program)
+
+        waktu_argsort = _median_waktu_ms(lambda: skor.argsort()[-k:][::-1], ulangan)
+        waktu_urut_penuh = _median_waktu_ms(lambda: _urutan_menurun(skor, baris)[:k], ulangan)
+        waktu_parsial = _median_waktu_ms(lambda: _top_k_menurun(skor, baris, k), ulangan)
+        sama = np.array_equal(_urutan_menurun(skor, baris)[:k], _top_k_menurun(skor, baris, k))
+
+        hasil.append({
+            'jumlah_program': jumlah_program,
+            'k': k,
+            'argsort_ms': waktu_argsort,
+            'urut_penuh_ms': waktu_urut_penuh,
+            'top_k_parsial_ms': waktu_parsial,
+            'hasil_sama': bool(sama),
+        })
+    return hasil
+
+def benchmark_posting(ukuran_katalog=UKURAN_KATALOG_POSTING) -> list:
+    """
+    Membandingkan skor eksak ke semua program yang lolos filter dengan top-k eksak lewat posting list
+    (indeks_posting.py) untuk seluruh profil kuesioner. Melaporkan median/p95 latensi per kueri,
+    rata-rata program yang dinilai, dan apakah peringkat akhir identik.
+    """
+    daftar_profil = profil_kuesioner()
+    df_latihan = muat_katalog()
+    hasil = []
+    for jumlah_program in ukuran_katalog:
+        df_katalog = gandakan_katalog(df_latihan, jumlah_program)
+        vectorizer = TfidfVectorizer(stop_words='english')
+        matriks = vectorizer.fit_transform(df_katalog['fitur_gabungan_program'])
+        indeks_katalog = bangun_indeks_katalog(df_katalog)
+        mulai = time.perf_counter()
+        indeks_posting = bangun_indeks_posting(matriks)
+        waktu_bangun = time.perf_counter() - mulai
+
+        latensi = {'eksak': [], 'posting': []}
+        dinilai, sama = [], 0
+        for profil_string, profil_dict in daftar_profil:
+            mulai = time.perf_counter()
+            eksak = dapatkan_peringkat(profil_string, profil_dict, vectorizer, matriks, indeks_katalog, CANDIDATE_POOL_SIZE)
+            latensi['eksak'].append((time.perf_counter() - mulai) * 1000)
+            mulai = time.perf_counter()
+            posting = dapatkan_peringkat(profil_string, profil_dict, vectorizer, matriks, indeks_katalog, CANDIDATE_POOL_SIZE,
+                                         indeks_posting=indeks_posting)
+            latensi['posting'].append((time.perf_counter() - mulai) * 1000)
+            sama += all(np.array_equal(a, b) for a, b in zip(eksak, posting))
+            dinilai.append(len(indeks_posting.kandidat(vectorizer.transform([profil_string]), None, CANDIDATE_POOL_SIZE)))
+
+        hasil.append({
+            'jumlah_program': jumlah_program,
+            'eksak_p50_ms': float(np.percentile(latensi['eksak'], 50)),
+            'eksak_p95_ms': float(np.percentile(latensi['eksak'], 95)),
+            'posting_p50_ms': float(np.percentile(latensi['posting'], 50)),
+            'posting_p95_ms': float(np.percentile(latensi['posting'], 95)),
+            'rata_dinilai': float(np.mean(dinilai)),
+            'bangun_detik': waktu_bangun,
+            'identik': f"{sama}/{len(daftar_profil)}",
+        })
+    return hasil
+
+# --- Jalankan Benchmark ---
+if __name__ == "__main__":
+    print(f"\nBenchmark seleksi Top-{CANDIDATE_POOL_SIZE} kandidat (median dari {ULANGAN} ulangan)...")
+    print("\n  Program | argsort (ms) | urut penuh (ms) | top-k parsial (ms) | Hasil sama")
+    print("----------|--------------|-----------------|--------------------|-----------")
+    for baris_hasil in benchmark_top_k():
+        print(f"{baris_hasil['jumlah_program']:>9,} | {baris_hasil['argsort_ms']:>12.2f} | "
+              f"{baris_hasil['urut_penuh_ms']:>15.2f} | {baris_hasil['top_k_parsial_ms']:>18.2f} | {baris_hasil['hasil_sama']}")
+    print("----------------------------------------------------------------------------")
+
+    print(f"\nTop-{CANDIDATE_POOL_SIZE} eksak: skor ke semua program vs akumulasi posting list ({len(profil_kuesioner())} profil)...")
+    print("\n  Program | Eksak p50/p95 (ms) | Posting p50/p95 (ms) | Dinilai (tanpa filter) | Bangun (s) | Identik")
+    print("----------|--------------------|----------------------|------------------------|------------|--------")
+    for baris_hasil in benchmark_posting():
+        print(f"{baris_hasil['jumlah_program']:>9,} | {baris_hasil['eksak_p50_ms']:>8.2f} / {baris_hasil['eksak_p95_ms']:>7.2f} | "
+              f"{baris_hasil['posting_p50_ms']:>9.2f} / {baris_hasil['posting_p95_ms']:>8.2f} | "
+              f"{baris_hasil['rata_dinilai']:>22,.0f} | {baris_hasil['bangun_detik']:>10.2f} | {baris_hasil['identik']}")
@@ -0,0 +1,161 @@
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+import sklearn
+
+import app
+from data_benchmark import katalog_sintetis
+from recommender_engine import bangun_indeks_katalog, dapatkan_rekomendasi, dapatkan_rekomendasi_batch
+from vektorisasi import buat_vectorizer
+
+# --- Konfigurasi Benchmark ---
+UKURAN_KATALOG = (1_000, 10_000, 100_000, 1_000_000) # Jumlah program sintetis (skema data_latihan.csv)
+JUMLAH_PROFIL = 200 # Profil sintetis dari pilihan form rekomendasi
+TOP_N = 10
+UKURAN_BATCH = 64 # Profil per panggilan batch (matriks skor per blok dibatasi recommender_engine.UKURAN_BLOK_SKOR)
+PROFIL_MEMORI = 20 # Profil yang dijalankan di bawah tracemalloc untuk puncak memori
+KELUARAN = 'benchmark_rekomendasi.json'
+
+def profil_form(jumlah_profil: int = JUMLAH_PROFIL, seed: int = 7) -> list:
+    """
+    Profil (string fitur, dict input form) yang diambil acak dari pilihan form_rekomendasi,
+    dengan string fitur dibangun oleh fungsi yang sama seperti app.py.
+    """
+    rng = np.random.default_rng(seed)
+    opsi = app.OPSI_FORM_REKOMENDASI
+    daftar_profil = []
+    for _ in range(jumlah_profil):
+        data_form = {kunci: str(rng.choice(opsi[kunci])) for kunci in opsi if kunci != 'hari_sibuk'}
+        data_form['usia'] = str(rng.integers(app.RENTANG_USIA_FORM[0], app.RENTANG_USIA_FORM[1] + 1))
+        hari = rng.choice(opsi['hari_sibuk'], size=rng.integers(0, 4), replace=False)
+        data_form['hari_sibuk'] = ', '.join(hari)
+        daftar_profil.append((app.create_feature_string_for_new_user(data_form), data_form))
+    return daftar_profil
+
+def _ringkasan_latensi(latensi_ms: list, jumlah_profil: int) -> dict:
+    latensi_ms = np.asarray(latensi_ms)
+    return {
+        'p50_ms': float(np.percentile(latensi_ms, 50)),
+        'p95_ms': float(np.percentile(latensi_ms, 95)),
+        'p99_ms': float(np.percentile(latensi_ms, 99)),
+        'throughput_per_detik': jumlah_profil / (latensi_ms.sum() / 1000),
+    }
+
+def _puncak_memori_mb(fungsi) -> float:
+    """Puncak alokasi (tracemalloc) selama `fungsi` berjalan, di luar data yang sudah ada sebelumnya."""
+    tracemalloc.start()
+    fungsi()
+    _, puncak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return puncak / 2**20
+
+def benchmark_katalog(jumlah_program: int, daftar_profil: list, top_n: int = TOP_N, ukuran_batch: int = UKURAN_BATCH) -> dict:
+    """Mengukur pembangunan model, skor satu profil, dan skor batch untuk satu ukuran katalog."""
+    mulai = time.perf_counter()
+    df_katalog = katalog_sintetis(jumlah_program)
+    waktu_data = time.perf_counter() - mulai
+    mulai = time.perf_counter()
+    vectorizer = buat_vectorizer()
+    matriks = vectorizer.fit_transform(df_katalog['fitur_gabungan_program'])
+    indeks_katalog = bangun_indeks_katalog(df_katalog)
+    waktu_bangun = time.perf_counter() - mulai
+
+    # --- Satu profil per panggilan (jalur /recommend) ---
+    latensi = []
+    for profil_string, profil_dict in daftar_profil:
+        mulai = time.perf_counter()
+        dapatkan_rekomendasi(profil_string, profil_dict, df_katalog, vectorizer, matriks, top_n, indeks_katalog)
+        latensi.append((time.perf_counter() - mulai) * 1000)
+    tunggal = _ringkasan_latensi(latensi, len(daftar_profil))
+    tunggal['puncak_memori_mb'] = _puncak_memori_mb(lambda: [
+        dapatkan_rekomendasi(s, d, df_katalog, vectorizer, matriks, top_n, indeks_katalog)
+        for s, d in daftar_profil[:PROFIL_MEMORI]])
+
+    # --- Batch (jalur evaluasi): latensi per panggilan batch ---
+    latensi = []
+    for awal in range(0, len(daftar_profil), ukuran_batch):
+        mulai = time.perf_counter()
+        dapatkan_rekomendasi_batch(daftar_profil[awal:awal + ukuran_batch], df_katalog, vectorizer, matriks, top_n,
+                                   indeks_katalog, ukuran_batch=ukuran_batch)
+        latensi.append((time.perf_counter() - mulai) * 1000)
+    batch = _ringkasan_latensi(latensi, len(daftar_profil))
+    batch['puncak_memori_mb'] = _puncak_memori_mb(lambda: dapatkan_rekomendasi_batch(
+        daftar_profil[:ukuran_batch], df_katalog, vectorizer, matriks, top_n, indeks_katalog, ukuran_batch=ukuran_batch))
+
+    return {
+        'jumlah_program': jumlah_program,
+        'jumlah_term': matriks.shape[1],
+        'nnz': int(matriks.nnz),
+        'matriks_mb': (matriks.data.nbytes + matriks.indices.nbytes + matriks.indptr.nbytes) / 2**20,
+        'data_detik': waktu_data,
+        'bangun_detik': waktu_bangun,
+        'tunggal': tunggal,
+        'batch': {'ukuran_batch': ukuran_batch, **batch},
+    }
+
+def _commit_git() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=app.APP_ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def jalankan(ukuran_katalog=UKURAN_KATALOG, jumlah_profil: int = JUMLAH_PROFIL, ukuran_batch: int = UKURAN_BATCH) -> dict:
+    daftar_profil = profil_form(jumlah_profil)
+    hasil = []
+    for jumlah_program in ukuran_katalog:
+        print(f"Katalog {jumlah_program:,} program...")
+        hasil.append(benchmark_katalog(jumlah_program, daftar_profil, ukuran_batch=ukuran_batch))
+    return {
+        'commit': _commit_git(),
+        'waktu': datetime.datetime.now().isoformat(timespec='seconds'),
+        'lingkungan': {'python': platform.python_version(), 'numpy': np.__version__, 'sklearn': sklearn.__version__,
+                       'mesin': platform.machine()},
+        'konfigurasi': {'jumlah_profil': jumlah_profil, 'top_n': TOP_N, 'ukuran_batch': ukuran_batch},
+        'hasil': hasil,
+    }
+
+def cetak(laporan: dict, acuan: dict = None):
+    """Mencetak tabel hasil; jika `acuan` (JSON run sebelumnya) diberikan, ditambah rasio p50 terhadap acuan."""
+    p50_acuan = {}
+    if acuan:
+        for baris in acuan['hasil']:
+            for mode in ('tunggal', 'batch'):
+                p50_acuan[(baris['jumlah_program'], mode)] = baris[mode]['p50_ms']
+    print(f"\nBenchmark rekomendasi (commit {laporan['commit'] or '-'}, {laporan['konfigurasi']['jumlah_profil']} profil form, "
+          f"batch {laporan['konfigurasi']['ukuran_batch']})")
+    print("\n  Program | Mode    | p50 (ms) | p95 (ms) | p99 (ms) | Profil/detik | Puncak (MB) | vs acuan")
+    print("----------|---------|----------|----------|----------|--------------|-------------|---------")
+    for baris in laporan['hasil']:
+        for mode in ('tunggal', 'batch'):
+            data = baris[mode]
+            acuan_p50 = p50_acuan.get((baris['jumlah_program'], mode))
+            rasio = f"{data['p50_ms'] / acuan_p50:>7.2f}x" if acuan_p50 else '       -'
+            print(f"{baris['jumlah_program']:>9,} | {mode:<7} | {data['p50_ms']:>8.2f} | {data['p95_ms']:>8.2f} | "
+                  f"{data['p99_ms']:>8.2f} | {data['throughput_per_detik']:>12,.0f} | {data['puncak_memori_mb']:>11.1f} | {rasio}")
+
+# --- Jalankan Benchmark ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark latensi, throughput, dan memori engine rekomendasi.")
+    parser.add_argument('--ukuran', type=int, nargs='+', default=list(UKURAN_KATALOG), help="Jumlah program per katalog")
+    parser.add_argument('--profil', type=int, default=JUMLAH_PROFIL, help="Jumlah profil sintetis")
+    parser.add_argument('--batch', type=int, default=UKURAN_BATCH, help="Ukuran batch untuk skor batch")
+    parser.add_argument('--keluaran', default=KELUARAN, help="File JSON hasil")
+    parser.add_argument('--bandingkan', help="File JSON hasil run sebelumnya sebagai acuan")
+    argumen = parser.parse_args()
+
+    laporan = jalankan(argumen.ukuran, argumen.profil, argumen.batch)
+    with open(argumen.keluaran, 'w', encoding='utf-8') as f:
+        json.dump(laporan, f, indent=2)
+    acuan = None
+    if argumen.bandingkan:
+        with open(argumen.bandingkan, encoding='utf-8') as f:
+            acuan = json.load(f)
+    cetak(laporan, acuan)
+    print(f"\nHasil disimpan di '{argumen.keluaran}'.")
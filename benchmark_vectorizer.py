@@ -0,0 +1,76 @@
+import pickle
+import time
+import tracemalloc
+
+import numpy as np
+
+import evaluasi
+from ruang_evaluasi import ruang_evaluasi_aktif
+from vektorisasi import buat_vectorizer
+
+# --- Konfigurasi Benchmark ---
+KONFIGURASI = (('tfidf', None), ('hashing', 2 ** 16), ('hashing', 2 ** 18), ('hashing', 2 ** 20))
+UKURAN_KORPUS = (10_000, 100_000, 300_000) # Jumlah dokumen sintetis untuk uji memori
+K = 10
+
+def _nama(jenis: str, n_fitur) -> str:
+    return jenis if n_fitur is None else f"{jenis} 2^{int(np.log2(n_fitur))}"
+
+def benchmark_kualitas(konfigurasi=KONFIGURASI, top_k: int = K) -> list:
+    """Menjalankan evaluasi_model (evaluasi.py) dengan setiap vectorizer pada data uji yang sama."""
+    ruang = ruang_evaluasi_aktif()
+    dokumen = ruang.df_latihan['fitur_gabungan_program']
+    hasil = []
+    for jenis, n_fitur in konfigurasi:
+        vectorizer = buat_vectorizer(jenis, n_fitur) if n_fitur else buat_vectorizer(jenis)
+        matriks = vectorizer.fit_transform(dokumen)
+        precision, recall, accuracy, jumlah = evaluasi.evaluasi_model(
+            ruang.test_df, ruang.df_latihan, vectorizer, matriks, top_k=top_k)
+        hasil.append({'vectorizer': _nama(jenis, n_fitur), 'precision': precision, 'recall': recall,
+                      'accuracy': accuracy, 'pengguna': jumlah})
+    return hasil
+
+def _korpus_sintetis(jumlah_dokumen: int, seed: int = 42) -> list:
+    """
+    Dokumen program/kuesioner asli yang diberi token unik acak, sehingga vocabulary tumbuh
+    seiring ukuran korpus seperti kuesioner_bersih.csv yang terus bertambah.
+    """
+    rng = np.random.default_rng(seed)
+    ruang = ruang_evaluasi_aktif()
+    dasar = ruang.df_latihan['fitur_gabungan_program'].tolist() + ruang.df_kuesioner['fitur_gabungan_pengguna'].tolist()
+    token = rng.integers(0, jumlah_dokumen * 5, size=(jumlah_dokumen, 3))
+    return [f"{dasar[i % len(dasar)]} u{a} u{b} u{c}" for i, (a, b, c) in enumerate(token)]
+
+def benchmark_memori(konfigurasi=KONFIGURASI, ukuran_korpus=UKURAN_KORPUS) -> list:
+    """Mengukur ukuran model (pickle), puncak alokasi saat fit, dan waktu fit untuk setiap ukuran korpus."""
+    hasil = []
+    for jumlah_dokumen in ukuran_korpus:
+        korpus = _korpus_sintetis(jumlah_dokumen)
+        for jenis, n_fitur in konfigurasi:
+            vectorizer = buat_vectorizer(jenis, n_fitur) if n_fitur else buat_vectorizer(jenis)
+            tracemalloc.start()
+            mulai = time.perf_counter()
+            vectorizer.fit(korpus)
+            durasi = time.perf_counter() - mulai
+            _, puncak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            hasil.append({'dokumen': jumlah_dokumen, 'vectorizer': _nama(jenis, n_fitur),
+                          'model_mb': len(pickle.dumps(vectorizer)) / 2**20, 'puncak_fit_mb': puncak / 2**20,
+                          'fit_detik': durasi})
+    return hasil
+
+# --- Jalankan Benchmark ---
+if __name__ == "__main__":
+    print(f"\nKualitas rekomendasi Top-{K} (evaluasi.py, {len(ruang_evaluasi_aktif().test_df)} data uji)...")
+    print("\nVectorizer     | Precision | Recall | Accuracy | Pengguna")
+    print("---------------|-----------|--------|----------|---------")
+    for baris in benchmark_kualitas():
+        print(f"{baris['vectorizer']:<14} | {baris['precision']:>9.4f} | {baris['recall']:>6.4f} | "
+              f"{baris['accuracy']:>8.4f} | {baris['pengguna']:>8}")
+
+    print("\nMemori vectorizer terhadap ukuran korpus (vocabulary tumbuh)...")
+    print("\n Dokumen | Vectorizer     | Model (MB) | Puncak fit (MB) | Fit (detik)")
+    print("---------|----------------|------------|-----------------|------------")
+    for baris in benchmark_memori():
+        print(f"{baris['dokumen']:>8,} | {baris['vectorizer']:<14} | {baris['model_mb']:>10.2f} | "
+              f"{baris['puncak_fit_mb']:>15.1f} | {baris['fit_detik']:>11.2f}")
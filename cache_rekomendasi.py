@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheRekomendasi:
+    """
+    Cache LRU + TTL untuk hasil rekomendasi.
+    Setiap entri dicatat bersama versi katalog saat dibuat; entri dari versi lama
+    dianggap miss sehingga katalog baru otomatis tidak memakai hasil lama.
+    """
+    def __init__(self, kapasitas: int = 1024, ttl_detik: float = 600):
+        self.kapasitas = kapasitas
+        self.ttl_detik = ttl_detik
+        self._data = OrderedDict() # kunci -> (waktu_kedaluwarsa, versi_katalog, nilai)
+        self._lock = threading.Lock()
+        self.versi_katalog = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ambil(self, kunci):
+        """Mengembalikan nilai yang tersimpan, atau None jika tidak ada / kedaluwarsa / versi lama."""
+        with self._lock:
+            entri = self._data.get(kunci)
+            if entri is None:
+                self.misses += 1
+                return None
+            waktu_kedaluwarsa, versi, nilai = entri
+            if versi != self.versi_katalog or time.monotonic() >= waktu_kedaluwarsa:
+                del self._data[kunci]
+                self.misses += 1
+                return None
+            self._data.move_to_end(kunci)
+            self.hits += 1
+            return nilai
+
+    def simpan(self, kunci, nilai):
+        """Menyimpan nilai; entri yang paling lama tidak dipakai dibuang jika kapasitas penuh."""
+        if self.kapasitas <= 0:
+            return
+        with self._lock:
+            self._data[kunci] = (time.monotonic() + self.ttl_detik, self.versi_katalog, nilai)
+            self._data.move_to_end(kunci)
+            while len(self._data) > self.kapasitas:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def ganti_versi_katalog(self):
+        """Dipanggil setiap kali katalog baru dibangun; semua entri lama dibuang."""
+        with self._lock:
+            self.versi_katalog += 1
+            self._data.clear()
+
+    def statistik(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._data),
+                'capacity': self.kapasitas,
+                'ttl_seconds': self.ttl_detik,
+                'catalog_version': self.versi_katalog,
+            }
@@ -0,0 +1,65 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from populate_db import bangun_fitur_program
+
+# Data bersama untuk skrip benchmark dan laporan: katalog sintetis dan profil uji dari kuesioner
+base_path = os.path.dirname(os.path.abspath(__file__))
+latihan_path = os.path.join(base_path, 'data/data_latihan_processed.csv')
+latihan_mentah_path = os.path.join(base_path, 'data/data_latihan.csv')
+kuesioner_path = os.path.join(base_path, 'data/kuesioner_processed.csv')
+
+PORSI_TOKEN = 0.8 # Porsi token yang dipertahankan saat menggandakan program
+KALIMAT_DESKRIPSI = (2, 5) # Rentang jumlah kalimat deskripsi program sintetis
+
+def muat_katalog() -> pd.DataFrame:
+    """Katalog program asli (sudah diproses), semua kolom sebagai string seperti di app.py."""
+    return pd.read_csv(latihan_path).fillna('').astype(str)
+
+def gandakan_katalog(df_latihan: pd.DataFrame, jumlah_program: int, seed: int = 42) -> pd.DataFrame:
+    """Menggandakan program asli dengan sebagian token fitur dibuang secara acak agar setiap baris unik."""
+    if jumlah_program <= len(df_latihan):
+        return df_latihan.iloc[:jumlah_program].reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    df_sintetis = df_latihan.iloc[rng.integers(0, len(df_latihan), size=jumlah_program)].reset_index(drop=True)
+    fitur = []
+    for teks in df_sintetis['fitur_gabungan_program'].tolist():
+        token = teks.split()
+        fitur.append(' '.join(t for t in token if rng.random() < PORSI_TOKEN))
+    df_sintetis['fitur_gabungan_program'] = fitur
+    return df_sintetis
+
+def katalog_sintetis(jumlah_program: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Katalog sintetis dengan skema data_latihan.csv. Setiap kolom atribut diambil acak dari nilai
+    katalog asli (distribusi per kolom sama, kombinasinya baru), deskripsi disusun dari kalimat
+    program lain, lalu fitur gabungan dibangun dengan fungsi yang sama seperti populate_db.py.
+    """
+    df_mentah = pd.read_csv(latihan_mentah_path).fillna('').astype(str)
+    rng = np.random.default_rng(seed)
+    df_sintetis = pd.DataFrame({
+        kolom: df_mentah[kolom].to_numpy()[rng.integers(0, len(df_mentah), size=jumlah_program)]
+        for kolom in df_mentah.columns
+    })
+    df_sintetis['ID Program'] = np.arange(1, jumlah_program + 1).astype(str)
+    kalimat = np.array([k for teks in df_mentah['Deskripsi Program'] for k in re.split(r'(?<=\.)\s+', teks) if k])
+    jumlah_kalimat = rng.integers(KALIMAT_DESKRIPSI[0], KALIMAT_DESKRIPSI[1] + 1, size=jumlah_program)
+    pilihan = rng.integers(0, len(kalimat), size=int(jumlah_kalimat.sum()))
+    batas = np.concatenate([[0], np.cumsum(jumlah_kalimat)])
+    df_sintetis['Deskripsi Program'] = [' '.join(kalimat[pilihan[batas[i]:batas[i + 1]]]) for i in range(jumlah_program)]
+    return bangun_fitur_program(df_sintetis)
+
+def profil_kuesioner() -> list:
+    """Profil (string fitur, dict preferensi) dari seluruh kuesioner, dengan kunci yang sama seperti evaluasi.py."""
+    df_kuesioner = pd.read_csv(kuesioner_path).fillna('')
+    daftar_profil = []
+    for _, user_row in df_kuesioner.iterrows():
+        daftar_profil.append((user_row['fitur_gabungan_pengguna'], {
+            'tempat': str(user_row.get('11. Apakah Anda lebih suka latihan di rumah atau di gym?', '')).lower(),
+            'pengalaman': str(user_row.get('4. Bagaimana tingkat kebugaran Anda saat ini?', '')).lower(),
+            'jenis_kelamin': str(user_row.get('2. Jenis Kelamin', '')).lower(),
+        }))
+    return daftar_profil
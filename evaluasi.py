@@ -1,38 +1,11 @@
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.model_selection import train_test_split
-import os
-from recommender_engine import dapatkan_rekomendasi # Impor fungsi terpusat
+from functools import partial
+from evaluasi_paralel import KonteksEvaluasi, jalankan_evaluasi # Runner evaluasi paralel di atas engine terpusat
+from ruang_evaluasi import profil_uji, ruang_evaluasi_aktif # Data, split, model, dan peringkat bersama (di-cache)
 import numpy as np
 
-# --- Konfigurasi & Pemuatan Data ---
-base_path = os.path.dirname(os.path.abspath(__file__))
-# Langsung menunjuk ke file di direktori yang sama dengan skrip
-latihan_path = os.path.join(base_path, 'data/data_latihan_processed.csv')
-kuesioner_path = os.path.join(base_path, 'data/kuesioner_processed.csv')
-
-try:
-    df_latihan = pd.read_csv(latihan_path)
-    df_kuesioner = pd.read_csv(kuesioner_path)
-    print("File berhasil dimuat.")
-except FileNotFoundError as e:
-    print(f"Error: File tidak ditemukan. Pastikan path sudah benar. Detail: {e}")
-    exit()
-
-# --- Pembagian Data Uji dan Latih ---
-# Bagi data kuesioner menjadi 80% untuk latih dan 20% untuk uji
-train_df, test_df = train_test_split(df_kuesioner, test_size=0.2, random_state=42)
-print(f"Data kuesioner dibagi: {len(train_df)} data latih, {len(test_df)} data uji.")
-
-# --- Pra-pemrosesan ---
-df_latihan['fitur_gabungan_program'] = df_latihan['fitur_gabungan_program'].fillna('')
-df_kuesioner['fitur_gabungan_pengguna'] = df_kuesioner['fitur_gabungan_pengguna'].fillna('')
-
-# --- Pembangunan Model ---
-tfidf = TfidfVectorizer(stop_words='english')
-tfidf_matrix_latihan = tfidf.fit_transform(df_latihan['fitur_gabungan_program'])
-print(f"Dimensi Matriks TF-IDF Latihan: {tfidf_matrix_latihan.shape}")
+# Kata kunci tempat hasil normalisasi preferensi pengguna (lihat `_normalize_user_preferences`)
+TEMPAT_GROUND_TRUTH = ('rumah', 'gym', 'outdoor')
 
 def _normalize_user_preferences(user_row: pd.Series) -> dict:
     """Mengekstrak dan menormalkan preferensi utama dari baris data pengguna."""
@@ -68,7 +41,24 @@ def _normalize_user_preferences(user_row: pd.Series) -> dict:
         'gender_pref': prefs['gender']
     }
 
-def _get_ground_truth(normalized_prefs: dict, df_latihan: pd.DataFrame) -> set:
+def bangun_kelompok_ground_truth(df_latihan: pd.DataFrame) -> dict:
+    """
+    Mengelompokkan katalog sekali: (level, kata kunci tempat) -> {gender program: set ID program}.
+    Ground truth setiap pengguna cukup lookup dan union kelompok (lihat `_get_ground_truth`),
+    tanpa memfilter ulang DataFrame per pengguna.
+    """
+    kelompok = {}
+    kolom = zip(df_latihan['ID Program'].astype(str), df_latihan['Tingkat Kebugaran Program'].str.lower(),
+                df_latihan['Tempat Program'].str.lower(), df_latihan['Target Gender'].str.lower())
+    for id_program, level, tempat, gender in kolom:
+        if not isinstance(tempat, str):
+            continue # Tempat kosong tidak pernah cocok
+        for keyword in TEMPAT_GROUND_TRUTH:
+            if keyword in tempat: # Satu program bisa masuk beberapa kelompok tempat
+                kelompok.setdefault((level, keyword), {}).setdefault(gender, set()).add(id_program)
+    return kelompok
+
+def _get_ground_truth(normalized_prefs: dict, kelompok_ground_truth: dict) -> set:
     """Mendapatkan set ID program yang relevan (ground truth) berdasarkan preferensi."""
     user_kebugaran_norm = normalized_prefs['kebugaran_norm']
     user_tempat_norm = normalized_prefs['tempat_norm']
@@ -77,82 +67,77 @@ def _get_ground_truth(normalized_prefs: dict, df_latihan: pd.DataFrame) -> set:
     # Filter dasar berdasarkan level dan tempat
     if not user_kebugaran_norm or not user_tempat_norm:
         return set()
+    per_gender = kelompok_ground_truth.get((user_kebugaran_norm, user_tempat_norm), {})
 
-    ground_truth_filter = (
-        (df_latihan['Tingkat Kebugaran Program'].str.lower() == user_kebugaran_norm) &
-        (df_latihan['Tempat Program'].str.lower().str.contains(user_tempat_norm, na=False))
-    )
-    # Tambahkan filter gender jika ada
+    # Tambahkan filter gender jika ada: program untuk 'semua' atau gender pengguna
     if user_gender_norm:
-        gender_filter = (df_latihan['Target Gender'].str.lower() == 'semua') | (df_latihan['Target Gender'].str.lower() == user_gender_norm)
-        ground_truth_filter &= gender_filter
+        return set().union(per_gender.get('semua', ()), per_gender.get(user_gender_norm, ()))
+    return set().union(*per_gender.values())
+
+def _relevan_uji(user_row, kelompok_ground_truth) -> set:
+    """Ground truth (level, tempat, gender) satu pengguna uji."""
+    return _get_ground_truth(_normalize_user_preferences(user_row), kelompok_ground_truth)
 
-    return set(df_latihan[ground_truth_filter]['ID Program'].astype(str))
+def _pengguna_uji(konteks, user_row, kelompok_ground_truth) -> tuple:
+    """Ground truth dan profil satu pengguna uji untuk runner evaluasi, atau None jika tidak ada item relevan."""
+    # 1. Definisikan Ground Truth untuk pengguna ini
+    relevant_items = _relevan_uji(user_row, kelompok_ground_truth)
+    if not relevant_items:
+        return None # Lewati pengguna jika tidak ada item relevan di database
 
-def evaluasi_model(data_uji, df_latihan, tfidf_vectorizer, tfidf_matrix_latihan, top_k=10):
+    # 2. Profil yang diberikan ke model (sama dengan peringkat yang disimpan ruang kerja evaluasi)
+    return (relevant_items, *profil_uji(user_row))
+
+def evaluasi_peringkat(data_uji, df_latihan, tfidf_vectorizer, tfidf_matrix_latihan, k_values=(10,), jumlah_proses=None):
     """
-    Fungsi utama untuk mengevaluasi model rekomendasi pada data uji.
+    Memeringkat setiap pengguna uji sekali (sampai K terbesar) dan mengembalikan HasilEvaluasi,
+    sumber semua metrik @K (lihat metrik_peringkat.py). Pengguna uji dibagi ke pool proses
+    (lihat evaluasi_paralel.py); `jumlah_proses` default semua core.
     """
-    list_precision = []
-    list_recall = []
-    list_accuracy = []
-
-    for _, user_row in data_uji.iterrows():
-        # 1. Definisikan Ground Truth untuk pengguna ini
-        norm_prefs = _normalize_user_preferences(user_row)
-        relevant_items = _get_ground_truth(norm_prefs, df_latihan)
-        
-        if not relevant_items:
-            continue # Lewati pengguna jika tidak ada item relevan di database
-
-        # 2. Dapatkan Rekomendasi dari Model
-        user_profile_string = user_row['fitur_gabungan_pengguna']
-        user_profile_dict = {
-            'tempat': norm_prefs['tempat_pref'],
-            'pengalaman': norm_prefs['kebugaran_pref'],
-            'jenis_kelamin': norm_prefs['gender_pref']
-        } 
-        
-        rekomendasi_df = dapatkan_rekomendasi(
-            profil_pengguna_string=user_profile_string,
-            profil_pengguna_dict=user_profile_dict,
-            df_latihan=df_latihan,
-            tfidf_vectorizer=tfidf_vectorizer,
-            tfidf_matrix_latihan=tfidf_matrix_latihan,
-            final_top_n=top_k)      
-        recommended_items = set(rekomendasi_df['ID Program'].astype(str))
-
-        # 3. Hitung Metrik
-        true_positives = len(recommended_items.intersection(relevant_items))
-        
-        false_positives = len(recommended_items) - true_positives
-        false_negatives = len(relevant_items) - true_positives
-        
-        total_items = len(df_latihan)
-        true_negatives = total_items - true_positives - false_positives - false_negatives
-
-        precision = true_positives / len(recommended_items) if recommended_items else 0
-        recall = true_positives / len(relevant_items) if relevant_items else 0
-        accuracy = (true_positives + true_negatives) / total_items if total_items > 0 else 0
-
-        list_precision.append(precision)
-        list_recall.append(recall)
-        list_accuracy.append(accuracy)
+    konteks = KonteksEvaluasi(df_latihan, tfidf_vectorizer, tfidf_matrix_latihan)
+    # Kelompok ground truth dibangun sekali per katalog dan ikut diwarisi worker
+    fungsi_pengguna = partial(_pengguna_uji, kelompok_ground_truth=bangun_kelompok_ground_truth(df_latihan))
+    return jalankan_evaluasi(data_uji, konteks, k_values, fungsi_pengguna, jumlah_proses=jumlah_proses)
+
+def _ringkasan_model(hasil, top_k, total_items):
+    """Rata-rata precision, recall, dan accuracy @top_k beserta jumlah pengguna yang dievaluasi."""
+    if len(hasil) == 0:
+        return 0, 0, 0, 0
+
+    # 3. Hitung Metrik
+    true_positives, jumlah_rekomendasi = hasil.true_positive(top_k)
+    precision, recall = hasil.precision_recall(top_k)
+    false_positives = jumlah_rekomendasi - true_positives
+    false_negatives = hasil.jumlah_relevan - true_positives
+    true_negatives = total_items - true_positives - false_positives - false_negatives
+    accuracy = (true_positives + true_negatives) / total_items if total_items > 0 else np.zeros(len(hasil))
 
     # 4. Hitung Rata-rata Metrik
-    avg_precision = np.mean(list_precision) if list_precision else 0
-    avg_recall = np.mean(list_recall) if list_recall else 0
-    avg_accuracy = np.mean(list_accuracy) if list_accuracy else 0
+    return np.mean(precision), np.mean(recall), np.mean(accuracy), len(hasil)
 
-    return avg_precision, avg_recall, avg_accuracy, len(list_precision)
+def evaluasi_model(data_uji, df_latihan, tfidf_vectorizer, tfidf_matrix_latihan, top_k=10, jumlah_proses=None):
+    """
+    Fungsi utama untuk mengevaluasi model rekomendasi pada data uji.
+    Mengembalikan (precision@K, recall@K, accuracy, jumlah pengguna yang dievaluasi).
+    """
+    hasil = evaluasi_peringkat(data_uji, df_latihan, tfidf_vectorizer, tfidf_matrix_latihan, [top_k], jumlah_proses)
+    return _ringkasan_model(hasil, top_k, len(df_latihan))
 
 # --- Jalankan Evaluasi ---
 if __name__ == "__main__":
+    # CSV, pembagian 80/20 data kuesioner, dan TF-IDF diambil dari cache jika data & konfigurasi engine tidak berubah
+    ruang = ruang_evaluasi_aktif()
+    df_latihan, test_df, tfidf_matrix_latihan = ruang.df_latihan, ruang.test_df, ruang.tfidf_matrix_latihan
+
     K = 10 # Jumlah rekomendasi yang akan dievaluasi (Precision@K, Recall@K)
     
     print(f"\nMemulai evaluasi model untuk Top-{K} rekomendasi...")
     
-    precision, recall, accuracy, num_users_evaluated = evaluasi_model(test_df, df_latihan, tfidf, tfidf_matrix_latihan, top_k=K)
+    K_VALUES = sorted({1, 5, K, 20}) # Metrik peringkat lain dihitung dari peringkat yang sama
+
+    # Peringkat pengguna uji diambil dari ruang kerja (dihitung sekali per data & konfigurasi engine)
+    hasil = ruang.hasil_evaluasi(partial(_relevan_uji, kelompok_ground_truth=bangun_kelompok_ground_truth(df_latihan)), K_VALUES)
+    precision, recall, accuracy, num_users_evaluated = _ringkasan_model(hasil, K, len(df_latihan))
     
     print("\n--- Hasil Evaluasi Model ---")
     print(f"Jumlah Pengguna yang Dievaluasi: {num_users_evaluated} (dari {len(test_df)} data uji)")
@@ -164,3 +149,13 @@ if __name__ == "__main__":
     print(f"Precision@{K}: Dari {K} item yang direkomendasikan, rata-rata {precision*100:.2f}% di antaranya benar-benar relevan (cocok level & tempat).")
     print(f"Recall@{K}:    Dari semua item yang relevan di database, sistem berhasil menemukan dan merekomendasikan rata-rata {recall*100:.2f}% di antaranya dalam {K} rekomendasi teratas.")
     print("Accuracy:      Persentase total prediksi yang benar (termasuk item yang benar-benar tidak direkomendasikan). Skor ini bisa tinggi meskipun Recall rendah.")
+
+    print("\n--- Metrik Peringkat per K ---")
+    metrik = hasil.metrik(K_VALUES, jumlah_program=len(df_latihan), matriks_item=tfidf_matrix_latihan)
+    print(" K | Precision | Recall | nDCG   | MAP    | MRR    | Coverage | ILS")
+    print("---|-----------|--------|--------|--------|--------|----------|-------")
+    for k in K_VALUES:
+        m = metrik[k]
+        print(f"{k:2d} |  {m['precision']:.4f}   | {m['recall']:.4f} | {m['ndcg']:.4f} | {m['map']:.4f} | {m['mrr']:.4f} |  {m['coverage']:.4f}  | {m['ils']:.4f}")
+    print("nDCG/MAP/MRR memperhitungkan posisi item relevan; Coverage = proporsi katalog yang pernah direkomendasikan;")
+    print("ILS = rata-rata kemiripan TF-IDF antar item dalam satu daftar (semakin rendah, semakin beragam).")
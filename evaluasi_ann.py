@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from data_benchmark import gandakan_katalog, muat_katalog, profil_kuesioner
+from indeks_ann import bangun_indeks_ann
+from recommender_engine import CANDIDATE_POOL_SIZE, bangun_indeks_katalog, dapatkan_peringkat
+
+# --- Konfigurasi Laporan ---
+UKURAN_KATALOG = (400, 20_000, 100_000) # 400 = katalog asli, selebihnya sintetis
+DAFTAR_N_PROBE = (1, 2, 4, 8, 16, 32)
+DAFTAR_K = (10, 50)
+
+def _peringkat_semua(daftar_profil, vectorizer, matriks, indeks_katalog, top_n, indeks_ann=None):
+    """Mengembalikan (list ID baris top-N per profil, latensi per kueri dalam ms)."""
+    hasil, latensi = [], []
+    for profil_string, profil_dict in daftar_profil:
+        mulai = time.perf_counter()
+        indeks_baris, _, _ = dapatkan_peringkat(profil_string, profil_dict, vectorizer, matriks, indeks_katalog,
+                                                top_n, indeks_ann=indeks_ann)
+        latensi.append((time.perf_counter() - mulai) * 1000)
+        hasil.append(indeks_baris)
+    return hasil, np.array(latensi)
+
+def laporan_recall(ukuran_katalog=UKURAN_KATALOG, daftar_n_probe=DAFTAR_N_PROBE, daftar_k=DAFTAR_K) -> list:
+    """
+    Recall@K peringkat akhir dengan indeks ANN terhadap skor eksak (cosine ke semua program yang lolos filter),
+    beserta median latensi per kueri, untuk setiap ukuran katalog dan nilai n_probe.
+    """
+    daftar_profil = profil_kuesioner()
+    df_latihan = muat_katalog()
+    k_maks = max(daftar_k)
+    hasil = []
+    for jumlah_program in ukuran_katalog:
+        df_katalog = gandakan_katalog(df_latihan, jumlah_program)
+        vectorizer = TfidfVectorizer(stop_words='english')
+        matriks = vectorizer.fit_transform(df_katalog['fitur_gabungan_program'])
+        indeks_katalog = bangun_indeks_katalog(df_katalog)
+
+        mulai = time.perf_counter()
+        indeks_ann = bangun_indeks_ann(matriks)
+        waktu_bangun = time.perf_counter() - mulai
+
+        eksak, latensi_eksak = _peringkat_semua(daftar_profil, vectorizer, matriks, indeks_katalog, k_maks)
+        for n_probe in daftar_n_probe:
+            indeks_ann.n_probe = n_probe
+            aproksimasi, latensi = _peringkat_semua(daftar_profil, vectorizer, matriks, indeks_katalog, k_maks, indeks_ann)
+            baris = {'jumlah_program': jumlah_program, 'n_list': indeks_ann.n_list, 'n_probe': n_probe,
+                     'bangun_detik': waktu_bangun, 'eksak_ms': float(np.median(latensi_eksak)),
+                     'ann_ms': float(np.median(latensi))}
+            for k in daftar_k:
+                recall = [len(set(a[:k]) & set(e[:k])) / len(e[:k]) for a, e in zip(aproksimasi, eksak) if len(e)]
+                baris[f'recall@{k}'] = float(np.mean(recall)) if recall else 1.0
+            hasil.append(baris)
+    return hasil
+
+# --- Jalankan Laporan ---
+if __name__ == "__main__":
+    print(f"\nRecall@K indeks ANN (IVF) terhadap skor eksak, {len(profil_kuesioner())} profil kuesioner, "
+          f"pool kandidat minimal {CANDIDATE_POOL_SIZE}...")
+    kolom_recall = ' | '.join(f'Recall@{k:<3}' for k in DAFTAR_K)
+    print(f"\n Program | n_list | n_probe | {kolom_recall} | Eksak (ms) | ANN (ms) | Bangun (s)")
+    print("---------|--------|---------|" + "|".join(['------------'] * len(DAFTAR_K)) + "|------------|----------|-----------")
+    for baris in laporan_recall():
+        nilai_recall = ' | '.join(f"{baris[f'recall@{k}']:>10.4f}" for k in DAFTAR_K)
+        print(f"{baris['jumlah_program']:>8,} | {baris['n_list']:>6} | {baris['n_probe']:>7} | {nilai_recall} | "
+              f"{baris['eksak_ms']:>10.2f} | {baris['ann_ms']:>8.2f} | {baris['bangun_detik']:>9.1f}")
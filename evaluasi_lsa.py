@@ -0,0 +1,93 @@
+import time
+
+import numpy as np
+from scipy.sparse import issparse
+
+import evaluasi
+from data_benchmark import gandakan_katalog, muat_katalog, profil_kuesioner
+from recommender_engine import CANDIDATE_POOL_SIZE, bangun_indeks_katalog, dapatkan_peringkat
+from ruang_evaluasi import ruang_evaluasi_aktif
+from vektorisasi import buat_vectorizer
+
+# --- Konfigurasi Laporan ---
+KONFIGURASI = (('tfidf', None), ('lsa', 64), ('lsa', 128), ('lsa', 256))
+UKURAN_KATALOG = (400, 100_000) # 400 = katalog asli, selebihnya sintetis
+K = 10
+
+def _nama(jenis: str, rank) -> str:
+    return 'sparse tfidf' if rank is None else f"lsa {rank}"
+
+def _buat(jenis: str, rank):
+    return buat_vectorizer(jenis) if rank is None else buat_vectorizer(jenis, rank=rank)
+
+def _ukuran_mb(vectorizer, matriks) -> float:
+    """Memori matriks program (ditambah komponen SVD untuk mode LSA) dalam MB."""
+    if issparse(matriks):
+        ukuran = matriks.data.nbytes + matriks.indices.nbytes + matriks.indptr.nbytes
+    else:
+        ukuran = matriks.nbytes + vectorizer.komponen_.nbytes
+    return ukuran / 2**20
+
+def laporan_kualitas(konfigurasi=KONFIGURASI, top_k: int = K) -> list:
+    """Precision/recall/accuracy dari evaluasi_model (evaluasi.py) untuk setiap mode pada data uji yang sama."""
+    ruang = ruang_evaluasi_aktif()
+    dokumen = ruang.df_latihan['fitur_gabungan_program']
+    hasil = []
+    for jenis, rank in konfigurasi:
+        vectorizer = _buat(jenis, rank)
+        matriks = vectorizer.fit_transform(dokumen)
+        precision, recall, accuracy, jumlah = evaluasi.evaluasi_model(
+            ruang.test_df, ruang.df_latihan, vectorizer, matriks, top_k=top_k)
+        hasil.append({'mode': _nama(jenis, rank), 'precision': precision, 'recall': recall,
+                      'accuracy': accuracy, 'pengguna': jumlah})
+    return hasil
+
+def laporan_latensi(konfigurasi=KONFIGURASI, ukuran_katalog=UKURAN_KATALOG) -> list:
+    """
+    Latensi per kueri (dapatkan_peringkat, pool penuh) dan memori matriks program untuk setiap mode,
+    beserta overlap top-K terhadap jalur sparse sebagai ukuran seberapa jauh peringkat LSA bergeser.
+    """
+    daftar_profil = profil_kuesioner()
+    df_latihan = muat_katalog()
+    hasil = []
+    for jumlah_program in ukuran_katalog:
+        df_katalog = gandakan_katalog(df_latihan, jumlah_program)
+        indeks_katalog = bangun_indeks_katalog(df_katalog)
+        acuan = None
+        for jenis, rank in konfigurasi:
+            mulai = time.perf_counter()
+            vectorizer = _buat(jenis, rank)
+            matriks = vectorizer.fit_transform(df_katalog['fitur_gabungan_program'])
+            waktu_fit = time.perf_counter() - mulai
+
+            peringkat, latensi = [], []
+            for profil_string, profil_dict in daftar_profil:
+                mulai = time.perf_counter()
+                indeks_baris, _, _ = dapatkan_peringkat(profil_string, profil_dict, vectorizer, matriks, indeks_katalog,
+                                                        CANDIDATE_POOL_SIZE)
+                latensi.append((time.perf_counter() - mulai) * 1000)
+                peringkat.append(indeks_baris[:K])
+            if acuan is None:
+                acuan = peringkat
+            overlap = [len(set(p) & set(a)) / len(a) for p, a in zip(peringkat, acuan) if len(a)]
+            hasil.append({'jumlah_program': jumlah_program, 'mode': _nama(jenis, rank),
+                          'p50_ms': float(np.percentile(latensi, 50)), 'p95_ms': float(np.percentile(latensi, 95)),
+                          'memori_mb': _ukuran_mb(vectorizer, matriks), 'fit_detik': waktu_fit,
+                          f'overlap@{K}': float(np.mean(overlap)) if overlap else 1.0})
+    return hasil
+
+# --- Jalankan Laporan ---
+if __name__ == "__main__":
+    print(f"\nKualitas rekomendasi Top-{K} (evaluasi.py, {len(ruang_evaluasi_aktif().test_df)} data uji)...")
+    print("\nMode          | Precision | Recall | Accuracy | Pengguna")
+    print("--------------|-----------|--------|----------|---------")
+    for baris in laporan_kualitas():
+        print(f"{baris['mode']:<13} | {baris['precision']:>9.4f} | {baris['recall']:>6.4f} | "
+              f"{baris['accuracy']:>8.4f} | {baris['pengguna']:>8}")
+
+    print(f"\nLatensi per kueri dan memori matriks program ({len(profil_kuesioner())} profil kuesioner)...")
+    print(f"\n Program | Mode          | p50 (ms) | p95 (ms) | Memori (MB) | Fit (detik) | Overlap@{K} vs sparse")
+    print("---------|---------------|----------|----------|-------------|-------------|---------------------")
+    for baris in laporan_latensi():
+        print(f"{baris['jumlah_program']:>8,} | {baris['mode']:<13} | {baris['p50_ms']:>8.2f} | {baris['p95_ms']:>8.2f} | "
+              f"{baris['memori_mb']:>11.2f} | {baris['fit_detik']:>11.2f} | {baris[f'overlap@{K}']:>20.4f}")
@@ -0,0 +1,135 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from metrik_peringkat import hitung_metrik, metrik_per_pengguna
+from recommender_engine import bangun_indeks_katalog, dapatkan_peringkat_batch
+
+# --- Konfigurasi Runner Evaluasi ---
+UKURAN_POTONGAN = 2048 # Pengguna per tugas worker; satu potongan diperingkat dengan dapatkan_peringkat_batch
+
+# Konteks read-only di setiap worker, dipasang sekali oleh initializer pool
+_konteks_worker = None
+
+class KonteksEvaluasi:
+    """
+    Data read-only yang dipakai semua worker: katalog, vectorizer, matriks TF-IDF program, indeks atribut,
+    dan ID program per baris. Dengan start method 'fork', worker mewarisi objek ini tanpa salinan
+    (halaman memori dibagi copy-on-write selama tidak ditulis).
+    """
+    def __init__(self, df_latihan, tfidf_vectorizer, tfidf_matrix_latihan, indeks_katalog=None):
+        self.df_latihan = df_latihan
+        self.tfidf_vectorizer = tfidf_vectorizer
+        self.tfidf_matrix_latihan = tfidf_matrix_latihan
+        self.indeks_katalog = indeks_katalog if indeks_katalog is not None else bangun_indeks_katalog(df_latihan)
+        self.id_program = df_latihan['ID Program'].astype(str).to_numpy()
+
+class HasilEvaluasi:
+    """
+    Daftar peringkat seluruh pengguna yang dievaluasi, diringkas per posisi sampai `k_maks`.
+    Metrik @K untuk K berapa pun (<= k_maks) diturunkan dari sini tanpa memeringkat ulang.
+    """
+    def __init__(self, rekomendasi, relevan, jumlah_relevan):
+        self.rekomendasi = rekomendasi # Indeks baris program (jumlah pengguna x k_maks), -1 untuk posisi kosong
+        self.relevan = relevan # bool dengan bentuk sama: item di posisi tersebut relevan
+        self.jumlah_relevan = jumlah_relevan # Ukuran ground truth per pengguna
+
+    def __len__(self):
+        return len(self.jumlah_relevan)
+
+    @property
+    def panjang(self) -> np.ndarray:
+        """Panjang daftar rekomendasi per pengguna (bisa < k_maks)."""
+        return np.count_nonzero(self.rekomendasi >= 0, axis=1)
+
+    @property
+    def k_maks(self) -> int:
+        return self.relevan.shape[1]
+
+    def true_positive(self, k: int):
+        """(true positive, jumlah item direkomendasikan) per pengguna untuk top-k."""
+        if k > self.k_maks:
+            raise ValueError(f"k={k} melebihi k_maks={self.k_maks} saat evaluasi dijalankan")
+        return np.count_nonzero(self.relevan[:, :k], axis=1), np.minimum(self.panjang, k)
+
+    def precision_recall(self, k: int):
+        """Precision@k dan recall@k per pengguna (0 jika tidak ada rekomendasi/item relevan)."""
+        metrik = metrik_per_pengguna(self.rekomendasi, self.relevan, self.jumlah_relevan, [k])[k]
+        return metrik['precision'], metrik['recall']
+
+    def metrik(self, k_values, jumlah_program: int = None, matriks_item=None) -> dict:
+        """Rata-rata semua metrik peringkat per K (lihat metrik_peringkat.hitung_metrik)."""
+        return hitung_metrik(self.rekomendasi, self.relevan, self.jumlah_relevan, k_values, jumlah_program, matriks_item)
+
+def peringkat_engine(konteks, daftar_profil, top_n):
+    """Fungsi peringkat bawaan: indeks baris top-N dari engine terpusat untuk setiap profil."""
+    semua_peringkat = dapatkan_peringkat_batch(daftar_profil, konteks.tfidf_vectorizer, konteks.tfidf_matrix_latihan,
+                                               konteks.indeks_katalog, top_n)
+    return [indeks_baris for indeks_baris, _, _ in semua_peringkat]
+
+def _pasang_konteks(konteks):
+    global _konteks_worker
+    _konteks_worker = konteks
+
+def _jalankan_tugas(argumen):
+    fungsi, tugas = argumen
+    return fungsi(_konteks_worker, tugas)
+
+def peta_paralel(fungsi, daftar_tugas: list, konteks, jumlah_proses: int = None) -> list:
+    """
+    `[fungsi(konteks, tugas) for tugas in daftar_tugas]` di pool proses berukuran `jumlah_proses`
+    (default: semua core; 1 berarti dijalankan di proses ini). `fungsi` harus fungsi level modul.
+    `konteks` dipasang sekali per worker: dengan start method 'fork' (Linux) diwarisi tanpa pickling,
+    platform lain memakai start method bawaan.
+    """
+    jumlah_proses = min(jumlah_proses or os.cpu_count() or 1, len(daftar_tugas))
+    if jumlah_proses <= 1:
+        return [fungsi(konteks, tugas) for tugas in daftar_tugas]
+    metode = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+    with multiprocessing.get_context(metode).Pool(jumlah_proses, initializer=_pasang_konteks, initargs=(konteks,)) as pool:
+        return pool.map(_jalankan_tugas, [(fungsi, tugas) for tugas in daftar_tugas], chunksize=1)
+
+def tandai_relevan(rekomendasi: np.ndarray, daftar_relevan: list, id_program: np.ndarray) -> np.ndarray:
+    """Matriks bool seukuran `rekomendasi`: True jika ID program di posisi tersebut ada di set relevan penggunanya."""
+    relevan = np.zeros(rekomendasi.shape, dtype=bool)
+    for i, relevant_items in enumerate(daftar_relevan):
+        indeks_baris = rekomendasi[i][rekomendasi[i] >= 0]
+        relevan[i, :len(indeks_baris)] = [program in relevant_items for program in id_program[indeks_baris]]
+    return relevan
+
+def _evaluasi_potongan(konteks_worker, daftar_baris: list):
+    """Menyiapkan, memeringkat (sekali, sampai k_maks), dan mencocokkan satu potongan pengguna."""
+    konteks, fungsi_pengguna, fungsi_peringkat, k_maks = konteks_worker
+    data_pengguna = [data for data in (fungsi_pengguna(konteks, user_row) for user_row in daftar_baris) if data]
+    rekomendasi = np.full((len(data_pengguna), k_maks), -1, dtype=np.int64)
+    jumlah_relevan = np.array([len(relevant_items) for relevant_items, _, _ in data_pengguna], dtype=np.int64)
+    if not data_pengguna:
+        return rekomendasi, np.zeros(rekomendasi.shape, dtype=bool), jumlah_relevan
+
+    semua_peringkat = fungsi_peringkat(konteks, [(profil_string, profil_dict) for _, profil_string, profil_dict in data_pengguna], k_maks)
+    for i, indeks_baris in enumerate(semua_peringkat):
+        indeks_baris = np.asarray(indeks_baris, dtype=np.int64)[:k_maks]
+        rekomendasi[i, :len(indeks_baris)] = indeks_baris
+    relevan = tandai_relevan(rekomendasi, [relevant_items for relevant_items, _, _ in data_pengguna], konteks.id_program)
+    return rekomendasi, relevan, jumlah_relevan
+
+def jalankan_evaluasi(data_uji, konteks: KonteksEvaluasi, k_values, fungsi_pengguna, fungsi_peringkat=peringkat_engine,
+                      jumlah_proses: int = None, ukuran_potongan: int = UKURAN_POTONGAN) -> HasilEvaluasi:
+    """
+    Mengevaluasi `data_uji` (DataFrame kuesioner) untuk semua nilai `k_values` sekaligus.
+    - `fungsi_pengguna(konteks, user_row)` -> (set ID relevan, string profil, dict profil), atau None untuk melewati pengguna
+    - `fungsi_peringkat(konteks, daftar_profil, top_n)` -> list indeks baris program terurut per profil
+    Keduanya harus fungsi level modul (dipanggil di worker). Setiap pengguna diperingkat tepat sekali
+    sampai K terbesar. Pengguna dibagi per potongan ke pool proses berukuran `jumlah_proses`
+    (default: semua core); 1 berarti dijalankan di proses ini.
+    """
+    k_maks = max(k_values)
+    daftar_baris = data_uji.to_dict(orient='records')
+    potongan = [daftar_baris[awal:awal + ukuran_potongan] for awal in range(0, len(daftar_baris), ukuran_potongan)]
+    hasil_potongan = peta_paralel(_evaluasi_potongan, potongan, (konteks, fungsi_pengguna, fungsi_peringkat, k_maks),
+                                  jumlah_proses=jumlah_proses)
+    if not hasil_potongan:
+        return HasilEvaluasi(np.full((0, k_maks), -1, dtype=np.int64), np.zeros((0, k_maks), dtype=bool),
+                             np.zeros(0, dtype=np.int64))
+    return HasilEvaluasi(*(np.concatenate(bagian) for bagian in zip(*hasil_potongan)))
@@ -0,0 +1,83 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.cluster import MiniBatchKMeans
+
+# --- Konfigurasi Indeks ANN (IVF) ---
+N_PROBE = 32 # Jumlah cluster terdekat yang diperiksa per kueri (naikkan untuk recall, turunkan untuk latensi)
+UKURAN_BLOK = 10000 # Baris per blok saat menetapkan program ke cluster
+
+class IndeksANN:
+    """
+    Indeks IVF (inverted file) untuk candidate generation: program dikelompokkan ke `n_list` cluster
+    (spherical k-means atas vektor TF-IDF). Kueri hanya menilai program di cluster yang sentroidnya
+    paling mirip, lalu skor cosine eksak dihitung untuk kandidat tersebut.
+    Knob: `n_probe` (cluster minimum per kueri) dan `minimal` di `kandidat` (probe ditambah sampai
+    kandidat yang lolos filter cukup untuk pool).
+    """
+    def __init__(self, sentroid, baris, offset, n_probe: int = N_PROBE):
+        self.sentroid = sentroid # float32 (n_list x jumlah term), ternormalisasi L2
+        self.baris = baris # ID baris program, dikelompokkan per cluster dan terurut di dalam cluster
+        self.offset = offset # baris[offset[c]:offset[c + 1]] adalah anggota cluster c
+        self.n_probe = n_probe
+
+    @property
+    def n_list(self) -> int:
+        return self.sentroid.shape[0]
+
+    def kandidat(self, vektor_pengguna, baris_eligible=None, minimal: int = 0, n_probe: int = None) -> np.ndarray:
+        """
+        Mengembalikan ID baris kandidat (terurut) dari cluster terdekat. Jika `baris_eligible` diberikan,
+        hanya baris yang juga lolos hard filter yang diambil. Probe dilanjutkan melewati `n_probe`
+        sampai jumlah kandidat mencapai `minimal` atau semua cluster habis.
+        """
+        n_probe = self.n_probe if n_probe is None else n_probe
+        vektor = csr_matrix(vektor_pengguna)
+        if vektor.shape[1] > self.sentroid.shape[1]: # Term baru (pembaruan inkremental) tidak ada di sentroid
+            vektor = vektor[:, :self.sentroid.shape[1]]
+        skor_cluster = np.asarray(vektor @ self.sentroid.T).ravel()
+        urutan_cluster = np.argsort(-skor_cluster, kind='stable')
+
+        terpilih, jumlah = [], 0
+        for i, cluster in enumerate(urutan_cluster):
+            if i >= n_probe and jumlah >= minimal:
+                break
+            anggota = self.baris[self.offset[cluster]:self.offset[cluster + 1]]
+            if baris_eligible is not None and len(anggota):
+                if len(baris_eligible) == 0:
+                    break
+                posisi = np.minimum(np.searchsorted(baris_eligible, anggota), len(baris_eligible) - 1)
+                anggota = anggota[baris_eligible[posisi] == anggota]
+            terpilih.append(anggota)
+            jumlah += len(anggota)
+        if not terpilih:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(terpilih))
+
+def _normalisasi_baris(matriks: np.ndarray) -> np.ndarray:
+    norma = np.linalg.norm(matriks, axis=1, keepdims=True)
+    return matriks / np.maximum(norma, 1e-12)
+
+def tetapkan_cluster(sentroid: np.ndarray, tfidf_matrix_prog, n_probe: int = N_PROBE) -> IndeksANN:
+    """Menetapkan setiap program ke sentroid paling mirip (per blok) dan menyusun daftar anggota cluster."""
+    matriks = csr_matrix(tfidf_matrix_prog)
+    if matriks.shape[1] > sentroid.shape[1]: # Kolom term baru bernilai nol di sentroid lama
+        sentroid = np.hstack([sentroid, np.zeros((sentroid.shape[0], matriks.shape[1] - sentroid.shape[1]), dtype=sentroid.dtype)])
+    label = np.empty(matriks.shape[0], dtype=np.int64)
+    for awal in range(0, matriks.shape[0], UKURAN_BLOK):
+        label[awal:awal + UKURAN_BLOK] = np.asarray(matriks[awal:awal + UKURAN_BLOK] @ sentroid.T).argmax(axis=1)
+    urutan = np.argsort(label, kind='stable') # Stabil: baris di dalam cluster tetap terurut
+    offset = np.searchsorted(label[urutan], np.arange(sentroid.shape[0] + 1))
+    return IndeksANN(sentroid, urutan.astype(np.int64), offset.astype(np.int64), n_probe)
+
+def bangun_indeks_ann(tfidf_matrix_prog, n_list: int = 0, n_probe: int = N_PROBE, seed: int = 42) -> IndeksANN:
+    """
+    Membangun indeks IVF secara offline. `n_list` = 0 berarti otomatis (sekitar akar jumlah program).
+    """
+    jumlah_program = tfidf_matrix_prog.shape[0]
+    if n_list <= 0:
+        n_list = int(np.sqrt(jumlah_program))
+    n_list = max(1, min(n_list, jumlah_program))
+    kmeans = MiniBatchKMeans(n_clusters=n_list, random_state=seed, batch_size=4096, n_init=3)
+    kmeans.fit(tfidf_matrix_prog)
+    sentroid = _normalisasi_baris(kmeans.cluster_centers_).astype(np.float32)
+    return tetapkan_cluster(sentroid, tfidf_matrix_prog, n_probe)
@@ -0,0 +1,40 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# Margin numerik untuk ambang: skor akhir dihitung ulang dengan cosine_similarity,
+# yang bisa berbeda beberapa ULP dari akumulasi bobot lewat posting list
+MARGIN_AMBANG = 1e-9
+
+class IndeksPosting:
+    """
+    Indeks term -> (program, bobot) atas matriks TF-IDF program dalam format CSC: kolom = posting list term.
+    Skor semua program diakumulasi hanya dari posting list term yang ada di profil, dalam satu perkalian
+    sparse (tanpa loop Python per term), lalu hanya program di atas ambang top-k yang dinilai ulang engine.
+    """
+    def __init__(self, matriks_csc):
+        self.matriks_csc = matriks_csc
+
+    @property
+    def jumlah_program(self) -> int:
+        return self.matriks_csc.shape[0]
+
+    def kandidat(self, vektor_pengguna, baris_eligible=None, minimal: int = 1) -> np.ndarray:
+        """
+        Mengembalikan ID baris (terurut) yang pasti memuat top-`minimal` skor eksak di antara `baris_eligible`
+        (atau seluruh katalog): semua program dengan skor akumulasi >= skor ke-`minimal` (dikurangi margin),
+        termasuk seluruh program yang seri di batas pool, sehingga tie-break ID engine tetap sama.
+        """
+        vektor = csr_matrix(vektor_pengguna)
+        skor = self.matriks_csc[:, vektor.indices] @ vektor.data
+        baris = np.arange(self.jumlah_program) if baris_eligible is None else baris_eligible
+        if len(baris) <= minimal:
+            return baris
+        skor = skor[baris]
+        ambang = np.partition(skor, len(skor) - minimal)[len(skor) - minimal]
+        return baris[skor >= ambang - MARGIN_AMBANG * (1 + abs(ambang))]
+
+def bangun_indeks_posting(tfidf_matrix_prog) -> IndeksPosting:
+    """Membangun posting list dari matriks TF-IDF program (satu kali konversi CSR -> CSC)."""
+    matriks_csc = csr_matrix(tfidf_matrix_prog).tocsc()
+    matriks_csc.sort_indices()
+    return IndeksPosting(matriks_csc)
@@ -0,0 +1,64 @@
+import bisect
+import math
+import threading
+
+# Batas atas bucket histogram dalam milidetik, deret 1-2-5 (bucket terakhir menampung sisanya)
+BATAS_BUCKET_MS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, math.inf)
+KUANTIL = (0.5, 0.95, 0.99)
+
+
+class HistogramTahap:
+    """
+    Agregator durasi per tahap pipeline rekomendasi dengan bucket tetap, aman dipakai banyak thread.
+    Objek ini sendiri adalah callback `(tahap, durasi_detik, jumlah_kandidat)` yang bisa dipasang
+    lewat `recommender_engine.pasang_pengamat_tahap`.
+    """
+    def __init__(self, batas_bucket_ms=BATAS_BUCKET_MS):
+        self.batas_bucket_ms = tuple(batas_bucket_ms)
+        self._tahap = {} # tahap -> [jumlah per bucket, total ms, maks ms, total kandidat]
+        self._lock = threading.Lock()
+
+    def __call__(self, tahap: str, durasi_detik: float, jumlah_kandidat: int = 0):
+        # Dipanggil di jalur permintaan: cukup operasi Python biasa, tanpa alokasi array
+        durasi_ms = durasi_detik * 1000
+        bucket = bisect.bisect_left(self.batas_bucket_ms, durasi_ms)
+        with self._lock:
+            data = self._tahap.get(tahap)
+            if data is None:
+                data = self._tahap[tahap] = [[0] * len(self.batas_bucket_ms), 0.0, 0.0, 0]
+            data[0][bucket] += 1
+            data[1] += durasi_ms
+            data[2] = max(data[2], durasi_ms)
+            data[3] += jumlah_kandidat
+
+    def _kuantil(self, jumlah_bucket: list, q: float) -> float:
+        """Perkiraan kuantil: batas atas bucket tempat kumulatif mencapai q (inf diganti batas sebelumnya)."""
+        target, kumulatif = q * sum(jumlah_bucket), 0
+        for posisi, n in enumerate(jumlah_bucket):
+            kumulatif += n
+            if n and kumulatif >= target:
+                break
+        batas = self.batas_bucket_ms[posisi]
+        return float(batas) if math.isfinite(batas) else float(self.batas_bucket_ms[posisi - 1])
+
+    def statistik(self) -> dict:
+        """Ringkasan per tahap dalam format yang siap di-JSON-kan."""
+        with self._lock:
+            salinan = {tahap: (list(data[0]), data[1], data[2], data[3]) for tahap, data in self._tahap.items()}
+        hasil = {}
+        for tahap, (jumlah_bucket, total_ms, maks_ms, total_kandidat) in salinan.items():
+            jumlah = sum(jumlah_bucket)
+            hasil[tahap] = {
+                'jumlah': jumlah,
+                'rata_rata_ms': total_ms / jumlah,
+                'maks_ms': maks_ms,
+                **{f'p{int(q * 100)}_ms': self._kuantil(jumlah_bucket, q) for q in KUANTIL},
+                'rata_rata_kandidat': total_kandidat / jumlah,
+                'bucket_ms': {('+inf' if math.isinf(batas) else f'{batas:g}'): n
+                              for batas, n in zip(self.batas_bucket_ms, jumlah_bucket)},
+            }
+        return hasil
+
+    def reset(self):
+        with self._lock:
+            self._tahap.clear()
@@ -0,0 +1,244 @@
+import argparse
+import hashlib
+import importlib
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import kendalltau
+
+import app
+import recommender_engine
+from cache_rekomendasi import CacheRekomendasi
+from data_benchmark import kuesioner_path, latihan_path
+from indeks_ann import bangun_indeks_ann
+from indeks_posting import bangun_indeks_posting
+from recommender_engine import (CANDIDATE_POOL_SIZE, bangun_indeks_katalog, dapatkan_peringkat, dapatkan_rekomendasi,
+                                dapatkan_rekomendasi_batch, normalisasi_preferensi)
+from vektorisasi import buat_vectorizer
+
+# --- Konfigurasi Harness ---
+# Rekaman keluaran engine acuan: top-N ID program dan adjusted_similarity untuk setiap profil tetap
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/golden_peringkat.json')
+TOP_N = 10
+# Toleransi absolut skor untuk 'sama persis': perubahan urutan penjumlahan float (mis. matriks aturan)
+# menggeser skor beberapa ULP tanpa mengubah peringkat
+TOLERANSI_SKOR = 1e-12
+USIA_FORM = ('18', '26', '35') # Satu usia per kelompok hard filter usia
+HARI_SIBUK_FORM = 'Senin, Rabu'
+
+class KonteksKatalog:
+    """Katalog asli beserta model TF-IDF dan indeks atribut yang dipakai semua implementasi."""
+    def __init__(self):
+        self.df_latihan = pd.read_csv(latihan_path)
+        self.df_latihan['fitur_gabungan_program'] = self.df_latihan['fitur_gabungan_program'].fillna('')
+        self.vectorizer = buat_vectorizer()
+        self.matriks = self.vectorizer.fit_transform(self.df_latihan['fitur_gabungan_program'])
+        self.indeks_katalog = bangun_indeks_katalog(self.df_latihan)
+
+def daftar_profil_golden() -> list:
+    """
+    Profil tetap untuk rekaman: setiap baris kuesioner (dengan preferensi gaya evaluasi.py dan dengan
+    seluruh jawaban), semua kombinasi pilihan form rekomendasi, dan satu profil kosong.
+    """
+    df_kuesioner = pd.read_csv(kuesioner_path)
+    df_kuesioner['fitur_gabungan_pengguna'] = df_kuesioner['fitur_gabungan_pengguna'].fillna('')
+    daftar_profil = []
+    for _, user_row in df_kuesioner.iterrows():
+        preferensi = {
+            'tempat': str(user_row[app.COL_KUESIONER_TEMPAT]).lower(),
+            'pengalaman': str(user_row[app.COL_KUESIONER_PENGALAMAN]).lower(),
+            'jenis_kelamin': str(user_row[app.COL_KUESIONER_JENIS_KELAMIN]).lower(),
+        }
+        lengkap = {**preferensi, 'usia': user_row[app.COL_KUESIONER_USIA],
+                   'tujuan': str(user_row[app.COL_KUESIONER_TUJUAN]).lower(),
+                   'jenis_latihan': str(user_row.get(app.COL_KUESIONER_JENIS_LATIHAN_PRIMARY,
+                                                     user_row.get(app.COL_KUESIONER_JENIS_LATIHAN_FALLBACK, ''))).lower()}
+        daftar_profil.append((user_row['fitur_gabungan_pengguna'], preferensi))
+        daftar_profil.append((user_row['fitur_gabungan_pengguna'], lengkap))
+
+    opsi = {kunci: nilai for kunci, nilai in app.OPSI_FORM_REKOMENDASI.items() if kunci != 'hari_sibuk'}
+    opsi['usia'] = list(USIA_FORM)
+    for kombinasi in itertools.product(*opsi.values()):
+        data_form = dict(zip(opsi, kombinasi))
+        data_form['hari_sibuk'] = HARI_SIBUK_FORM
+        daftar_profil.append((app.create_feature_string_for_new_user(data_form), data_form))
+    daftar_profil.append(('', {}))
+    return daftar_profil
+
+def tanda_profil(daftar_profil: list) -> str:
+    """Hash daftar profil, untuk memastikan perbandingan memakai profil yang sama dengan saat rekaman."""
+    isi = json.dumps([[s, sorted((k, str(v)) for k, v in d.items())] for s, d in daftar_profil], ensure_ascii=False)
+    return hashlib.sha1(isi.encode('utf-8')).hexdigest()
+
+def _ringkas(hasil_df: pd.DataFrame, top_n: int):
+    return hasil_df['ID Program'].astype(str).tolist()[:top_n], hasil_df['adjusted_similarity'].astype(float).tolist()[:top_n]
+
+# --- Implementasi yang dibandingkan: fungsi(konteks, daftar_profil, top_n) -> list (ID, skor) per profil ---
+def implementasi_tunggal(konteks, daftar_profil, top_n):
+    return [_ringkas(dapatkan_rekomendasi(s, d, konteks.df_latihan, konteks.vectorizer, konteks.matriks, top_n,
+                                          konteks.indeks_katalog), top_n) for s, d in daftar_profil]
+
+def implementasi_batch(konteks, daftar_profil, top_n):
+    semua = dapatkan_rekomendasi_batch(daftar_profil, konteks.df_latihan, konteks.vectorizer, konteks.matriks, top_n,
+                                       konteks.indeks_katalog)
+    return [_ringkas(hasil_df, top_n) for hasil_df in semua]
+
+def implementasi_posting(konteks, daftar_profil, top_n):
+    indeks_posting = bangun_indeks_posting(konteks.matriks)
+    return [_ringkas(dapatkan_rekomendasi(s, d, konteks.df_latihan, konteks.vectorizer, konteks.matriks, top_n,
+                                          konteks.indeks_katalog, indeks_posting=indeks_posting), top_n)
+            for s, d in daftar_profil]
+
+def implementasi_ann(konteks, daftar_profil, top_n):
+    indeks_ann = bangun_indeks_ann(konteks.matriks)
+    return [_ringkas(dapatkan_rekomendasi(s, d, konteks.df_latihan, konteks.vectorizer, konteks.matriks, top_n,
+                                          konteks.indeks_katalog, indeks_ann=indeks_ann), top_n)
+            for s, d in daftar_profil]
+
+def implementasi_batch_ann(konteks, daftar_profil, top_n):
+    indeks_ann = bangun_indeks_ann(konteks.matriks)
+    semua = dapatkan_rekomendasi_batch(daftar_profil, konteks.df_latihan, konteks.vectorizer, konteks.matriks, top_n,
+                                       konteks.indeks_katalog, indeks_ann=indeks_ann)
+    return [_ringkas(hasil_df, top_n) for hasil_df in semua]
+
+def implementasi_cache(konteks, daftar_profil, top_n):
+    """Jalur app.py: pool penuh diperingkat sekali, disimpan di cache, lalu dipotong ke top-N (dua putaran, hit di putaran kedua)."""
+    cache = CacheRekomendasi(kapasitas=len(daftar_profil) + 1)
+    id_program = konteks.df_latihan['ID Program'].astype(str).to_numpy()
+    hasil = []
+    for _ in range(2):
+        hasil = []
+        for s, d in daftar_profil:
+            kunci = (s, tuple(sorted(normalisasi_preferensi(d).items())))
+            peringkat = cache.ambil(kunci)
+            if peringkat is None:
+                peringkat = dapatkan_peringkat(s, d, konteks.vectorizer, konteks.matriks, konteks.indeks_katalog,
+                                               CANDIDATE_POOL_SIZE)
+                cache.simpan(kunci, peringkat)
+            indeks_baris, _, adjusted = peringkat
+            hasil.append((id_program[indeks_baris[:top_n]].tolist(), adjusted[:top_n].astype(float).tolist()))
+    return hasil
+
+def implementasi_lsa(konteks, daftar_profil, top_n):
+    vectorizer = buat_vectorizer('lsa')
+    matriks = vectorizer.fit_transform(konteks.df_latihan['fitur_gabungan_program'])
+    return [_ringkas(dapatkan_rekomendasi(s, d, konteks.df_latihan, vectorizer, matriks, top_n, konteks.indeks_katalog), top_n)
+            for s, d in daftar_profil]
+
+IMPLEMENTASI = {
+    'tunggal': implementasi_tunggal,
+    'batch': implementasi_batch,
+    'cache': implementasi_cache,
+    'posting': implementasi_posting,
+    'ann': implementasi_ann,
+    'batch_ann': implementasi_batch_ann,
+    'lsa': implementasi_lsa,
+}
+
+def _cari_implementasi(nama: str):
+    """Nama terdaftar di IMPLEMENTASI, atau 'modul:fungsi' untuk implementasi di luar file ini."""
+    if nama in IMPLEMENTASI:
+        return IMPLEMENTASI[nama]
+    nama_modul, _, nama_fungsi = nama.partition(':')
+    return getattr(importlib.import_module(nama_modul), nama_fungsi)
+
+def _jalankan(fungsi, konteks, daftar_profil, top_n):
+    mulai = time.perf_counter()
+    hasil = fungsi(konteks, daftar_profil, top_n)
+    return hasil, time.perf_counter() - mulai
+
+def rekam_golden(path: str = GOLDEN_PATH, top_n: int = TOP_N) -> dict:
+    """Merekam keluaran engine saat ini (implementasi 'tunggal') sebagai acuan."""
+    konteks = KonteksKatalog()
+    daftar_profil = daftar_profil_golden()
+    hasil, durasi = _jalankan(implementasi_tunggal, konteks, daftar_profil, top_n)
+    golden = {
+        'top_n': top_n,
+        'detik': durasi,
+        'konfigurasi': {nama: getattr(recommender_engine, nama) for nama in dir(recommender_engine)
+                        if nama.isupper() and isinstance(getattr(recommender_engine, nama), (int, float))},
+        'tanda_profil': tanda_profil(daftar_profil),
+        'profil': [{'id': ids, 'skor': skor} for ids, skor in hasil],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(golden, f, ensure_ascii=False)
+    return golden
+
+def _korelasi_peringkat(ids_acuan: list, ids_baru: list) -> float:
+    """Kendall tau atas gabungan kedua daftar; item yang tidak muncul diberi peringkat setelah item terakhir."""
+    if ids_acuan == ids_baru:
+        return 1.0
+    gabungan = list(dict.fromkeys(ids_acuan + ids_baru))
+    peringkat_acuan = [ids_acuan.index(i) if i in ids_acuan else len(ids_acuan) for i in gabungan]
+    peringkat_baru = [ids_baru.index(i) if i in ids_baru else len(ids_baru) for i in gabungan]
+    tau = kendalltau(peringkat_acuan, peringkat_baru).statistic
+    return float(tau) if np.isfinite(tau) else 0.0
+
+def bandingkan(golden: dict, hasil: list) -> dict:
+    """Metrik kesetaraan hasil sebuah implementasi terhadap rekaman golden."""
+    persis, id_sama, tau, overlap, delta = 0, 0, [], [], []
+    for acuan, (ids, skor) in zip(golden['profil'], hasil):
+        ids_acuan, skor_acuan = acuan['id'], acuan['skor']
+        id_sama += ids == ids_acuan
+        persis += ids == ids_acuan and np.allclose(skor, skor_acuan, rtol=0, atol=TOLERANSI_SKOR)
+        if ids_acuan or ids:
+            tau.append(_korelasi_peringkat(ids_acuan, ids))
+            overlap.append(len(set(ids) & set(ids_acuan)) / max(len(ids_acuan), len(ids)))
+        skor_per_id = dict(zip(ids, skor))
+        delta.extend(abs(skor_per_id[i] - s) for i, s in zip(ids_acuan, skor_acuan) if i in skor_per_id)
+    jumlah = len(golden['profil'])
+    return {
+        'profil': jumlah,
+        'sama_persis': persis / jumlah,
+        'urutan_id_sama': id_sama / jumlah,
+        'kendall_tau_rata_rata': float(np.mean(tau)) if tau else 1.0,
+        'kendall_tau_minimum': float(np.min(tau)) if tau else 1.0,
+        f'overlap@{golden["top_n"]}': float(np.mean(overlap)) if overlap else 1.0,
+        'delta_skor_maks': float(np.max(delta)) if delta else 0.0,
+        'delta_skor_rata_rata': float(np.mean(delta)) if delta else 0.0,
+    }
+
+def jalankan_perbandingan(daftar_nama, path: str = GOLDEN_PATH) -> list:
+    with open(path, encoding='utf-8') as f:
+        golden = json.load(f)
+    konteks = KonteksKatalog()
+    daftar_profil = daftar_profil_golden()
+    if tanda_profil(daftar_profil) != golden['tanda_profil']:
+        raise ValueError("Profil berbeda dengan rekaman golden (kuesioner/form berubah); rekam ulang dengan perintah 'rekam'.")
+    # Waktu acuan diukur ulang di mesin yang sama agar rasio kecepatan sebanding
+    _, detik_acuan = _jalankan(implementasi_tunggal, konteks, daftar_profil, golden['top_n'])
+    laporan = []
+    for nama in daftar_nama:
+        hasil, detik = _jalankan(_cari_implementasi(nama), konteks, daftar_profil, golden['top_n'])
+        laporan.append({'implementasi': nama, **bandingkan(golden, hasil), 'detik': detik, 'percepatan': detik_acuan / detik})
+    return laporan
+
+# --- Jalankan Harness ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Harness kesetaraan peringkat terhadap rekaman golden.")
+    sub = parser.add_subparsers(dest='perintah', required=True)
+    perintah_rekam = sub.add_parser('rekam', help="Merekam keluaran engine saat ini sebagai golden")
+    perintah_rekam.add_argument('--top-n', type=int, default=TOP_N)
+    perintah_banding = sub.add_parser('banding', help="Membandingkan implementasi dengan golden")
+    perintah_banding.add_argument('implementasi', nargs='*', default=list(IMPLEMENTASI),
+                                  help="Nama di IMPLEMENTASI atau 'modul:fungsi'")
+    for perintah in (perintah_rekam, perintah_banding):
+        perintah.add_argument('--golden', default=GOLDEN_PATH)
+    argumen = parser.parse_args()
+
+    if argumen.perintah == 'rekam':
+        golden = rekam_golden(argumen.golden, argumen.top_n)
+        print(f"Golden direkam: {len(golden['profil'])} profil, top-{golden['top_n']}, {golden['detik']:.2f} detik -> '{argumen.golden}'.")
+    else:
+        print("\nImplementasi | Sama persis | Urutan ID sama | Kendall tau (rata/min) | Overlap | Delta skor (maks/rata) | Detik | Percepatan")
+        print("-------------|-------------|----------------|------------------------|---------|------------------------|-------|-----------")
+        for baris in jalankan_perbandingan(argumen.implementasi, argumen.golden):
+            overlap = next(v for k, v in baris.items() if k.startswith('overlap@'))
+            print(f"{baris['implementasi']:<12} | {baris['sama_persis']:>11.2%} | {baris['urutan_id_sama']:>14.2%} | "
+                  f"{baris['kendall_tau_rata_rata']:>10.4f} / {baris['kendall_tau_minimum']:>7.4f} | {overlap:>7.4f} | "
+                  f"{baris['delta_skor_maks']:>10.2e} / {baris['delta_skor_rata_rata']:>9.2e} | {baris['detik']:>5.2f} | "
+                  f"{baris['percepatan']:>9.2f}x")
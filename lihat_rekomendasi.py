@@ -1,31 +1,5 @@
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-import numpy as np
-import os
 from recommender_engine import dapatkan_rekomendasi # Impor fungsi terpusat
-
-# --- Konfigurasi & Pemuatan Data ---
-base_path = os.path.dirname(os.path.abspath(__file__))
-# Langsung menunjuk ke file di direktori yang sama dengan skrip
-latihan_path = os.path.join(base_path, 'data/data_latihan_processed.csv')
-kuesioner_path = os.path.join(base_path, 'data/kuesioner_processed.csv')
-
-try:
-    df_latihan = pd.read_csv(latihan_path)
-    df_kuesioner = pd.read_csv(kuesioner_path)
-    print("File data berhasil dimuat.")
-except FileNotFoundError as e:
-    print(f"Error: File tidak ditemukan. Pastikan path sudah benar. Detail: {e}")
-    exit()
-
-# --- Pra-pemrosesan ---
-df_latihan['fitur_gabungan_program'] = df_latihan['fitur_gabungan_program'].fillna('')
-df_kuesioner['fitur_gabungan_pengguna'] = df_kuesioner['fitur_gabungan_pengguna'].fillna('')
-
-# --- Pembangunan Model ---
-tfidf = TfidfVectorizer(stop_words='english')
-tfidf_matrix_latihan = tfidf.fit_transform(df_latihan['fitur_gabungan_program'])
-print(f"Dimensi Matriks TF-IDF Latihan: {tfidf_matrix_latihan.shape}")
+from ruang_evaluasi import ruang_evaluasi_aktif # Data dan model TF-IDF bersama evaluasi.py (di-cache)
 
 # --- Fungsi Helper (disalin dari app.py untuk pengujian mandiri) ---
 def tambah_kata_kunci_untuk_fitur(jenis_latihan_input_str):
@@ -75,6 +49,10 @@ def create_feature_string_for_new_user(user_data_dict):
 
 # --- Jalankan dan Tampilkan Rekomendasi ---
 if __name__ == "__main__":
+    # --- Pemuatan Data & Model ---
+    ruang = ruang_evaluasi_aktif()
+    df_latihan, tfidf, tfidf_matrix_latihan = ruang.df_latihan, ruang.tfidf, ruang.tfidf_matrix_latihan
+
     # --- PILIH PENGGUNA UNTUK DIUJI ---
     # Profil pengguna kustom sesuai permintaan Anda
     user_profile_dict = {
@@ -106,7 +84,8 @@ if __name__ == "__main__":
         df_latihan=df_latihan,
         tfidf_vectorizer=tfidf,
         tfidf_matrix_latihan=tfidf_matrix_latihan,
-        final_top_n=10
+        final_top_n=10,
+        indeks_katalog=ruang.indeks_katalog
     )
 
     # Tampilkan hasil dengan format yang rapi
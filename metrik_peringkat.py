@@ -0,0 +1,125 @@
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+
+# Metrik per K yang dihitung `hitung_metrik`; 'coverage' dan 'ils' hanya jika datanya diberikan
+METRIK = ('precision', 'recall', 'ndcg', 'map', 'mrr', 'coverage', 'ils')
+BATAS_ITEM_GRAM = 4096 # Item unik maksimum untuk matriks Gram padat ILS (4096^2 x 8 byte = 128 MB)
+
+def _bagi(pembilang, penyebut) -> np.ndarray:
+    """Pembagian per elemen dengan hasil 0 jika penyebut 0."""
+    pembilang = np.asarray(pembilang, dtype=np.float64)
+    return np.divide(pembilang, penyebut, out=np.zeros(pembilang.shape), where=np.asarray(penyebut) > 0)
+
+def metrik_per_pengguna(rekomendasi: np.ndarray, relevan: np.ndarray, jumlah_relevan: np.ndarray, k_values) -> dict:
+    """
+    Precision, recall, nDCG, AP, dan reciprocal rank per pengguna untuk setiap K, dari satu kali
+    akumulasi (cumsum) atas matriks pengguna x posisi.
+    - `rekomendasi`: indeks baris program (pengguna x k_maks), -1 untuk posisi kosong
+    - `relevan`: bool dengan bentuk sama, True jika item di posisi tersebut relevan
+    - `jumlah_relevan`: ukuran ground truth per pengguna
+    Precision dibagi jumlah item yang benar-benar direkomendasikan (bisa < K), sama seperti evaluasi.py.
+    Mengembalikan {k: {metrik: array per pengguna}}.
+    """
+    k_maks = relevan.shape[1]
+    relevan = relevan & (rekomendasi >= 0)
+    panjang = np.count_nonzero(rekomendasi >= 0, axis=1)
+    posisi = np.arange(1, k_maks + 1)
+    diskon = 1.0 / np.log2(posisi + 1)
+
+    true_positive = np.cumsum(relevan, axis=1)
+    dcg = np.cumsum(relevan * diskon, axis=1)
+    jumlah_presisi = np.cumsum(relevan * (true_positive / posisi), axis=1) # Sigma P@i pada posisi relevan
+    idcg_kumulatif = np.cumsum(diskon)
+    ada_hit = relevan.any(axis=1)
+    hit_pertama = np.where(ada_hit, relevan.argmax(axis=1), k_maks) # Posisi (0-based) item relevan pertama
+
+    hasil = {}
+    for k in k_values:
+        if k > k_maks:
+            raise ValueError(f"k={k} melebihi panjang daftar rekomendasi ({k_maks})")
+        tp = true_positive[:, k - 1] if k > 0 else np.zeros(len(panjang), dtype=np.int64)
+        ideal = np.minimum(jumlah_relevan, k)
+        idcg = np.where(ideal > 0, idcg_kumulatif[np.maximum(ideal, 1) - 1], 0.0)
+        hasil[k] = {
+            'precision': _bagi(tp, np.minimum(panjang, k)),
+            'recall': _bagi(tp, jumlah_relevan),
+            'ndcg': _bagi(dcg[:, k - 1], idcg),
+            'map': _bagi(jumlah_presisi[:, k - 1], ideal),
+            'mrr': np.where(hit_pertama < k, 1.0 / (hit_pertama + 1), 0.0),
+        }
+    return hasil
+
+def cakupan_katalog(rekomendasi: np.ndarray, k: int, jumlah_program: int) -> float:
+    """Proporsi program katalog yang muncul di top-k setidaknya satu pengguna."""
+    top_k = rekomendasi[:, :k]
+    return np.unique(top_k[top_k >= 0]).size / jumlah_program if jumlah_program else 0.0
+
+def _jumlah_kemiripan_agregasi(top_k: np.ndarray, matriks_item) -> np.ndarray:
+    """
+    Jumlah cosine seluruh pasangan item per baris `top_k` = (|sum v|^2 - sum |v|^2) / 2 dengan v baris
+    `matriks_item`, lewat satu perkalian matriks agregasi sparse (dipakai jika item unik terlalu banyak).
+    """
+    pengguna, kolom = np.nonzero(top_k >= 0)
+    agregasi = csr_matrix((np.ones(len(pengguna)), (pengguna, top_k[pengguna, kolom])),
+                          shape=(len(top_k), matriks_item.shape[0]))
+    jumlah_vektor = agregasi @ matriks_item
+    if issparse(jumlah_vektor):
+        norma_jumlah = np.asarray(jumlah_vektor.multiply(jumlah_vektor).sum(axis=1)).ravel()
+        norma_item = np.asarray(matriks_item.multiply(matriks_item).sum(axis=1)).ravel()
+    else:
+        norma_jumlah = np.einsum('ij,ij->i', jumlah_vektor, jumlah_vektor, dtype=np.float64)
+        norma_item = np.einsum('ij,ij->i', matriks_item, matriks_item, dtype=np.float64)
+    return (norma_jumlah - agregasi @ norma_item) / 2
+
+def kemiripan_intra_list(rekomendasi: np.ndarray, k_values, matriks_item) -> dict:
+    """
+    Rata-rata cosine similarity antar pasangan item di top-k setiap pengguna (NaN jika < 2 item),
+    {k: array per pengguna}. `matriks_item` berisi vektor item ternormalisasi L2 (TF-IDF/embedding).
+    Kemiripan item unik yang direkomendasikan dihitung sekali sebagai matriks Gram padat; kontribusi
+    setiap posisi terhadap item sebelumnya diakumulasi, sehingga semua K didapat dari satu cumsum.
+    """
+    k_maks = max(k_values)
+    top = rekomendasi[:, :k_maks]
+    terisi = top >= 0
+    jumlah_item = np.cumsum(terisi, axis=1)
+    unik, kode = np.unique(top[terisi], return_inverse=True)
+
+    if len(unik) <= BATAS_ITEM_GRAM:
+        item = matriks_item[unik]
+        gram = item @ item.T
+        gram = gram.toarray() if issparse(gram) else np.asarray(gram, dtype=np.float64)
+        indeks = np.zeros(top.shape, dtype=np.int64)
+        indeks[terisi] = kode
+        # Kolom j: jumlah kemiripan item di posisi j dengan semua item di posisi sebelumnya
+        tambahan = np.zeros(top.shape)
+        for j in range(1, k_maks):
+            kemiripan = gram[indeks[:, j][:, None], indeks[:, :j]] * (terisi[:, :j] & terisi[:, j][:, None])
+            tambahan[:, j] = kemiripan.sum(axis=1)
+        total_kumulatif = np.cumsum(tambahan, axis=1)
+        total_pasangan = {k: total_kumulatif[:, k - 1] for k in k_values}
+    else:
+        total_pasangan = {k: _jumlah_kemiripan_agregasi(top[:, :k], matriks_item) for k in k_values}
+
+    hasil = {}
+    for k in k_values:
+        pasangan = jumlah_item[:, k - 1] * (jumlah_item[:, k - 1] - 1) / 2
+        hasil[k] = np.divide(total_pasangan[k], pasangan, out=np.full(len(top), np.nan), where=pasangan > 0)
+    return hasil
+
+def hitung_metrik(rekomendasi: np.ndarray, relevan: np.ndarray, jumlah_relevan: np.ndarray, k_values,
+                  jumlah_program: int = None, matriks_item=None) -> dict:
+    """
+    Rata-rata seluruh metrik untuk setiap K: {k: {metrik: nilai}}.
+    Coverage dihitung jika `jumlah_program` diberikan, intra-list similarity (ILS) jika `matriks_item` diberikan.
+    """
+    per_pengguna = metrik_per_pengguna(rekomendasi, relevan, jumlah_relevan, k_values)
+    ils = kemiripan_intra_list(rekomendasi, k_values, matriks_item) if matriks_item is not None and len(rekomendasi) else None
+    hasil = {}
+    for k, nilai in per_pengguna.items():
+        hasil[k] = {metrik: float(np.mean(array)) if len(array) else 0.0 for metrik, array in nilai.items()}
+        if jumlah_program is not None:
+            hasil[k]['coverage'] = cakupan_katalog(rekomendasi, k, jumlah_program)
+        if matriks_item is not None:
+            # ILS tidak terdefinisi untuk daftar < 2 item (misalnya K=1)
+            hasil[k]['ils'] = float(np.nanmean(ils[k])) if ils is not None and np.any(~np.isnan(ils[k])) else float('nan')
+    return hasil
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, vstack
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from artefak_model import ATRIBUT_INDEKS, ModelArtefak
+from indeks_ann import tetapkan_cluster
+from recommender_engine import IndeksKatalog, bangun_indeks_katalog
+from vektorisasi import hitung_idf
+
+# --- Konfigurasi Pembaruan Inkremental ---
+KOLOM_ID = 'ID Program'
+KOLOM_FITUR = 'fitur_gabungan_program'
+AMBANG_DRIFT_IDF = 0.05 # Drift IDF relatif (L1) maksimum sebelum model harus dilatih ulang penuh
+
+def drift_idf(idf_aktif: np.ndarray, idf_baru: np.ndarray) -> float:
+    """Perubahan relatif (norma L1) antara IDF yang dipakai matriks dan IDF dari statistik terbaru."""
+    return float(np.abs(idf_baru - idf_aktif).sum() / max(np.abs(idf_aktif).sum(), 1e-12))
+
+def perbarui_model(model: ModelArtefak, df_berubah: pd.DataFrame, id_dihapus=(), ambang_drift: float = AMBANG_DRIFT_IDF,
+                   dokumen_kuesioner=()):
+    """
+    Menerapkan program baru/berubah (`df_berubah`) dan program terhapus (`id_dihapus`) ke model
+    tanpa melatih ulang. Hanya dokumen yang berubah yang divektorisasi; baris lain dipakai apa adanya.
+    Term baru ditambahkan sebagai kolom baru. IDF lama tetap dipakai selama drift-nya <= `ambang_drift`.
+    `dokumen_kuesioner` adalah string fitur kuesioner yang ikut korpus fitting: frekuensi dokumen term
+    baru ikut menghitungnya, sehingga IDF term baru dan drift sama dengan hasil refit penuh.
+    Yang dihemat hanya fitting vectorizer dan vektorisasi dokumen yang tidak berubah. Menyusun ulang
+    matriks, df_prog dan RekamanProgram, IndeksKatalog (indeks terbalik dan matriks aturan), penetapan
+    cluster ANN, dan penulisan artefak tetap sebanding dengan ukuran katalog.
+    Mengembalikan (model_baru, drift); model_baru None jika perlu refit penuh.
+    """
+    if model.frekuensi_dokumen is None or KOLOM_ID not in model.df_prog.columns:
+        return None, None
+    if not isinstance(model.tfidf_vectorizer, TfidfVectorizer): # Mode hashing selalu dilatih ulang penuh
+        return None, None
+
+    vectorizer = model.tfidf_vectorizer
+    analyzer = vectorizer.build_analyzer()
+    matriks_lama = model.tfidf_matrix_prog
+    posisi = {id_program: i for i, id_program in enumerate(model.df_prog[KOLOM_ID].tolist())}
+    id_berubah = df_berubah[KOLOM_ID].tolist()
+    baris_diganti = {posisi[id_program]: j for j, id_program in enumerate(id_berubah) if id_program in posisi}
+    baris_dihapus = {posisi[id_program] for id_program in id_dihapus if id_program in posisi}
+
+    # 1. Perbarui frekuensi dokumen: kurangi dokumen lama, tambahkan dokumen baru
+    frekuensi = np.array(model.frekuensi_dokumen, dtype=np.int64)
+    for baris in list(baris_diganti) + list(baris_dihapus):
+        frekuensi[matriks_lama.indices[matriks_lama.indptr[baris]:matriks_lama.indptr[baris + 1]]] -= 1
+    jumlah_dokumen = model.jumlah_dokumen - len(baris_diganti) - len(baris_dihapus)
+
+    vocabulary = dict(vectorizer.vocabulary_)
+    kolom_baru = []
+    for teks in df_berubah[KOLOM_FITUR].tolist():
+        for term in set(analyzer(teks)):
+            if term not in vocabulary:
+                vocabulary[term] = len(vocabulary)
+            kolom_baru.append(vocabulary[term])
+    # Frekuensi term lama dari kuesioner sudah tercatat saat fitting; term baru belum
+    jumlah_term_lama = len(vectorizer.vocabulary_)
+    if len(vocabulary) > jumlah_term_lama:
+        for teks in dokumen_kuesioner:
+            for term in set(analyzer(teks)):
+                kolom = vocabulary.get(term)
+                if kolom is not None and kolom >= jumlah_term_lama:
+                    kolom_baru.append(kolom)
+    frekuensi = np.concatenate([frekuensi, np.zeros(len(vocabulary) - len(frekuensi), dtype=np.int64)])
+    np.add.at(frekuensi, np.array(kolom_baru, dtype=np.int64), 1)
+    jumlah_dokumen += len(df_berubah)
+
+    # 2. Ukur drift: term baru langsung memakai IDF terbarunya, term lama tetap memakai IDF aktif
+    idf_baru = hitung_idf(frekuensi, jumlah_dokumen, vectorizer.smooth_idf)
+    idf_aktif = np.concatenate([np.asarray(vectorizer.idf_), idf_baru[len(vectorizer.idf_):]])
+    drift = drift_idf(idf_aktif, idf_baru)
+    if drift > ambang_drift:
+        return None, drift
+
+    vectorizer_baru = TfidfVectorizer(**vectorizer.get_params())
+    vectorizer_baru.vocabulary_ = vocabulary
+    vectorizer_baru.idf_ = idf_aktif
+    # Hanya ada penghapusan: transform() menolak input kosong
+    matriks_berubah = (vectorizer_baru.transform(df_berubah[KOLOM_FITUR].tolist()) if len(df_berubah)
+                       else csr_matrix((0, len(vocabulary))))
+
+    # 3. Susun urutan baris: baris lama tetap di tempatnya (diganti jika berubah), program baru di akhir
+    jumlah_lama = matriks_lama.shape[0]
+    urutan = []
+    for baris in range(jumlah_lama):
+        if baris in baris_dihapus:
+            continue
+        urutan.append(jumlah_lama + baris_diganti[baris] if baris in baris_diganti else baris)
+    urutan.extend(jumlah_lama + j for j, id_program in enumerate(id_berubah) if id_program not in posisi)
+    urutan = np.array(urutan, dtype=np.int64)
+
+    # Kolom matriks lama cukup dilebarkan (tanpa salinan) agar sejajar dengan vocabulary baru
+    matriks_lebar = csr_matrix((matriks_lama.data, matriks_lama.indices, matriks_lama.indptr),
+                               shape=(jumlah_lama, len(vocabulary)))
+    matriks_baru = vstack([matriks_lebar, matriks_berubah], format='csr')[urutan]
+
+    df_prog_baru = pd.concat([model.df_prog, df_berubah], ignore_index=True).fillna('')
+    df_prog_baru = df_prog_baru.iloc[urutan].reset_index(drop=True)
+
+    # Atribut hanya dihitung untuk program yang berubah; indeks terbalik dibangun ulang dari array
+    indeks_berubah = bangun_indeks_katalog(df_berubah)
+    atribut_baru = [np.concatenate([getattr(model.indeks_katalog, atribut), getattr(indeks_berubah, atribut)])[urutan]
+                    for atribut in ATRIBUT_INDEKS]
+    indeks_katalog = IndeksKatalog(len(urutan), *atribut_baru)
+
+    # Sentroid ANN tidak dilatih ulang; program cukup ditetapkan ulang ke cluster terdekat
+    indeks_ann = None
+    if model.indeks_ann is not None:
+        indeks_ann = tetapkan_cluster(np.asarray(model.indeks_ann.sentroid), matriks_baru, model.indeks_ann.n_probe)
+
+    model_baru = ModelArtefak(df_prog_baru, vectorizer_baru, matriks_baru, indeks_katalog, model.versi_katalog,
+                              frekuensi_dokumen=frekuensi, jumlah_dokumen=jumlah_dokumen,
+                              tanda_kuesioner=model.tanda_kuesioner, indeks_ann=indeks_ann,
+                              konfigurasi=model.konfigurasi)
+    return model_baru, drift
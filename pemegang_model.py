@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+
+
+class PemegangModel:
+    """
+    Menyimpan model aktif (ModelArtefak) dan menggantinya secara atomik.
+    - Pembaca cukup mengambil `pemegang.model` sekali per permintaan; objek itu tidak pernah diubah.
+    - Pemuatan bersifat single-flight: pemanggil yang datang saat pemuatan berjalan menunggu hasil yang sama.
+      Pemanggil `paksa` yang datang saat itu mengantrekan satu pemuatan paksa lagi setelah yang berjalan.
+    - Thread latar belakang memeriksa versi katalog secara berkala dan memuat ulang bila berubah.
+    Single-flight ini hanya berlaku di dalam satu proses; antar worker WSGI, `fungsi_muat` (app.load_model)
+    membangun di bawah kunci file artefak sehingga hanya satu worker yang melatih dan sisanya memory-map hasilnya.
+    """
+    def __init__(self, fungsi_muat, fungsi_versi, interval_cek: float = 30, saat_ganti=None):
+        self._fungsi_muat = fungsi_muat # versi_katalog -> ModelArtefak atau None
+        self._fungsi_versi = fungsi_versi # () -> versi katalog saat ini (harus murah)
+        self._saat_ganti = saat_ganti # Dipanggil setelah model baru dipasang
+        self.interval_cek = interval_cek
+        self.model = None
+        self._lock = threading.Lock()
+        self._sedang_muat = None # threading.Event milik pemuatan yang sedang berjalan
+        self._paksa_tertunda = False # Pemuatan paksa diminta saat pemuatan lain sedang berjalan
+        self._thread = None
+        self._pid_thread = None
+        self.jumlah_muat = 0
+        self.galat_terakhir = None
+
+    def muat(self, paksa: bool = False):
+        """
+        Memuat model jika versi katalog berubah (atau `paksa`). Mengembalikan model aktif.
+        Hanya satu pemuatan yang berjalan; pemanggil lain menunggu dan memakai hasilnya. Jika `paksa`
+        datang saat pemuatan berjalan, satu pemuatan paksa lagi dijalankan sesudahnya sebelum pemanggil kembali.
+        """
+        with self._lock:
+            penanda = self._sedang_muat
+            pemimpin = penanda is None
+            if pemimpin:
+                penanda = self._sedang_muat = threading.Event()
+            elif paksa:
+                self._paksa_tertunda = True
+        if not pemimpin:
+            penanda.wait()
+            return self.model
+
+        selesai = False
+        try:
+            while not selesai:
+                self._muat_sekali(paksa)
+                with self._lock:
+                    paksa, self._paksa_tertunda = self._paksa_tertunda, False
+                    selesai = not paksa
+                    if selesai:
+                        self._sedang_muat = None # Dilepas di bawah lock yang sama agar permintaan paksa tidak hilang
+        finally:
+            if not selesai:
+                with self._lock:
+                    self._sedang_muat = None
+                    self._paksa_tertunda = False
+            penanda.set()
+        return self.model
+
+    def _muat_sekali(self, paksa: bool):
+        try:
+            versi_katalog = self._fungsi_versi()
+            model_lama = self.model
+            if paksa or model_lama is None or model_lama.versi_katalog != versi_katalog:
+                model_baru = self._fungsi_muat(versi_katalog)
+                if model_baru is not None: # Gagal memuat: model lama tetap dipakai
+                    self.model = model_baru # Pertukaran pointer tunggal, atomik bagi pembaca
+                    self.jumlah_muat += 1
+                    if self._saat_ganti is not None:
+                        self._saat_ganti(model_baru)
+            self.galat_terakhir = None
+        except Exception as e:
+            self.galat_terakhir = str(e)
+            print(f"Error saat memuat model: {e}")
+
+    def pastikan_termuat(self):
+        """Mengembalikan model aktif; memuat secara sinkron (single-flight) hanya jika belum ada sama sekali."""
+        model = self.model
+        if model is not None:
+            return model
+        return self.muat()
+
+    def mulai_pemantauan(self):
+        """Menjalankan thread pemantau versi katalog (sekali per proses, aman dipanggil berulang)."""
+        if self.interval_cek <= 0:
+            return
+        with self._lock:
+            # Thread tidak ikut ter-fork, jadi setiap worker WSGI menjalankan pemantaunya sendiri
+            if self._thread is not None and self._pid_thread == os.getpid():
+                return
+            self._pid_thread = os.getpid()
+            self._thread = threading.Thread(target=self._pantau, name='pemantau-katalog', daemon=True)
+            self._thread.start()
+
+    def _pantau(self):
+        while True:
+            self.muat()
+            time.sleep(self.interval_cek)
+
+    def statistik(self) -> dict:
+        model = self.model
+        return {
+            'catalog_version': model.versi_katalog if model is not None else None,
+            'loads': self.jumlah_muat,
+            'loading': self._sedang_muat is not None,
+            'check_interval_seconds': self.interval_cek,
+            'last_error': self.galat_terakhir,
+        }
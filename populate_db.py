@@ -1,11 +1,14 @@
+import hashlib
+import json
 import pandas as pd
-from pymongo import MongoClient
+from pymongo import MongoClient, ReplaceOne
 import os
 
 # Konfigurasi MongoDB
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
 DB_NAME = "cbf_program_db"
 PROGRAM_COLLECTION_NAME = "programs"
+KATALOG_META_COLLECTION_NAME = "katalog_meta" # Penghitung revisi katalog, dibaca app.py untuk hot-reload
 
 # Path ke dataset program latihan
 PROGRAM_CSV_PATH = 'data/data_latihan.csv' # Menggunakan data_latihan.csv sebagai sumber utama
@@ -30,6 +33,30 @@ def tambah_kata_kunci_untuk_fitur(jenis_latihan_input_str):
             if jenis: combined_keywords.append(jenis)
     return ' '.join(list(set(filter(None, combined_keywords))))
 
+def hitung_hash_dokumen(row):
+    """Hash isi satu program; app.py membandingkannya untuk memperbarui model TF-IDF hanya pada program yang berubah."""
+    isi = json.dumps({kolom: str(nilai) for kolom, nilai in row.items()}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(isi.encode('utf-8')).hexdigest()
+
+def bangun_fitur_program(df_prog):
+    """Menambahkan kolom 'Jenis Latihan Program Keywords' dan 'fitur_gabungan_program' (in-place) dari kolom CSV program."""
+    # Gunakan fungsi tambah_kata_kunci_untuk_fitur untuk memperkaya Jenis Latihan Program
+    df_prog['Jenis Latihan Program Keywords'] = df_prog['Jenis Latihan Program'].apply(tambah_kata_kunci_untuk_fitur)
+    df_prog['fitur_gabungan_program'] = (
+        df_prog['Nama Program Latihan'].astype(str).str.lower() + ' ' +         # Sesuai urutan CSV (Kolom 2)
+        df_prog['Deskripsi Program'].astype(str).str.lower() + ' ' +            # Sesuai urutan CSV (Kolom 3)
+        df_prog['Jenis Latihan Program Keywords'] + ' ' +                   # Diolah dari 'Jenis Latihan Program' (Kolom 4 CSV), sudah lowercase
+        df_prog['Tujuan Latihan'].astype(str).str.lower() + ' ' +               # Sesuai urutan CSV (Kolom 5)
+        df_prog['Durasi Program (menit)'].astype(str).str.lower() + ' ' +       # Kolom 6
+        df_prog['Tempat Program'].astype(str).str.lower() + ' ' +               # Kolom 7
+        df_prog['Peralatan Program (Ya/Tidak)'].astype(str).str.lower() + ' ' + # Kolom 8
+        df_prog['Tingkat Kebugaran Program'].astype(str).str.lower() + ' ' +     # Kolom 9
+        df_prog['Waktu Ideal Program'].astype(str).str.lower() + ' ' +          # Kolom 10
+        df_prog['Target Gender'].astype(str).str.lower() + ' ' +                # Kolom 12
+        df_prog['Rentang Usia'].astype(str).str.lower()                         # Kolom 13 (Baru)
+    ).str.strip() # Hapus spasi berlebih di awal/akhir
+    return df_prog
+
 def main():
     print(f"Mencoba memuat data program dari: {PROGRAM_CSV_PATH}")
     if not os.path.exists(PROGRAM_CSV_PATH):
@@ -48,24 +75,11 @@ def main():
     df_prog.fillna('', inplace=True)
 
     print("Membuat 'fitur_gabungan_program' agar konsisten dengan cbf_rekomendasi.py...")
-    # Gunakan fungsi tambah_kata_kunci_untuk_fitur untuk memperkaya Jenis Latihan Program
-    df_prog['Jenis Latihan Program Keywords'] = df_prog['Jenis Latihan Program'].apply(tambah_kata_kunci_untuk_fitur)
-    df_prog['fitur_gabungan_program'] = (
-        df_prog['Nama Program Latihan'].astype(str).str.lower() + ' ' +         # Sesuai urutan CSV (Kolom 2)
-        df_prog['Deskripsi Program'].astype(str).str.lower() + ' ' +            # Sesuai urutan CSV (Kolom 3)
-        df_prog['Jenis Latihan Program Keywords'] + ' ' +                   # Diolah dari 'Jenis Latihan Program' (Kolom 4 CSV), sudah lowercase
-        df_prog['Tujuan Latihan'].astype(str).str.lower() + ' ' +               # Sesuai urutan CSV (Kolom 5)
-        df_prog['Durasi Program (menit)'].astype(str).str.lower() + ' ' +       # Kolom 6
-        df_prog['Tempat Program'].astype(str).str.lower() + ' ' +               # Kolom 7
-        df_prog['Peralatan Program (Ya/Tidak)'].astype(str).str.lower() + ' ' + # Kolom 8
-        df_prog['Tingkat Kebugaran Program'].astype(str).str.lower() + ' ' +     # Kolom 9
-        df_prog['Waktu Ideal Program'].astype(str).str.lower() + ' ' +          # Kolom 10
-        df_prog['Target Gender'].astype(str).str.lower() + ' ' +                # Kolom 12
-        df_prog['Rentang Usia'].astype(str).str.lower()                         # Kolom 13 (Baru)
-    ).str.strip() # Hapus spasi berlebih di awal/akhir
+    bangun_fitur_program(df_prog)
     print("'fitur_gabungan_program' telah dibuat.")
     print("Contoh fitur_gabungan_program:")
     print(df_prog['fitur_gabungan_program'].head())
+    df_prog['hash_dokumen'] = df_prog.apply(hitung_hash_dokumen, axis=1)
 
 
     # Menghubungkan ke MongoDB
@@ -77,16 +91,28 @@ def main():
         print(f"Error menghubungkan ke MongoDB: {e}")
         return
 
-    # Menghapus data lama (jika ada) dan memasukkan data baru
+    # Sinkronkan koleksi dengan CSV: hanya program yang baru/berubah yang ditulis, program yang hilang dihapus
     try:
-        programs_collection.delete_many({})
-        print("Data lama di koleksi program berhasil dihapus.")
-        
         # Mengubah DataFrame ke format dictionary untuk dimasukkan ke MongoDB
         programs_dict = df_prog.to_dict(orient='records')
         if programs_dict:
-            programs_collection.insert_many(programs_dict)
-            print(f"{len(programs_dict)} data program berhasil dimasukkan ke MongoDB.")
+            hash_lama = {
+                doc.get('ID Program'): doc.get('hash_dokumen')
+                for doc in programs_collection.find({}, projection={'_id': 0, 'ID Program': 1, 'hash_dokumen': 1})
+            }
+            operasi = [
+                ReplaceOne({'ID Program': doc['ID Program']}, doc, upsert=True)
+                for doc in programs_dict if hash_lama.get(doc['ID Program']) != doc['hash_dokumen']
+            ]
+            hasil_hapus = programs_collection.delete_many({'ID Program': {'$nin': [doc['ID Program'] for doc in programs_dict]}})
+            if operasi:
+                programs_collection.bulk_write(operasi, ordered=False)
+            print(f"{len(operasi)} data program baru/berubah ditulis, {hasil_hapus.deleted_count} data lama dihapus "
+                  f"({len(programs_dict) - len(operasi)} tidak berubah).")
+            if operasi or hasil_hapus.deleted_count:
+                db[KATALOG_META_COLLECTION_NAME].update_one(
+                    {'_id': PROGRAM_COLLECTION_NAME}, {'$inc': {'revisi': 1}}, upsert=True
+                )
         else:
             print("Tidak ada data program untuk dimasukkan ke MongoDB.")
 
@@ -1,10 +1,15 @@
+from functools import lru_cache
+import time
+import numpy as np
 import pandas as pd
+from scipy.sparse import csr_matrix, hstack
 from sklearn.metrics.pairwise import cosine_similarity
 import re
 
 # --- KONFIGURASI MODEL REKOMENDASI ---
 # Pindahkan parameter ke sini agar mudah disesuaikan
 CANDIDATE_POOL_SIZE = 450  # Jumlah kandidat awal yang akan dipertimbangkan
+UKURAN_BLOK_SKOR = 2 ** 22 # Elemen maksimum matriks skor padat (profil x program) per blok batch; float64 = 32 MB
 # Penalti & Bonus
 PENALTI_TIDAK_COCOK = 0.25 # Penalti jika tempat tidak cocok
 BONUS_SANGAT_COCOK = 0.1   # Bonus jika kriteria (tempat, level, dll) sangat cocok
@@ -16,10 +21,66 @@ BONUS_JENIS_LATIHAN_COCOK = 0.15  # Bonus jika jenis latihan yang disukai cocok
 BONUS_USIA_COCOK = 0.10           # Bonus jika usia pengguna masuk dalam rentang
 PENALTI_USIA_TIDAK_COCOK = 0.20   # Penalti jika usia pengguna di luar rentang
 
-def _parse_age_range(age_range_str: str):
+# --- Instrumentasi Tahap (opsional) ---
+# Callback `pengamat(tahap, durasi_detik, jumlah_kandidat)` dipanggil setelah setiap tahap pipeline
+# (lihat instrumentasi.py). Tanpa pengamat, biayanya hanya satu pengecekan None per tahap.
+_pengamat_tahap = None
+
+def pasang_pengamat_tahap(pengamat):
+    """Memasang callback instrumentasi tahap untuk seluruh proses; None untuk mematikan."""
+    global _pengamat_tahap
+    _pengamat_tahap = pengamat
+
+def _lapor_tahap(pengamat, tahap: str, mulai: float, jumlah_kandidat: int) -> float:
+    """Melaporkan durasi tahap sejak `mulai` dan mengembalikan waktu mulai tahap berikutnya."""
+    sekarang = time.perf_counter()
+    pengamat(tahap, sekarang - mulai, jumlah_kandidat)
+    return sekarang
+
+# Kata kunci ternormalisasi per atribut program. Posisi di dalam tuple = posisi bit
+# pada kode atribut yang dibangun oleh `bangun_indeks_katalog`.
+KATA_KUNCI_KEBUGARAN = ('pemula', 'menengah', 'lanjut')
+KATA_KUNCI_TEMPAT = ('rumah', 'gym', 'outdoor')
+KATA_KUNCI_GENDER = ('laki-laki', 'wanita')
+KATA_KUNCI_TUJUAN = ('menurunkan berat badan', 'meningkatkan massa otot', 'menjaga kesehatan')
+KATA_KUNCI_JENIS_LATIHAN = ('kardio', 'kekuatan', 'hiit')
+
+KATA_KUNCI_ATRIBUT = {
+    'kebugaran': KATA_KUNCI_KEBUGARAN,
+    'tempat': KATA_KUNCI_TEMPAT,
+    'gender': KATA_KUNCI_GENDER,
+    'tujuan': KATA_KUNCI_TUJUAN,
+    'jenis_latihan': KATA_KUNCI_JENIS_LATIHAN,
+}
+
+# --- Aturan Bonus & Penalti (Pass 2) ---
+# Setiap aturan: (atribut profil, atribut program, jenis kecocokan, bobot). Aturan dikompilasi sekali
+# per katalog menjadi matriks indikator sparse program x fitur (`MatriksAturan`); saat re-ranking,
+# seluruh bonus/penalti kandidat cukup satu perkalian matriks-vektor dengan vektor bobot profil.
+# Jenis kecocokan:
+# - 'mengandung' / 'tidak_mengandung': atribut program (mengandung / tidak mengandung) kata kunci profil
+# - 'dalam_rentang' / 'luar_rentang': usia profil (di dalam / di luar) rentang usia program
+# Aturan hanya berlaku untuk program yang atributnya terdefinisi (gender bukan 'semua', rentang usia valid).
+JENIS_KECOCOKAN = ('mengandung', 'tidak_mengandung', 'dalam_rentang', 'luar_rentang')
+ATURAN_SKOR = (
+    ('kebugaran', 'kebugaran', 'mengandung', BONUS_SANGAT_COCOK),
+    ('gender', 'gender', 'mengandung', BONUS_GENDER_COCOK),
+    ('gender', 'gender', 'tidak_mengandung', -PENALTI_GENDER_TIDAK_COCOK),
+    ('tujuan', 'tujuan', 'mengandung', BONUS_TUJUAN_COCOK),
+    ('jenis_latihan', 'jenis_latihan', 'mengandung', BONUS_JENIS_LATIHAN_COCOK),
+    ('usia', 'usia', 'dalam_rentang', BONUS_USIA_COCOK),
+    ('usia', 'usia', 'luar_rentang', -PENALTI_USIA_TIDAK_COCOK),
+)
+
+# Kombinasi rentang usia (min, max) yang diterima hard filter usia untuk pengguna 18-35 tahun
+RENTANG_USIA_DEWASA_MUDA = ((18, 25), (26, 35), (18, 35))
+
+@lru_cache(maxsize=1024)
+def parse_age_range(age_range_str: str):
     """
     Mem-parsing string rentang usia seperti '18-25 Tahun' menjadi (min_age, max_age).
     Mengembalikan (None, None) jika parsing gagal.
+    Hasil di-cache per string karena katalog hanya memiliki sedikit variasi rentang usia.
     """
     if not age_range_str or not isinstance(age_range_str, str):
         return None, None
@@ -36,32 +97,179 @@ def _parse_age_range(age_range_str: str):
         except ValueError:
             return None, None
     return None, None
-def dapatkan_rekomendasi(
-    profil_pengguna_string: str,
-    profil_pengguna_dict: dict,
-    df_latihan: pd.DataFrame,
-    tfidf_vectorizer,
-    tfidf_matrix_latihan,
-    final_top_n: int = 10) -> pd.DataFrame:
+
+class IndeksKatalog:
     """
-    Fungsi rekomendasi terpusat yang disempurnakan.
-    Menerima data dan model sebagai argumen untuk fleksibilitas.
-    Menggunakan hard filter untuk tingkat kebugaran.
+    Atribut program dalam bentuk array NumPy yang sejajar dengan baris `df_latihan`.
+    Setiap atribut kategorikal disimpan sebagai bitmask (bit ke-i = kata kunci ke-i
+    muncul di nilai atribut), sehingga bonus/penalti cukup dihitung dengan mask.
+    `indeks_terbalik` memetakan (atribut, nilai) ke array ID baris yang terurut,
+    dipakai untuk menjalankan hard filter sebelum skor kemiripan dihitung.
     """
-    tfidf_matrix_pengguna = tfidf_vectorizer.transform([profil_pengguna_string])
-    cosine_similarities = cosine_similarity(tfidf_matrix_pengguna, tfidf_matrix_latihan).flatten()
+    def __init__(self, jumlah_program, kebugaran, kebugaran_persis, tempat, gender, gender_netral,
+                 tujuan, jenis_latihan, usia_min, usia_max, indeks_terbalik=None):
+        self.jumlah_program = jumlah_program
+        self.kebugaran = kebugaran
+        self.kebugaran_persis = kebugaran_persis # int8, posisi di KATA_KUNCI_KEBUGARAN atau -1
+        self.tempat = tempat
+        self.gender = gender
+        self.gender_netral = gender_netral # True jika gender kosong atau 'semua'
+        self.tujuan = tujuan
+        self.jenis_latihan = jenis_latihan
+        self.usia_min = usia_min # int16, -1 jika rentang usia tidak bisa di-parsing
+        self.usia_max = usia_max
+        if indeks_terbalik is None: # Bisa diberikan dari artefak model agar tidak dibangun ulang
+            indeks_terbalik = _bangun_indeks_terbalik(self)
+        self.indeks_terbalik = indeks_terbalik
+        self.rentang_usia = sorted(nilai for atribut, nilai in indeks_terbalik if atribut == 'usia')
+        self.matriks_aturan = kompilasi_aturan(self)
 
-    # --- Pass 1: Candidate Generation (Menjaring Kandidat) ---
-    pool_size = CANDIDATE_POOL_SIZE
-    if len(cosine_similarities) < pool_size:
-        pool_size = len(cosine_similarities)
-    top_candidate_indices = cosine_similarities.argsort()[-pool_size:][::-1]
+class MatriksAturan:
+    """
+    Hasil kompilasi ATURAN_SKOR untuk satu katalog: `matriks` (CSR float64, program x fitur) bernilai 1
+    jika fitur aktif untuk program tersebut. Setiap aturan menempati blok kolom `kolom_aturan[i]`
+    = (offset, nilai kolom), satu kolom per kata kunci atau per rentang usia di katalog.
+    """
+    def __init__(self, matriks, aturan, kolom_aturan):
+        self.matriks = matriks
+        self.aturan = aturan
+        self.kolom_aturan = kolom_aturan
 
-    df_latihan_temp = df_latihan.iloc[top_candidate_indices].copy()
-    df_latihan_temp['original_similarity'] = cosine_similarities[top_candidate_indices]
-    df_latihan_temp['adjusted_similarity'] = cosine_similarities[top_candidate_indices]
+    def vektor_bobot(self, preferensi: dict, bobot=None) -> np.ndarray:
+        """
+        Vektor bobot fitur untuk satu profil. `bobot` (opsional) menggantikan bobot ATURAN_SKOR
+        dengan urutan yang sama, misalnya untuk sweep hyperparameter.
+        """
+        vektor = np.zeros(self.matriks.shape[1])
+        for i, ((atribut_profil, _, jenis, bobot_aturan), (offset, nilai_kolom)) in enumerate(zip(self.aturan, self.kolom_aturan)):
+            nilai = preferensi[atribut_profil]
+            if nilai is None or nilai == '': # Preferensi tidak dikenali: aturan dilewati
+                continue
+            bobot_aturan = bobot_aturan if bobot is None else bobot[i]
+            if jenis in ('mengandung', 'tidak_mengandung'):
+                if nilai in nilai_kolom:
+                    vektor[offset + nilai_kolom.index(nilai)] = bobot_aturan
+            else:
+                for j, rentang in enumerate(nilai_kolom):
+                    if _usia_cocok(rentang, nilai) == (jenis == 'dalam_rentang'):
+                        vektor[offset + j] = bobot_aturan
+        return vektor
 
-    # --- Pass 2: Re-ranking (Bonus & Penalti) ---
+    def skor(self, indeks_baris: np.ndarray, preferensi: dict, bobot=None) -> np.ndarray:
+        """Total bonus/penalti untuk baris program `indeks_baris`."""
+        return self.matriks[indeks_baris] @ self.vektor_bobot(preferensi, bobot)
+
+def _usia_cocok(rentang: tuple, usia: int) -> bool:
+    """Usia cocok jika masuk rentang program; rentang 18-35 dianggap cocok untuk semua usia."""
+    min_usia, max_usia = rentang
+    return (min_usia == 18 and max_usia == 35) or (min_usia <= usia <= max_usia)
+
+def kompilasi_aturan(indeks_katalog, aturan=ATURAN_SKOR) -> MatriksAturan:
+    """Mengompilasi aturan bonus/penalti menjadi matriks indikator sparse (dipanggil sekali per katalog)."""
+    blok, kolom_aturan, offset = [], [], 0
+    for atribut_profil, atribut_program, jenis, _ in aturan:
+        if jenis in ('mengandung', 'tidak_mengandung'):
+            nilai_kolom = KATA_KUNCI_ATRIBUT[atribut_program]
+            kode = getattr(indeks_katalog, atribut_program)
+            indikator = [_mask_kata_kunci(kode, nilai_kolom, keyword) for keyword in nilai_kolom]
+            if jenis == 'tidak_mengandung':
+                indikator = [~mask for mask in indikator]
+            terdefinisi = ~indeks_katalog.gender_netral if atribut_program == 'gender' else None
+        elif jenis in ('dalam_rentang', 'luar_rentang'):
+            nilai_kolom = tuple(indeks_katalog.rentang_usia)
+            indikator = [(indeks_katalog.usia_min == min_usia) & (indeks_katalog.usia_max == max_usia)
+                         for min_usia, max_usia in nilai_kolom]
+            terdefinisi = None # Program dengan rentang usia tidak valid tidak masuk kolom mana pun
+        else:
+            raise ValueError(f"Jenis kecocokan tidak dikenal: '{jenis}' (pilihan: {', '.join(JENIS_KECOCOKAN)})")
+        if terdefinisi is not None:
+            indikator = [mask & terdefinisi for mask in indikator]
+        if indikator:
+            blok.append(csr_matrix(np.column_stack(indikator), dtype=np.float64))
+        kolom_aturan.append((offset, nilai_kolom))
+        offset += len(nilai_kolom)
+    matriks = hstack(blok, format='csr') if blok else csr_matrix((indeks_katalog.jumlah_program, 0))
+    return MatriksAturan(matriks, aturan, kolom_aturan)
+
+def _bangun_indeks_terbalik(indeks_katalog):
+    """
+    Membangun indeks terbalik untuk atribut hard filter (Pass 2.5-5).
+    Mengembalikan dict (atribut, nilai) -> array ID baris; kunci usia berupa rentang (min, max).
+    """
+    indeks_terbalik = {}
+    for posisi, keyword in enumerate(KATA_KUNCI_KEBUGARAN):
+        indeks_terbalik[('kebugaran', keyword)] = np.flatnonzero(indeks_katalog.kebugaran_persis == posisi)
+    for keyword in KATA_KUNCI_TEMPAT:
+        indeks_terbalik[('tempat', keyword)] = np.flatnonzero(_mask_kata_kunci(indeks_katalog.tempat, KATA_KUNCI_TEMPAT, keyword))
+    for keyword in KATA_KUNCI_JENIS_LATIHAN:
+        indeks_terbalik[('jenis_latihan', keyword)] = np.flatnonzero(
+            _mask_kata_kunci(indeks_katalog.jenis_latihan, KATA_KUNCI_JENIS_LATIHAN, keyword)
+        )
+
+    usia_valid = indeks_katalog.usia_min >= 0
+    rentang_usia = sorted(set(zip(indeks_katalog.usia_min[usia_valid].tolist(), indeks_katalog.usia_max[usia_valid].tolist())))
+    for min_usia, max_usia in rentang_usia:
+        indeks_terbalik[('usia', (min_usia, max_usia))] = np.flatnonzero(
+            (indeks_katalog.usia_min == min_usia) & (indeks_katalog.usia_max == max_usia)
+        )
+    return indeks_terbalik
+
+def _kolom_lower(df_latihan: pd.DataFrame, kolom: str) -> list:
+    """Mengambil kolom sebagai list string lowercase, sama seperti str(row.get(...)).lower()."""
+    if kolom not in df_latihan.columns:
+        return [''] * len(df_latihan)
+    return [str(nilai).lower() for nilai in df_latihan[kolom].tolist()]
+
+def _kode_kata_kunci(nilai_list: list, kata_kunci: tuple) -> np.ndarray:
+    """Mengubah list string menjadi bitmask uint8 berdasarkan kata kunci yang dikandungnya."""
+    kode = np.zeros(len(nilai_list), dtype=np.uint8)
+    for bit, keyword in enumerate(kata_kunci):
+        cocok = np.fromiter((keyword in nilai for nilai in nilai_list), dtype=bool, count=len(nilai_list))
+        kode |= cocok.astype(np.uint8) << bit
+    return kode
+
+def _mask_kata_kunci(kode: np.ndarray, kata_kunci: tuple, keyword: str) -> np.ndarray:
+    """Mask boolean untuk baris yang atributnya mengandung `keyword`."""
+    return (kode & (1 << kata_kunci.index(keyword))) != 0
+
+def bangun_indeks_katalog(df_latihan: pd.DataFrame) -> IndeksKatalog:
+    """
+    Membangun IndeksKatalog dari DataFrame program. Dipanggil sekali saat katalog dimuat.
+    """
+    kebugaran = _kolom_lower(df_latihan, 'Tingkat Kebugaran Program')
+    gender = _kolom_lower(df_latihan, 'Target Gender')
+    rentang_usia = (
+        [str(nilai) for nilai in df_latihan['Rentang Usia'].tolist()]
+        if 'Rentang Usia' in df_latihan.columns else [''] * len(df_latihan)
+    )
+    batas_int16 = np.iinfo(np.int16).max
+    usia_min = np.full(len(df_latihan), -1, dtype=np.int16)
+    usia_max = np.full(len(df_latihan), -1, dtype=np.int16)
+    for i, rentang in enumerate(rentang_usia):
+        min_usia, max_usia = parse_age_range(rentang)
+        if min_usia is not None and max_usia is not None and max(min_usia, max_usia) <= batas_int16:
+            usia_min[i], usia_max[i] = min_usia, max_usia
+
+    return IndeksKatalog(
+        jumlah_program=len(df_latihan),
+        kebugaran=_kode_kata_kunci(kebugaran, KATA_KUNCI_KEBUGARAN),
+        kebugaran_persis=np.array(
+            [KATA_KUNCI_KEBUGARAN.index(k) if k in KATA_KUNCI_KEBUGARAN else -1 for k in kebugaran], dtype=np.int8
+        ),
+        tempat=_kode_kata_kunci(_kolom_lower(df_latihan, 'Tempat Program'), KATA_KUNCI_TEMPAT),
+        gender=_kode_kata_kunci(gender, KATA_KUNCI_GENDER),
+        gender_netral=np.array([not g or 'semua' in g for g in gender], dtype=bool),
+        tujuan=_kode_kata_kunci(_kolom_lower(df_latihan, 'Tujuan Latihan'), KATA_KUNCI_TUJUAN),
+        jenis_latihan=_kode_kata_kunci(_kolom_lower(df_latihan, 'Jenis Latihan Program'), KATA_KUNCI_JENIS_LATIHAN),
+        usia_min=usia_min,
+        usia_max=usia_max,
+    )
+
+def normalisasi_preferensi(profil_pengguna_dict: dict) -> dict:
+    """
+    Menormalisasi preferensi pengguna menjadi kata kunci yang sama dengan KATA_KUNCI_*.
+    String kosong berarti preferensi tidak dikenali (bonus/filter terkait dilewati).
+    """
     tempat_preferensi = profil_pengguna_dict.get('tempat', '').lower()
     kebugaran_preferensi = profil_pengguna_dict.get('pengalaman', '').lower() # FIX: Menggunakan kunci 'pengalaman' yang benar dari form
     gender_preferensi = profil_pengguna_dict.get('jenis_kelamin', '').lower()
@@ -73,7 +281,6 @@ def dapatkan_rekomendasi(
     except (ValueError, TypeError):
         usia_pengguna = None
 
-    # Normalisasi preferensi pengguna sekali saja untuk efisiensi
     user_kebugaran_keyword = ''
     if 'pemula' in kebugaran_preferensi: user_kebugaran_keyword = 'pemula'
     elif 'menengah' in kebugaran_preferensi: user_kebugaran_keyword = 'menengah'
@@ -102,87 +309,320 @@ def dapatkan_rekomendasi(
     elif 'latihan fisik' in jenis_latihan_preferensi or 'angkat beban' in jenis_latihan_preferensi: user_jenis_latihan_keyword = 'kekuatan'
     elif 'hiit' in jenis_latihan_preferensi: user_jenis_latihan_keyword = 'hiit'
 
-    for index, row in df_latihan_temp.iterrows():
-        program_tempat = str(row.get('Tempat Program', '')).lower()
-        program_kebugaran = str(row.get('Tingkat Kebugaran Program', '')).lower()
-        program_gender = str(row.get('Target Gender', '')).lower()
-        program_tujuan = str(row.get('Tujuan Latihan', '')).lower()
-        program_jenis_latihan = str(row.get('Jenis Latihan Program', '')).lower()
-        program_rentang_usia = str(row.get('Rentang Usia', ''))
-
-        # Bonus jika tingkat kebugaran cocok persis (penalti dihapus, akan di-handle oleh hard filter)
-        if user_kebugaran_keyword and user_kebugaran_keyword in program_kebugaran:
-            df_latihan_temp.loc[index, 'adjusted_similarity'] += BONUS_SANGAT_COCOK
-
-        # Penalti & Bonus Gender
-        if user_gender_keyword and program_gender and 'semua' not in program_gender:
-            if user_gender_keyword in program_gender:
-                df_latihan_temp.loc[index, 'adjusted_similarity'] += BONUS_GENDER_COCOK
-            else:
-                df_latihan_temp.loc[index, 'adjusted_similarity'] -= PENALTI_GENDER_TIDAK_COCOK
-
-        # Bonus Tujuan
-        if user_tujuan_keyword and user_tujuan_keyword in program_tujuan:
-            df_latihan_temp.loc[index, 'adjusted_similarity'] += BONUS_TUJUAN_COCOK
-
-        # Bonus Jenis Latihan
-        if user_jenis_latihan_keyword and user_jenis_latihan_keyword in program_jenis_latihan:
-            df_latihan_temp.loc[index, 'adjusted_similarity'] += BONUS_JENIS_LATIHAN_COCOK
-
-        # Penalti & Bonus Usia (BARU)
-        if usia_pengguna is not None and program_rentang_usia:
-            min_usia, max_usia = _parse_age_range(program_rentang_usia)
-            if min_usia is not None and max_usia is not None:
-                # FIX: Jika rentang usia program adalah 18-35, anggap cocok untuk semua (beri bonus)
-                if min_usia == 18 and max_usia == 35:
-                    df_latihan_temp.loc[index, 'adjusted_similarity'] += BONUS_USIA_COCOK
-                # Logika standar untuk rentang usia lainnya
-                elif min_usia <= usia_pengguna <= max_usia:
-                    df_latihan_temp.loc[index, 'adjusted_similarity'] += BONUS_USIA_COCOK
-                else:
-                    df_latihan_temp.loc[index, 'adjusted_similarity'] -= PENALTI_USIA_TIDAK_COCOK
+    return {
+        'kebugaran': user_kebugaran_keyword,
+        'tempat': user_tempat_keyword,
+        'gender': user_gender_keyword,
+        'tujuan': user_tujuan_keyword,
+        'jenis_latihan': user_jenis_latihan_keyword,
+        'usia': usia_pengguna,
+    }
+
+def _urutan_menurun(nilai: np.ndarray, indeks_baris: np.ndarray) -> np.ndarray:
+    """
+    Indeks pengurutan skor menurun. Skor yang sama (seri) diurutkan berdasarkan
+    ID baris program agar hasil tidak bergantung pada susunan kandidat.
+    """
+    return np.lexsort((indeks_baris, -nilai))
+
+def _top_k_menurun(nilai: np.ndarray, indeks_baris: np.ndarray, k: int) -> np.ndarray:
+    """
+    Posisi k skor tertinggi, terurut sama seperti `_urutan_menurun(...)[:k]`.
+    Memakai seleksi parsial (argpartition) sehingga hanya kandidat teratas yang diurutkan penuh.
+    """
+    if k >= len(nilai):
+        return _urutan_menurun(nilai, indeks_baris)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    batas = nilai[np.argpartition(-nilai, k - 1)[:k]].min()
+    # Semua skor yang seri dengan batas ikut diurutkan agar tie-break tetap berdasarkan ID baris
+    calon = np.flatnonzero(nilai >= batas)
+    return calon[_urutan_menurun(nilai[calon], indeks_baris[calon])][:k]
+
+def _baris_eligible(preferensi: dict, indeks_katalog: IndeksKatalog):
+    """
+    Menjalankan hard filter (Pass 2.5-5) lewat indeks terbalik sebelum penilaian.
+    Mengembalikan array ID baris program yang lolos (terurut), atau None jika tidak ada filter aktif.
+    """
+    daftar_baris = []
+    usia_pengguna = preferensi['usia']
 
     # --- Pass 2.5: Hard Filtering for Age Range (Custom Logic) ---
     if usia_pengguna is not None:
-        if 18 <= usia_pengguna <= 25:
-            def usia_match(rentang):
-                min_usia, max_usia = _parse_age_range(str(rentang))
-                return (
-                    (min_usia == 18 and max_usia == 25) or
-                    (min_usia == 26 and max_usia == 35) or
-                    (min_usia == 18 and max_usia == 35)
-                )
-            df_latihan_temp = df_latihan_temp[df_latihan_temp['Rentang Usia'].apply(usia_match)]
-        elif 26 <= usia_pengguna <= 35:
-            def usia_match(rentang):
-                min_usia, max_usia = _parse_age_range(str(rentang))
-                # Ambil program untuk 26-35, 18-35, dan juga 18-25 (jika ingin lebih inklusif)
-                return (
-                    (min_usia == 26 and max_usia == 35) or
-                    (min_usia == 18 and max_usia == 35) or
-                    (min_usia == 18 and max_usia == 25)
-                )
-            df_latihan_temp = df_latihan_temp[df_latihan_temp['Rentang Usia'].apply(usia_match)]
+        if 18 <= usia_pengguna <= 25 or 26 <= usia_pengguna <= 35:
+            # Untuk 18-25 dan 26-35: ambil program 18-25, 26-35, dan 18-35 (lebih inklusif)
+            rentang_lolos = RENTANG_USIA_DEWASA_MUDA
         else:
-            def usia_match(rentang):
-                min_usia, max_usia = _parse_age_range(str(rentang))
-                return min_usia is not None and max_usia is not None and min_usia <= usia_pengguna <= max_usia
-            df_latihan_temp = df_latihan_temp[df_latihan_temp['Rentang Usia'].apply(usia_match)]
+            rentang_lolos = [(min_usia, max_usia) for min_usia, max_usia in indeks_katalog.rentang_usia
+                             if min_usia <= usia_pengguna <= max_usia]
+        baris_usia = [indeks_katalog.indeks_terbalik.get(('usia', rentang), np.empty(0, dtype=np.intp)) for rentang in rentang_lolos]
+        # Setiap baris hanya punya satu rentang usia, jadi gabungannya cukup disambung lalu diurutkan
+        daftar_baris.append(np.sort(np.concatenate(baris_usia)) if baris_usia else np.empty(0, dtype=np.intp))
 
     # --- Pass 3: Hard Filtering (Filter Wajib untuk Tingkat Kebugaran) ---
-    # Langkah ini memastikan preferensi level pengguna dipatuhi secara mutlak.
-    # Filter ketat: hanya tampilkan program dengan tingkat kebugaran yang sama persis dengan pilihan pengguna.
-    if user_kebugaran_keyword:
-        df_latihan_temp = df_latihan_temp[df_latihan_temp['Tingkat Kebugaran Program'].str.lower() == user_kebugaran_keyword]
+    # Filter ketat: hanya program dengan tingkat kebugaran yang sama persis dengan pilihan pengguna.
+    if preferensi['kebugaran']:
+        daftar_baris.append(indeks_katalog.indeks_terbalik[('kebugaran', preferensi['kebugaran'])])
 
     # --- Pass 4: Hard Filtering for Location (Filter Wajib untuk Tempat) ---
-    # Ini memastikan bahwa hanya program yang cocok dengan lokasi pilihan pengguna yang akan dipertimbangkan.
-    if user_tempat_keyword:
-        df_latihan_temp = df_latihan_temp[df_latihan_temp['Tempat Program'].str.lower().str.contains(user_tempat_keyword, na=False)]
+    if preferensi['tempat']:
+        daftar_baris.append(indeks_katalog.indeks_terbalik[('tempat', preferensi['tempat'])])
 
     # --- Pass 5: Hard Filtering for Exercise Type (Filter Wajib untuk Jenis Latihan) ---
-    if user_jenis_latihan_keyword:
-        df_latihan_temp = df_latihan_temp[df_latihan_temp['Jenis Latihan Program'].str.lower().str.contains(user_jenis_latihan_keyword)]
+    if preferensi['jenis_latihan']:
+        daftar_baris.append(indeks_katalog.indeks_terbalik[('jenis_latihan', preferensi['jenis_latihan'])])
+
+    if not daftar_baris:
+        return None
+    # Irisan dimulai dari daftar terpendek agar biayanya sebanding dengan subset terkecil
+    daftar_baris.sort(key=len)
+    baris_lolos = daftar_baris[0]
+    for baris in daftar_baris[1:]:
+        baris_lolos = np.intersect1d(baris_lolos, baris, assume_unique=True)
+    return baris_lolos
+
+def _kunci_filter(preferensi: dict) -> tuple:
+    """Bagian preferensi yang dibaca `_baris_eligible`; profil dengan kunci sama lolos ke baris yang sama."""
+    return preferensi['usia'], preferensi['kebugaran'], preferensi['tempat'], preferensi['jenis_latihan']
+
+def _kemiripan(tfidf_matrix_pengguna, tfidf_matrix_latihan) -> np.ndarray:
+    """
+    Cosine similarity pengguna x program. Matriks padat (mode LSA, lihat vektorisasi.py) barisnya sudah
+    ternormalisasi L2, jadi cukup satu perkalian GEMV/GEMM float32; skor dikembalikan sebagai float64
+    agar bonus/penalti dijumlahkan dengan presisi yang sama seperti mode sparse.
+    """
+    if isinstance(tfidf_matrix_latihan, np.ndarray):
+        return (np.asarray(tfidf_matrix_pengguna) @ tfidf_matrix_latihan.T).astype(np.float64)
+    return cosine_similarity(tfidf_matrix_pengguna, tfidf_matrix_latihan)
+
+def _skor_kemiripan(tfidf_matrix_pengguna, tfidf_matrix_latihan, baris_eligible) -> np.ndarray:
+    """Cosine similarity satu profil, hanya terhadap baris program yang lolos hard filter."""
+    if baris_eligible is None:
+        return _kemiripan(tfidf_matrix_pengguna, tfidf_matrix_latihan).flatten()
+    if len(baris_eligible) == 0:
+        return np.empty(0)
+    return _kemiripan(tfidf_matrix_pengguna, tfidf_matrix_latihan[baris_eligible]).flatten()
+
+def _peringkat_satu_profil(cosine_similarities: np.ndarray, baris_eligible, preferensi: dict,
+                           indeks_katalog: IndeksKatalog, final_top_n: int):
+    """
+    Menjalankan Pass 1-2 untuk satu profil atas program yang sudah lolos hard filter.
+    `cosine_similarities` sejajar dengan `baris_eligible` (atau seluruh katalog jika None).
+    Mengembalikan (indeks baris program, original_similarity, adjusted_similarity), sudah terurut.
+    """
+    # --- Pass 1: Candidate Generation (Menjaring Kandidat) ---
+    # Pool hanya diperbesar jika pengguna meminta lebih banyak hasil dari CANDIDATE_POOL_SIZE;
+    # hard filter sudah dijalankan sehingga setiap kandidat di pool adalah hasil yang sah.
+    pool_size = max(CANDIDATE_POOL_SIZE, final_top_n)
+    if len(cosine_similarities) < pool_size:
+        pool_size = len(cosine_similarities)
+    baris_katalog = np.arange(len(cosine_similarities)) if baris_eligible is None else baris_eligible
+    top_candidate_positions = _top_k_menurun(cosine_similarities, baris_katalog, pool_size)
+    top_candidate_indices = baris_katalog[top_candidate_positions]
+
+    original_similarity = cosine_similarities[top_candidate_positions]
+
+    # --- Pass 2: Re-ranking (Bonus & Penalti) ---
+    # Semua aturan ATURAN_SKOR sekaligus: satu perkalian matriks indikator kandidat x vektor bobot profil
+    adjusted_similarity = original_similarity + indeks_katalog.matriks_aturan.skor(top_candidate_indices, preferensi)
+
+    urutan = _top_k_menurun(adjusted_similarity, top_candidate_indices, final_top_n)
+    return top_candidate_indices[urutan], original_similarity[urutan], adjusted_similarity[urutan]
+
+# --- Store Rekaman Program (Hidrasi) ---
+# Kolom yang tidak pernah ditampilkan, sehingga tidak ikut disimpan di store rekaman program
+KOLOM_TANPA_HIDRASI = ('fitur_gabungan_program',)
+
+class RekamanProgram:
+    """
+    Store rekaman per program yang dibangun sekali saat katalog dimuat (satu list nilai per kolom).
+    Engine cukup mengembalikan array indeks baris dan skor; `hidrasi` membuat dict hanya untuk
+    baris yang benar-benar ditampilkan, tanpa menyalin DataFrame atau memanggil `to_dict`.
+    """
+    def __init__(self, df_latihan: pd.DataFrame, kolom_dikecualikan=KOLOM_TANPA_HIDRASI):
+        self.kolom = tuple(kolom for kolom in df_latihan.columns if kolom not in kolom_dikecualikan)
+        self._nilai = tuple(df_latihan[kolom].tolist() for kolom in self.kolom)
+        self._jumlah = len(df_latihan)
+
+    def __len__(self):
+        return self._jumlah
+
+    def rekaman(self, baris: int) -> dict:
+        return {kolom: nilai[baris] for kolom, nilai in zip(self.kolom, self._nilai)}
+
+    def hidrasi(self, indeks_baris, original_similarity, adjusted_similarity) -> list:
+        """List of dict (kolom program + kedua skor) sejajar dengan `indeks_baris`."""
+        hasil = []
+        for baris, original, adjusted in zip(np.asarray(indeks_baris).tolist(), np.asarray(original_similarity).tolist(),
+                                             np.asarray(adjusted_similarity).tolist()):
+            rekaman = self.rekaman(baris)
+            rekaman['original_similarity'] = original
+            rekaman['adjusted_similarity'] = adjusted
+            hasil.append(rekaman)
+        return hasil
+
+def _bangun_dataframe_hasil(df_latihan: pd.DataFrame, indeks_hasil, original_similarity, adjusted_similarity) -> pd.DataFrame:
+    """Mengambil baris program hasil rekomendasi beserta kolom skornya (API DataFrame untuk skrip offline)."""
+    hasil_df = df_latihan.take(indeks_hasil) # take sudah menghasilkan frame baru, tanpa .copy() tambahan
+    hasil_df['original_similarity'] = original_similarity
+    hasil_df['adjusted_similarity'] = adjusted_similarity
+    return hasil_df
+
+def dapatkan_rekomendasi(
+    profil_pengguna_string: str,
+    profil_pengguna_dict: dict,
+    df_latihan: pd.DataFrame,
+    tfidf_vectorizer,
+    tfidf_matrix_latihan,
+    final_top_n: int = 10,
+    indeks_katalog: IndeksKatalog = None,
+    indeks_ann=None,
+    indeks_posting=None) -> pd.DataFrame:
+    """
+    Fungsi rekomendasi terpusat yang disempurnakan.
+    Menerima data dan model sebagai argumen untuk fleksibilitas.
+    Menggunakan hard filter untuk tingkat kebugaran.
+    `indeks_katalog` sebaiknya dibangun sekali saat katalog dimuat; jika tidak
+    diberikan, indeks dibangun ulang dari `df_latihan` pada setiap pemanggilan.
+    `indeks_ann` (opsional, lihat indeks_ann.py) membatasi penilaian ke kandidat dari cluster terdekat.
+    `indeks_posting` (opsional, lihat indeks_posting.py) membatasi penilaian ke kandidat yang pasti
+    memuat top-k eksak, sehingga hasilnya identik dengan penilaian ke semua program.
+    """
+    if indeks_katalog is None:
+        indeks_katalog = bangun_indeks_katalog(df_latihan)
+
+    hasil = dapatkan_peringkat(
+        profil_pengguna_string, profil_pengguna_dict, tfidf_vectorizer, tfidf_matrix_latihan, indeks_katalog, final_top_n,
+        indeks_ann=indeks_ann, indeks_posting=indeks_posting
+    )
+    pengamat = _pengamat_tahap
+    mulai = time.perf_counter() if pengamat is not None else 0.0
+    hasil_df = _bangun_dataframe_hasil(df_latihan, *hasil)
+    if pengamat is not None:
+        _lapor_tahap(pengamat, 'hidrasi', mulai, len(hasil_df))
+    return hasil_df
+
+def dapatkan_peringkat(
+    profil_pengguna_string: str,
+    profil_pengguna_dict: dict,
+    tfidf_vectorizer,
+    tfidf_matrix_latihan,
+    indeks_katalog: IndeksKatalog,
+    final_top_n: int = 10,
+    indeks_ann=None,
+    indeks_posting=None):
+    """
+    Sama seperti `dapatkan_rekomendasi`, tetapi hanya mengembalikan peringkat ringkas:
+    (indeks baris program, original_similarity, adjusted_similarity) sebagai array NumPy.
+    Cocok untuk disimpan (misalnya cursor paginasi) tanpa menyalin baris DataFrame.
+    """
+    # Instrumentasi: setiap tahap dilaporkan ke pengamat (jika terpasang) beserta jumlah kandidat setelahnya
+    pengamat = _pengamat_tahap
+    mulai = time.perf_counter() if pengamat is not None else 0.0
+
+    preferensi = normalisasi_preferensi(profil_pengguna_dict)
+    # Hard filter dijalankan lebih dulu lewat indeks terbalik; skor hanya dihitung untuk program yang lolos
+    baris_eligible = _baris_eligible(preferensi, indeks_katalog)
+    if pengamat is not None:
+        mulai = _lapor_tahap(pengamat, 'filter', mulai,
+                             indeks_katalog.jumlah_program if baris_eligible is None else len(baris_eligible))
+    tfidf_matrix_pengguna = tfidf_vectorizer.transform([profil_pengguna_string])
+    if pengamat is not None:
+        mulai = _lapor_tahap(pengamat, 'transform', mulai, 1)
+    if indeks_ann is not None:
+        # Candidate generation aproksimasi: hanya program di cluster terdekat yang dinilai secara eksak
+        baris_eligible = indeks_ann.kandidat(
+            tfidf_matrix_pengguna, baris_eligible, minimal=max(CANDIDATE_POOL_SIZE, final_top_n)
+        )
+    elif indeks_posting is not None:
+        # Top-k eksak lewat posting list: program yang pasti di luar pool tidak dinilai ulang
+        baris_eligible = indeks_posting.kandidat(
+            tfidf_matrix_pengguna, baris_eligible, minimal=max(CANDIDATE_POOL_SIZE, final_top_n)
+        )
+    if pengamat is not None and (indeks_ann is not None or indeks_posting is not None):
+        mulai = _lapor_tahap(pengamat, 'kandidat', mulai, len(baris_eligible))
+    cosine_similarities = _skor_kemiripan(tfidf_matrix_pengguna, tfidf_matrix_latihan, baris_eligible)
+    if pengamat is not None:
+        mulai = _lapor_tahap(pengamat, 'skor', mulai, len(cosine_similarities))
+
+    hasil = _peringkat_satu_profil(cosine_similarities, baris_eligible, preferensi, indeks_katalog, final_top_n)
+    if pengamat is not None:
+        _lapor_tahap(pengamat, 'peringkat', mulai, len(hasil[0]))
+    return hasil
+
+def dapatkan_rekomendasi_batch(
+    daftar_profil: list,
+    df_latihan: pd.DataFrame,
+    tfidf_vectorizer,
+    tfidf_matrix_latihan,
+    final_top_n: int = 10,
+    indeks_katalog: IndeksKatalog = None,
+    ukuran_batch: int = 1024,
+    indeks_ann=None) -> list:
+    """
+    Versi batch dari `dapatkan_rekomendasi` untuk banyak profil sekaligus.
+    `daftar_profil` berisi pasangan (profil_pengguna_string, profil_pengguna_dict).
+    Semua string profil di-transform sekaligus; profil dengan hard filter yang sama dinilai
+    bersama dengan satu perkalian matriks terhadap program yang lolos filter saja (lihat
+    `dapatkan_peringkat_batch`). Re-ranking tetap per baris sehingga hasilnya sama dengan versi satu profil.
+    Mengembalikan list DataFrame dengan urutan yang sama dengan `daftar_profil`.
+    """
+    if indeks_katalog is None:
+        indeks_katalog = bangun_indeks_katalog(df_latihan)
+
+    semua_peringkat = dapatkan_peringkat_batch(daftar_profil, tfidf_vectorizer, tfidf_matrix_latihan, indeks_katalog,
+                                               final_top_n, ukuran_batch=ukuran_batch, indeks_ann=indeks_ann)
+    return [_bangun_dataframe_hasil(df_latihan, *peringkat) for peringkat in semua_peringkat]
+
+def dapatkan_peringkat_batch(
+    daftar_profil: list,
+    tfidf_vectorizer,
+    tfidf_matrix_latihan,
+    indeks_katalog: IndeksKatalog,
+    final_top_n: int = 10,
+    ukuran_batch: int = 1024,
+    indeks_ann=None) -> list:
+    """
+    Versi batch dari `dapatkan_peringkat`: list peringkat ringkas (indeks baris program,
+    original_similarity, adjusted_similarity) dengan urutan yang sama dengan `daftar_profil`.
+    `ukuran_batch` profil di-transform sekaligus. Hard filter dihitung sekali per kombinasi filter;
+    profil dengan filter sama dinilai bersama hanya terhadap baris yang lolos, per blok baris yang
+    matriks skornya paling banyak UKURAN_BLOK_SKOR elemen. Dengan `indeks_ann`, kandidat bergantung
+    pada vektor masing-masing profil sehingga setiap profil dinilai terhadap kandidatnya sendiri.
+    """
+    hasil_semua = [None] * len(daftar_profil)
+    cache_eligible = {} # _kunci_filter -> baris eligible
+    for awal in range(0, len(daftar_profil), ukuran_batch):
+        potongan = daftar_profil[awal:awal + ukuran_batch]
+        tfidf_matrix_pengguna = tfidf_vectorizer.transform([profil_string for profil_string, _ in potongan])
+        daftar_preferensi = [normalisasi_preferensi(profil_dict) for _, profil_dict in potongan]
+        kelompok = {}
+        for baris, preferensi in enumerate(daftar_preferensi):
+            kunci = _kunci_filter(preferensi)
+            if kunci not in cache_eligible:
+                cache_eligible[kunci] = _baris_eligible(preferensi, indeks_katalog)
+            kelompok.setdefault(kunci, []).append(baris)
+
+        for kunci, daftar_baris in kelompok.items():
+            baris_eligible = cache_eligible[kunci]
+            if indeks_ann is not None:
+                for baris in daftar_baris:
+                    vektor_pengguna = tfidf_matrix_pengguna[baris:baris + 1]
+                    kandidat = indeks_ann.kandidat(vektor_pengguna, baris_eligible,
+                                                   minimal=max(CANDIDATE_POOL_SIZE, final_top_n))
+                    skor_baris = _skor_kemiripan(vektor_pengguna, tfidf_matrix_latihan, kandidat)
+                    hasil_semua[awal + baris] = _peringkat_satu_profil(skor_baris, kandidat, daftar_preferensi[baris],
+                                                                       indeks_katalog, final_top_n)
+                continue
 
-    sorted_df = df_latihan_temp.sort_values(by='adjusted_similarity', ascending=False)
-    return sorted_df.head(final_top_n)
\ No newline at end of file
+            matriks_eligible = tfidf_matrix_latihan if baris_eligible is None else tfidf_matrix_latihan[baris_eligible]
+            jumlah_kolom = matriks_eligible.shape[0]
+            baris_per_blok = max(1, UKURAN_BLOK_SKOR // max(jumlah_kolom, 1))
+            for mulai_blok in range(0, len(daftar_baris), baris_per_blok):
+                blok = daftar_baris[mulai_blok:mulai_blok + baris_per_blok]
+                matriks_similarity = (_kemiripan(tfidf_matrix_pengguna[blok], matriks_eligible) if jumlah_kolom
+                                      else np.empty((len(blok), 0)))
+                for i, baris in enumerate(blok):
+                    hasil_semua[awal + baris] = _peringkat_satu_profil(matriks_similarity[i], baris_eligible,
+                                                                       daftar_preferensi[baris], indeks_katalog, final_top_n)
+    return hasil_semua
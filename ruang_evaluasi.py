@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.model_selection import train_test_split
+
+import recommender_engine
+from evaluasi_paralel import (UKURAN_POTONGAN, HasilEvaluasi, KonteksEvaluasi, peringkat_engine, peta_paralel,
+                              tandai_relevan)
+
+# --- Konfigurasi Ruang Kerja Evaluasi ---
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+LATIHAN_PATH = os.path.join(BASE_PATH, 'data/data_latihan_processed.csv')
+KUESIONER_PATH = os.path.join(BASE_PATH, 'data/kuesioner_processed.csv')
+DIREKTORI_CACHE = os.getenv("EVALUASI_CACHE_DIR", os.path.join(BASE_PATH, 'data', 'cache_evaluasi')) # Kosong = tanpa cache disk
+FORMAT_RUANG = 1 # Versi isi cache; naikkan jika file di bawah berubah
+UKURAN_UJI = 0.2 # Proporsi kuesioner untuk data uji
+RANDOM_STATE = 42
+PARAMETER_TFIDF = {'stop_words': 'english'}
+K_MAKS_PERINGKAT = 20 # Panjang minimum peringkat yang disimpan per pengguna uji (kurva K=1..20)
+FILE_MODEL = 'model.pkl'
+FILE_PERINGKAT = 'peringkat_uji.npy'
+
+# Kolom kuesioner -> kunci profil yang dibaca engine (lihat normalisasi_preferensi)
+KOLOM_PROFIL = {
+    'tempat': '11. Apakah Anda lebih suka latihan di rumah atau di gym?',
+    'pengalaman': '4. Bagaimana tingkat kebugaran Anda saat ini?',
+    'jenis_kelamin': '2. Jenis Kelamin',
+}
+
+def profil_uji(user_row) -> tuple:
+    """(string fitur, dict profil) satu baris kuesioner, seperti yang diberikan ke engine saat evaluasi."""
+    return user_row['fitur_gabungan_pengguna'], {kunci: user_row.get(kolom, '').lower() for kunci, kolom in KOLOM_PROFIL.items()}
+
+def konfigurasi_engine() -> dict:
+    """Konfigurasi yang menentukan peringkat: ukuran pool, aturan bonus/penalti, dan hash kode engine."""
+    with open(recommender_engine.__file__, 'rb') as f:
+        kode = hashlib.sha256(f.read()).hexdigest()
+    return {
+        'candidate_pool_size': recommender_engine.CANDIDATE_POOL_SIZE,
+        'penalti_tidak_cocok': recommender_engine.PENALTI_TIDAK_COCOK,
+        'aturan_skor': recommender_engine.ATURAN_SKOR,
+        'kode': kode,
+    }
+
+def kunci_ruang(daftar_path=(LATIHAN_PATH, KUESIONER_PATH)) -> str:
+    """Hash isi file data, pembagian latih/uji, parameter TF-IDF, dan konfigurasi engine."""
+    hash_ruang = hashlib.sha256()
+    for path in daftar_path:
+        with open(path, 'rb') as f:
+            for blok in iter(lambda: f.read(1 << 20), b''):
+                hash_ruang.update(blok)
+    konfigurasi = {
+        'format': FORMAT_RUANG,
+        'ukuran_uji': UKURAN_UJI,
+        'random_state': RANDOM_STATE,
+        'tfidf': PARAMETER_TFIDF,
+        'sklearn': sklearn.__version__, # Pickle vectorizer terikat versi sklearn
+        'engine': konfigurasi_engine(),
+    }
+    hash_ruang.update(json.dumps(konfigurasi, sort_keys=True).encode('utf-8'))
+    return hash_ruang.hexdigest()[:16]
+
+def _tulis_atomik(path: str, tulis):
+    """Menulis lewat file sementara lalu os.replace, agar pembaca lain tidak melihat file setengah jadi."""
+    path_sementara = f'{path}.{uuid.uuid4().hex[:8]}'
+    with open(path_sementara, 'wb') as f:
+        tulis(f)
+    os.replace(path_sementara, path)
+
+def _hapus_ruang_lama(direktori: str, kunci_aktif: str):
+    """Menghapus ruang kerja untuk data/konfigurasi lama (gagal diam-diam jika file masih dipakai)."""
+    for nama in os.listdir(direktori):
+        path = os.path.join(direktori, nama)
+        if nama != kunci_aktif and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+def _peringkat_potongan(konteks_worker, daftar_profil: list) -> np.ndarray:
+    """Indeks baris top-k_maks untuk satu potongan profil, -1 untuk posisi kosong."""
+    konteks, k_maks = konteks_worker
+    rekomendasi = np.full((len(daftar_profil), k_maks), -1, dtype=np.int64)
+    for i, indeks_baris in enumerate(peringkat_engine(konteks, daftar_profil, k_maks)):
+        rekomendasi[i, :len(indeks_baris)] = indeks_baris[:k_maks]
+    return rekomendasi
+
+class RuangEvaluasi:
+    """
+    Data dan model bersama evaluasi.py, visualisasi_evaluasi.py, dan lihat_rekomendasi.py: katalog,
+    kuesioner, pembagian latih/uji, vectorizer TF-IDF terlatih, dan peringkat engine setiap pengguna uji.
+    Jika `direktori` diberikan, model dan peringkat disimpan di sana sehingga run berikutnya dengan
+    kunci yang sama (lihat `kunci_ruang`) tidak melatih ulang maupun memeringkat ulang.
+    """
+    def __init__(self, kunci, df_latihan, df_kuesioner, train_df, test_df, tfidf, tfidf_matrix_latihan,
+                 direktori=None, dari_cache=False):
+        self.kunci = kunci
+        self.df_latihan = df_latihan
+        self.df_kuesioner = df_kuesioner
+        self.train_df = train_df
+        self.test_df = test_df
+        self.tfidf = tfidf
+        self.tfidf_matrix_latihan = tfidf_matrix_latihan
+        self.direktori = direktori
+        self.dari_cache = dari_cache
+        self.konteks = KonteksEvaluasi(df_latihan, tfidf, tfidf_matrix_latihan)
+        self.indeks_katalog = self.konteks.indeks_katalog
+        self._peringkat_uji = None
+
+    def peringkat_uji(self, k_maks: int = K_MAKS_PERINGKAT, jumlah_proses: int = None) -> np.ndarray:
+        """
+        Indeks baris top-k_maks setiap baris `test_df` (urutan sama, -1 untuk posisi kosong) dengan profil
+        `profil_uji`. Diambil dari disk jika peringkat tersimpan cukup panjang; jika tidak, seluruh pengguna
+        uji diperingkat sekali di pool proses (lihat evaluasi_paralel.peta_paralel) lalu disimpan.
+        """
+        path = os.path.join(self.direktori, FILE_PERINGKAT) if self.direktori else None
+        if self._peringkat_uji is None and path and os.path.exists(path):
+            self._peringkat_uji = np.load(path)
+        if self._peringkat_uji is None or self._peringkat_uji.shape[1] < k_maks:
+            k_simpan = max(k_maks, K_MAKS_PERINGKAT)
+            daftar_profil = [profil_uji(user_row) for user_row in self.test_df.to_dict(orient='records')]
+            potongan = [daftar_profil[awal:awal + UKURAN_POTONGAN] for awal in range(0, len(daftar_profil), UKURAN_POTONGAN)]
+            hasil_potongan = peta_paralel(_peringkat_potongan, potongan, (self.konteks, k_simpan), jumlah_proses=jumlah_proses)
+            self._peringkat_uji = (np.concatenate(hasil_potongan) if hasil_potongan
+                                   else np.full((0, k_simpan), -1, dtype=np.int64))
+            if path:
+                _tulis_atomik(path, lambda f: np.save(f, self._peringkat_uji))
+        return self._peringkat_uji[:, :k_maks]
+
+    def hasil_evaluasi(self, fungsi_relevan, k_values, jumlah_proses: int = None) -> HasilEvaluasi:
+        """
+        HasilEvaluasi pengguna uji dari peringkat tersimpan; hanya ground truth yang dihitung ulang.
+        `fungsi_relevan(user_row)` -> set ID program relevan; pengguna dengan set kosong dilewati.
+        """
+        rekomendasi = self.peringkat_uji(max(k_values), jumlah_proses)
+        daftar_relevan = [fungsi_relevan(user_row) for user_row in self.test_df.to_dict(orient='records')]
+        dievaluasi = np.array([bool(relevant_items) for relevant_items in daftar_relevan], dtype=bool)
+        daftar_relevan = [relevant_items for relevant_items in daftar_relevan if relevant_items]
+        rekomendasi = rekomendasi[dievaluasi]
+        return HasilEvaluasi(rekomendasi, tandai_relevan(rekomendasi, daftar_relevan, self.konteks.id_program),
+                             np.array([len(relevant_items) for relevant_items in daftar_relevan], dtype=np.int64))
+
+def _bangun_ruang(kunci: str) -> dict:
+    """Membaca CSV, membagi kuesioner, dan melatih TF-IDF katalog (FileNotFoundError jika CSV tidak ada)."""
+    df_latihan = pd.read_csv(LATIHAN_PATH)
+    df_kuesioner = pd.read_csv(KUESIONER_PATH)
+
+    # Bagi data kuesioner menjadi 80% untuk latih dan 20% untuk uji
+    train_df, test_df = train_test_split(df_kuesioner, test_size=UKURAN_UJI, random_state=RANDOM_STATE)
+
+    df_latihan['fitur_gabungan_program'] = df_latihan['fitur_gabungan_program'].fillna('')
+    df_kuesioner['fitur_gabungan_pengguna'] = df_kuesioner['fitur_gabungan_pengguna'].fillna('')
+
+    tfidf = TfidfVectorizer(**PARAMETER_TFIDF)
+    tfidf_matrix_latihan = tfidf.fit_transform(df_latihan['fitur_gabungan_program'])
+    return {'kunci': kunci, 'df_latihan': df_latihan, 'df_kuesioner': df_kuesioner, 'train_df': train_df,
+            'test_df': test_df, 'tfidf': tfidf, 'tfidf_matrix_latihan': tfidf_matrix_latihan}
+
+def muat_ruang_evaluasi(direktori: str = DIREKTORI_CACHE) -> RuangEvaluasi:
+    """
+    Memuat ruang kerja untuk isi data dan konfigurasi saat ini dari `direktori`, atau membangunnya lalu
+    menyimpannya (ruang kerja kunci lain dihapus). `direktori` kosong berarti selalu dibangun di memori.
+    """
+    kunci = kunci_ruang()
+    path = os.path.join(direktori, kunci) if direktori else None
+    if path:
+        try:
+            with open(os.path.join(path, FILE_MODEL), 'rb') as f:
+                return RuangEvaluasi(**pickle.load(f), direktori=path, dari_cache=True)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            pass # Belum ada atau rusak: bangun ulang
+
+    isi = _bangun_ruang(kunci)
+    if path:
+        os.makedirs(path, exist_ok=True)
+        _tulis_atomik(os.path.join(path, FILE_MODEL), lambda f: pickle.dump(isi, f, protocol=pickle.HIGHEST_PROTOCOL))
+        _hapus_ruang_lama(direktori, kunci)
+    return RuangEvaluasi(**isi, direktori=path)
+
+_ruang_aktif = None # Diisi `ruang_evaluasi_aktif` saat pertama kali diminta
+
+def ruang_evaluasi_aktif() -> RuangEvaluasi:
+    """
+    Ruang kerja `muat_ruang_evaluasi()` bersama untuk proses ini, dimuat saat pertama kali diminta (bukan saat
+    impor, agar mengimpor modul evaluasi tidak membaca, menulis, atau menghapus cache). Berhenti dengan pesan
+    error jika CSV tidak ada.
+    """
+    global _ruang_aktif
+    if _ruang_aktif is None:
+        try:
+            ruang = muat_ruang_evaluasi()
+        except FileNotFoundError as e:
+            raise SystemExit(f"Error: File tidak ditemukan. Pastikan path sudah benar. Detail: {e}")
+        print(f"Ruang kerja evaluasi {ruang.kunci} {'dimuat dari cache' if ruang.dari_cache else 'dibangun'}.")
+        print(f"Data kuesioner dibagi: {len(ruang.train_df)} data latih, {len(ruang.test_df)} data uji.")
+        print(f"Dimensi Matriks TF-IDF Latihan: {ruang.tfidf_matrix_latihan.shape}")
+        _ruang_aktif = ruang
+    return _ruang_aktif
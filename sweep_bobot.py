@@ -0,0 +1,243 @@
+import argparse
+import itertools
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import app
+import recommender_engine
+from evaluasi import _pengguna_uji, bangun_kelompok_ground_truth, evaluasi_model
+from evaluasi_paralel import HasilEvaluasi, KonteksEvaluasi, peta_paralel
+from recommender_engine import ATURAN_SKOR, _baris_eligible, _kemiripan, _top_k_menurun, normalisasi_preferensi
+from ruang_evaluasi import ruang_evaluasi_aktif
+
+# --- Konfigurasi Sweep ---
+# Konstanta recommender_engine -> (indeks aturan di ATURAN_SKOR, tanda bobot); penalti bertanda negatif
+PARAMETER_ATURAN = {
+    'BONUS_SANGAT_COCOK': (0, 1),
+    'BONUS_GENDER_COCOK': (1, 1),
+    'PENALTI_GENDER_TIDAK_COCOK': (2, -1),
+    'BONUS_TUJUAN_COCOK': (3, 1),
+    'BONUS_JENIS_LATIHAN_COCOK': (4, 1),
+    'BONUS_USIA_COCOK': (5, 1),
+    'PENALTI_USIA_TIDAK_COCOK': (6, -1),
+}
+PARAMETER_POOL = 'CANDIDATE_POOL_SIZE'
+PARAMETER_SWEEP = (*PARAMETER_ATURAN, PARAMETER_POOL)
+
+# Ruang grid bawaan (3^8 = 6561 konfigurasi, nilai saat ini termasuk di dalamnya)
+RUANG_GRID = {
+    'BONUS_SANGAT_COCOK': (0.0, 0.1, 0.2),
+    'BONUS_GENDER_COCOK': (0.0, 0.15, 0.3),
+    'PENALTI_GENDER_TIDAK_COCOK': (0.0, 0.3, 0.6),
+    'BONUS_TUJUAN_COCOK': (0.0, 0.2, 0.4),
+    'BONUS_JENIS_LATIHAN_COCOK': (0.0, 0.15, 0.3),
+    'BONUS_USIA_COCOK': (0.0, 0.1, 0.2),
+    'PENALTI_USIA_TIDAK_COCOK': (0.0, 0.2, 0.4),
+    PARAMETER_POOL: (100, 450, 1000),
+}
+# Ruang acak bawaan: (min, max) uniform; CANDIDATE_POOL_SIZE diambil sebagai bilangan bulat
+RUANG_ACAK = {**{nama: (0.0, 0.5) for nama in PARAMETER_ATURAN}, PARAMETER_POOL: (50, 1000)}
+K_VALUES = (5, 10, 20)
+K_UTAMA = 10 # Leaderboard diurutkan berdasarkan precision@K_UTAMA lalu recall@K_UTAMA
+UKURAN_POTONGAN = 256 # Konfigurasi per tugas worker
+UKURAN_BATCH_KEMIRIPAN = 1024 # Pengguna per perkalian matriks saat membangun cache cosine
+KELUARAN = 'sweep_bobot.csv'
+
+def konfigurasi_bawaan() -> dict:
+    """Nilai konstanta saat ini di recommender_engine (dicek terhadap ATURAN_SKOR)."""
+    konfigurasi = {nama: getattr(recommender_engine, nama) for nama in PARAMETER_SWEEP}
+    for nama, (indeks_aturan, tanda) in PARAMETER_ATURAN.items():
+        if ATURAN_SKOR[indeks_aturan][3] != tanda * konfigurasi[nama]:
+            raise ValueError(f"PARAMETER_ATURAN tidak sesuai dengan ATURAN_SKOR untuk '{nama}'")
+    return konfigurasi
+
+def ruang_grid(ruang: dict = RUANG_GRID) -> list:
+    """Semua kombinasi nilai; parameter yang tidak disebut memakai nilai bawaan."""
+    bawaan = konfigurasi_bawaan()
+    nama = list(ruang)
+    return [{**bawaan, **dict(zip(nama, kombinasi))} for kombinasi in itertools.product(*(ruang[n] for n in nama))]
+
+def ruang_acak(jumlah: int, ruang: dict = RUANG_ACAK, seed: int = 42) -> list:
+    """`jumlah` konfigurasi acak uniform dalam rentang (min, max) setiap parameter."""
+    rng = np.random.default_rng(seed)
+    bawaan = konfigurasi_bawaan()
+    daftar_konfigurasi = []
+    for _ in range(jumlah):
+        konfigurasi = dict(bawaan)
+        for nama, (minimum, maksimum) in ruang.items():
+            konfigurasi[nama] = (int(rng.integers(minimum, maksimum + 1)) if nama == PARAMETER_POOL
+                                 else round(float(rng.uniform(minimum, maksimum)), 4))
+        daftar_konfigurasi.append(konfigurasi)
+    return daftar_konfigurasi
+
+def _pengguna_lengkap(konteks, user_row, kelompok_ground_truth):
+    """Seperti evaluasi._pengguna_uji, ditambah usia/tujuan/jenis latihan agar semua aturan bonus ikut aktif."""
+    data = _pengguna_uji(konteks, user_row, kelompok_ground_truth)
+    if data is None:
+        return None
+    relevant_items, profil_string, profil_dict = data
+    profil_dict = {**profil_dict, 'usia': user_row.get(app.COL_KUESIONER_USIA),
+                   'tujuan': str(user_row.get(app.COL_KUESIONER_TUJUAN, '')).lower(),
+                   'jenis_latihan': str(user_row.get(app.COL_KUESIONER_JENIS_LATIHAN_PRIMARY,
+                                                     user_row.get(app.COL_KUESIONER_JENIS_LATIHAN_FALLBACK, ''))).lower()}
+    return relevant_items, profil_string, profil_dict
+
+class KonteksSweep:
+    """
+    Cache per pengguna uji yang tidak bergantung pada bobot: pool kandidat (sampai pool terbesar di ruang
+    sweep) beserta cosine similarity, peringkat cosine, aktivasi setiap aturan, dan relevansi.
+    Kolom setiap baris diurutkan berdasarkan ID baris program, sehingga argsort stabil atas skor
+    menghasilkan tie-break yang sama dengan engine.
+    """
+    def __init__(self, konteks: KonteksEvaluasi, data_pengguna: list, pool_maks: int, k_values=K_VALUES):
+        self.k_values = tuple(k_values)
+        self.k_maks = max(self.k_values)
+        pool_maks = max(pool_maks, self.k_maks)
+        jumlah_pengguna = len(data_pengguna)
+        matriks_aturan = konteks.indeks_katalog.matriks_aturan
+        jumlah_aturan = len(matriks_aturan.aturan)
+        satuan = np.eye(jumlah_aturan)
+
+        self.jumlah_program = konteks.indeks_katalog.jumlah_program
+        self.baris = np.full((jumlah_pengguna, pool_maks), -1, dtype=np.int64)
+        self.peringkat_cosine = np.full((jumlah_pengguna, pool_maks), pool_maks, dtype=np.int64)
+        self.kemiripan = np.full((jumlah_pengguna, pool_maks), -np.inf)
+        self.aktif = np.zeros((jumlah_aturan, jumlah_pengguna, pool_maks), dtype=bool)
+        self.relevan = np.zeros((jumlah_pengguna, pool_maks), dtype=bool)
+        self.jumlah_relevan = np.array([len(relevant_items) for relevant_items, _, _ in data_pengguna], dtype=np.int64)
+
+        # Matriks cosine pengguna x program dihitung sekali (per batch) untuk seluruh sweep
+        for awal in range(0, jumlah_pengguna, UKURAN_BATCH_KEMIRIPAN):
+            potongan = data_pengguna[awal:awal + UKURAN_BATCH_KEMIRIPAN]
+            matriks_similarity = _kemiripan(konteks.tfidf_vectorizer.transform([s for _, s, _ in potongan]),
+                                            konteks.tfidf_matrix_latihan)
+            for baris, (relevant_items, _, profil_dict) in enumerate(potongan):
+                u = awal + baris
+                preferensi = normalisasi_preferensi(profil_dict)
+                baris_eligible = _baris_eligible(preferensi, konteks.indeks_katalog)
+                skor = matriks_similarity[baris] if baris_eligible is None else matriks_similarity[baris, baris_eligible]
+                baris_katalog = np.arange(len(skor)) if baris_eligible is None else baris_eligible
+                posisi = _top_k_menurun(skor, baris_katalog, pool_maks)
+                kandidat = baris_katalog[posisi]
+                per_id = np.argsort(kandidat) # Posisi di urutan cosine untuk setiap kolom (urut ID baris)
+                jumlah = len(kandidat)
+                kandidat_urut = kandidat[per_id]
+                self.baris[u, :jumlah] = kandidat_urut
+                self.peringkat_cosine[u, :jumlah] = per_id
+                self.kemiripan[u, :jumlah] = skor[posisi][per_id]
+                fitur_kandidat = matriks_aturan.matriks[kandidat_urut]
+                for indeks_aturan in range(jumlah_aturan):
+                    self.aktif[indeks_aturan, u, :jumlah] = fitur_kandidat @ matriks_aturan.vektor_bobot(preferensi, satuan[indeks_aturan]) != 0
+                self.relevan[u, :jumlah] = [id_program in relevant_items for id_program in konteks.id_program[kandidat_urut]]
+
+        # Hard filter biasanya menyisakan jauh lebih sedikit dari pool_maks: kolom padding dibuang
+        lebar = max(int(np.count_nonzero(self.peringkat_cosine < pool_maks, axis=1).max(initial=0)), self.k_maks)
+        self.baris = np.ascontiguousarray(self.baris[:, :lebar])
+        self.peringkat_cosine = np.ascontiguousarray(self.peringkat_cosine[:, :lebar])
+        self.kemiripan = np.ascontiguousarray(self.kemiripan[:, :lebar])
+        self.aktif = np.ascontiguousarray(self.aktif[:, :, :lebar])
+        self.relevan = np.ascontiguousarray(self.relevan[:, :lebar])
+
+    def __len__(self):
+        return len(self.jumlah_relevan)
+
+    def skor(self, konfigurasi: dict) -> dict:
+        """Metrik peringkat rata-rata @K untuk satu konfigurasi; hanya tahap re-ranking yang dihitung ulang."""
+        bobot = [0.0] * self.aktif.shape[0]
+        for nama, (indeks_aturan, tanda) in PARAMETER_ATURAN.items():
+            bobot[indeks_aturan] = tanda * konfigurasi[nama]
+        # Pool engine = max(CANDIDATE_POOL_SIZE, final_top_n); daftar dipotong ke K terbesar
+        dalam_pool = self.peringkat_cosine < max(konfigurasi[PARAMETER_POOL], self.k_maks)
+        # Bonus dijumlahkan per aturan dengan urutan yang sama seperti MatriksAturan.skor, lalu ditambah ke cosine
+        bonus = np.zeros(self.kemiripan.shape)
+        for aktif_aturan, bobot_aturan in zip(self.aktif, bobot):
+            bonus = bonus + aktif_aturan * bobot_aturan
+        adjusted = np.where(dalam_pool, self.kemiripan + bonus, -np.inf)
+        urutan = np.argsort(-adjusted, axis=1, kind='stable')[:, :self.k_maks]
+        terisi = np.arange(urutan.shape[1]) < np.count_nonzero(dalam_pool, axis=1)[:, None]
+        rekomendasi = np.where(terisi, np.take_along_axis(self.baris, urutan, axis=1), -1)
+        relevan = np.take_along_axis(self.relevan, urutan, axis=1) & terisi
+        metrik = HasilEvaluasi(rekomendasi, relevan, self.jumlah_relevan).metrik(self.k_values, self.jumlah_program)
+        return {f'{nama}@{k}': nilai for k, metrik_k in metrik.items() for nama, nilai in metrik_k.items()}
+
+def _skor_potongan(konteks_sweep, daftar_konfigurasi):
+    return [{**konfigurasi, **konteks_sweep.skor(konfigurasi)} for konfigurasi in daftar_konfigurasi]
+
+def jalankan_sweep(daftar_konfigurasi: list, data_uji=None, profil: str = 'lengkap', k_values=K_VALUES,
+                   jumlah_proses: int = None, ukuran_potongan: int = UKURAN_POTONGAN) -> pd.DataFrame:
+    """
+    Menilai semua konfigurasi di atas cache yang sama dan mengembalikan leaderboard (DataFrame terurut).
+    `data_uji` default data uji ruang kerja evaluasi (sama dengan evaluasi.py).
+    `profil`: 'evaluasi' (preferensi seperti evaluasi.py) atau 'lengkap' (ditambah usia, tujuan, jenis latihan).
+    """
+    ruang = ruang_evaluasi_aktif()
+    data_uji = ruang.test_df if data_uji is None else data_uji
+    konteks = ruang.konteks
+    fungsi_pengguna = _pengguna_lengkap if profil == 'lengkap' else _pengguna_uji
+    kelompok_ground_truth = bangun_kelompok_ground_truth(ruang.df_latihan)
+    data_pengguna = [data for data in (fungsi_pengguna(konteks, user_row, kelompok_ground_truth)
+                                       for user_row in data_uji.to_dict(orient='records')) if data]
+    mulai = time.perf_counter()
+    pool_maks = max(konfigurasi[PARAMETER_POOL] for konfigurasi in daftar_konfigurasi)
+    konteks_sweep = KonteksSweep(konteks, data_pengguna, pool_maks, k_values)
+    print(f"Cache {len(konteks_sweep)} pengguna uji (pool {pool_maks}) dibangun dalam {time.perf_counter() - mulai:.2f} detik.")
+
+    mulai = time.perf_counter()
+    potongan = [daftar_konfigurasi[awal:awal + ukuran_potongan] for awal in range(0, len(daftar_konfigurasi), ukuran_potongan)]
+    baris = [hasil for bagian in peta_paralel(_skor_potongan, potongan, konteks_sweep, jumlah_proses) for hasil in bagian]
+    durasi = time.perf_counter() - mulai
+    print(f"{len(daftar_konfigurasi)} konfigurasi dinilai dalam {durasi:.2f} detik ({len(daftar_konfigurasi) / durasi:,.0f} konfigurasi/detik).")
+
+    bawaan = konfigurasi_bawaan()
+    leaderboard = pd.DataFrame(baris)
+    leaderboard['bawaan'] = [all(konfigurasi[nama] == bawaan[nama] for nama in PARAMETER_SWEEP) for konfigurasi in baris]
+    k_utama = K_UTAMA if K_UTAMA in k_values else max(k_values)
+    return leaderboard.sort_values([f'precision@{k_utama}', f'recall@{k_utama}'], ascending=False, kind='stable').reset_index(drop=True)
+
+def cetak(leaderboard: pd.DataFrame, jumlah: int = 10):
+    # Hanya metrik @K_UTAMA (atau K terbesar) yang dicetak; semua metrik ada di CSV
+    nilai_k = sorted({int(kolom.split('@')[1]) for kolom in leaderboard.columns if '@' in kolom})
+    k_utama = K_UTAMA if K_UTAMA in nilai_k else nilai_k[-1]
+    kolom_metrik = [kolom for kolom in leaderboard.columns if kolom.endswith(f'@{k_utama}')]
+    kolom = [*PARAMETER_SWEEP, *kolom_metrik]
+    print(f"\n--- Leaderboard (top {jumlah} dari {len(leaderboard)}) ---")
+    print(leaderboard.head(jumlah)[kolom].to_string(index=True, float_format=lambda x: f'{x:.4f}'))
+    posisi_bawaan = leaderboard.index[leaderboard['bawaan']]
+    if len(posisi_bawaan):
+        print(f"\nKonfigurasi saat ini di peringkat {posisi_bawaan[0] + 1}:")
+        print(leaderboard.loc[[posisi_bawaan[0]], kolom].to_string(index=False, float_format=lambda x: f'{x:.4f}'))
+
+# --- Jalankan Sweep ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep bobot bonus/penalti dan CANDIDATE_POOL_SIZE dengan leaderboard metrik peringkat@K.")
+    parser.add_argument('--mode', choices=('grid', 'acak'), default='grid', help="Pencarian grid atau acak")
+    parser.add_argument('--jumlah', type=int, default=2000, help="Jumlah konfigurasi untuk mode acak")
+    parser.add_argument('--ruang', help="File JSON ruang sweep: parameter -> daftar nilai (grid) atau [min, max] (acak)")
+    parser.add_argument('--profil', choices=('evaluasi', 'lengkap'), default='lengkap', help="Preferensi pengguna uji")
+    parser.add_argument('--k', type=int, nargs='+', default=list(K_VALUES), help="Nilai K untuk metrik peringkat")
+    parser.add_argument('--proses', type=int, help="Jumlah proses worker (default: semua core)")
+    parser.add_argument('--keluaran', default=KELUARAN, help="File CSV leaderboard")
+    argumen = parser.parse_args()
+
+    ruang_sweep = None
+    if argumen.ruang:
+        with open(argumen.ruang, encoding='utf-8') as f:
+            ruang_sweep = json.load(f)
+    if argumen.mode == 'grid':
+        daftar_konfigurasi = ruang_grid(ruang_sweep or RUANG_GRID)
+    else:
+        daftar_konfigurasi = ruang_acak(argumen.jumlah, ruang_sweep or RUANG_ACAK)
+    daftar_konfigurasi.insert(0, konfigurasi_bawaan()) # Acuan selalu ikut dinilai
+
+    ruang = ruang_evaluasi_aktif()
+    mulai = time.perf_counter()
+    evaluasi_model(ruang.test_df, ruang.df_latihan, ruang.tfidf, ruang.tfidf_matrix_latihan, top_k=K_UTAMA, jumlah_proses=1)
+    print(f"Acuan: satu evaluasi penuh (evaluasi.py, top-{K_UTAMA}) {time.perf_counter() - mulai:.2f} detik.")
+
+    leaderboard = jalankan_sweep(daftar_konfigurasi, profil=argumen.profil, k_values=argumen.k, jumlah_proses=argumen.proses)
+    leaderboard.to_csv(argumen.keluaran, index=False)
+    cetak(leaderboard)
+    print(f"\nLeaderboard disimpan di '{argumen.keluaran}'.")
@@ -0,0 +1,84 @@
+import gc
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import vstack
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from artefak_model import ModelArtefak, muat_artefak, simpan_artefak
+from recommender_engine import bangun_indeks_katalog, dapatkan_peringkat
+
+# --- Konfigurasi Pengukuran ---
+base_path = os.path.dirname(os.path.abspath(__file__))
+latihan_path = os.path.join(base_path, 'data/data_latihan_processed.csv')
+JUMLAH_WORKER = (8, 32)
+SALINAN_KATALOG = 150 # Katalog contoh diulang sebanyak ini agar matriks cukup besar untuk diukur
+PROFIL_UJI = {'usia': '26', 'jenis_kelamin': 'Pria', 'tujuan': 'Menjaga kesehatan', 'jenis_latihan': 'HIIT',
+              'tempat': 'Rumah', 'pengalaman': 'Pemula (Baru memulai atau jarang)'}
+
+def _memori_proses() -> dict:
+    """Membaca RSS, PSS, dan memori privat proses ini dari /proc (kB). PSS membagi halaman bersama secara adil."""
+    hasil = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for baris in f:
+            kunci, _, nilai = baris.partition(':')
+            if kunci in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                hasil[kunci] = int(nilai.split()[0])
+    return {'rss_kb': hasil['Rss'], 'pss_kb': hasil['Pss'], 'privat_kb': hasil['Private_Clean'] + hasil['Private_Dirty']}
+
+def _bangun_artefak_sintetis(direktori: str) -> int:
+    """Menulis artefak dari katalog contoh yang diulang SALINAN_KATALOG kali. Mengembalikan ukuran array (MB)."""
+    df_latihan = pd.read_csv(latihan_path).astype(str).fillna('')
+    vectorizer = TfidfVectorizer(stop_words='english').fit(df_latihan['fitur_gabungan_program'])
+    matriks = vstack([vectorizer.transform(df_latihan['fitur_gabungan_program'])] * SALINAN_KATALOG).tocsr()
+    df_besar = pd.concat([df_latihan] * SALINAN_KATALOG, ignore_index=True)
+    artefak = ModelArtefak(df_besar, vectorizer, matriks, bangun_indeks_katalog(df_besar), 'sintetis')
+    simpan_artefak(direktori, artefak)
+    return (matriks.data.nbytes + matriks.indices.nbytes + matriks.indptr.nbytes) / 2**20
+
+def _worker(direktori, mmap_mode, barrier, antrian):
+    """Meniru satu worker WSGI: memuat model, menyentuh semua halaman, melayani satu permintaan, lalu melapor."""
+    artefak = muat_artefak(direktori, mmap_mode=mmap_mode)
+    matriks = artefak.tfidf_matrix_prog
+    float(matriks.data.sum()); int(matriks.indices.sum()) # Pastikan seluruh halaman matriks terbaca
+    dapatkan_peringkat('pemula rumah hiit', PROFIL_UJI, artefak.tfidf_vectorizer, matriks, artefak.indeks_katalog)
+    gc.collect()
+    barrier.wait() # Ukur saat semua worker hidup bersamaan
+    antrian.put(_memori_proses())
+    barrier.wait()
+
+def ukur_memori(direktori: str, jumlah_worker: int, mmap_mode) -> dict:
+    """Menjalankan `jumlah_worker` proses (fork, seperti gunicorn) dan mengembalikan rata-rata memori per worker."""
+    konteks = mp.get_context('fork')
+    barrier = konteks.Barrier(jumlah_worker)
+    antrian = konteks.Queue()
+    proses = [konteks.Process(target=_worker, args=(direktori, mmap_mode, barrier, antrian)) for _ in range(jumlah_worker)]
+    for p in proses:
+        p.start()
+    laporan = [antrian.get() for _ in range(jumlah_worker)]
+    for p in proses:
+        p.join()
+    return {kunci: float(np.mean([l[kunci] for l in laporan])) / 1024 for kunci in laporan[0]}
+
+# --- Jalankan Pengukuran ---
+if __name__ == "__main__":
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("ERROR: Pengukuran membutuhkan Linux (/proc/self/smaps_rollup).")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as direktori:
+        ukuran_mb = _bangun_artefak_sintetis(direktori)
+        print(f"\nMatriks TF-IDF sintetis: {ukuran_mb:.1f} MB array CSR")
+        print("\nMode                        | Worker | RSS/worker (MB) | PSS/worker (MB) | Privat/worker (MB)")
+        print("----------------------------|--------|-----------------|-----------------|-------------------")
+        for jumlah_worker in JUMLAH_WORKER:
+            for nama_mode, mmap_mode in (('salinan per worker (lama)', None), ('mmap bersama', 'r')):
+                hasil = ukur_memori(direktori, jumlah_worker, mmap_mode)
+                print(f"{nama_mode:<27} | {jumlah_worker:>6} | {hasil['rss_kb']:>15.1f} | "
+                      f"{hasil['pss_kb']:>15.1f} | {hasil['privat_kb']:>18.1f}")
+        print("-----------------------------------------------------------------------------------------------")
+        print("RSS menghitung halaman bersama di setiap worker; PSS/privat menunjukkan biaya nyata per worker.")
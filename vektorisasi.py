@@ -0,0 +1,110 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+# --- Konfigurasi Vectorizer ---
+JENIS_VECTORIZER = ('tfidf', 'hashing', 'lsa')
+N_FITUR_HASHING = 2 ** 18 # Lebar ruang hashing; memori IDF tetap n_fitur * 8 byte
+RANK_LSA = 128 # Dimensi ruang laten LSA; matriks program berukuran jumlah program x rank x 4 byte
+UKURAN_BATCH_FIT = 10000 # Dokumen per batch saat menghitung frekuensi dokumen mode hashing
+
+def frekuensi_dokumen(matriks, jumlah_kolom: int) -> np.ndarray:
+    """Jumlah dokumen yang memuat setiap term (kolom) pada matriks CSR."""
+    return np.bincount(csr_matrix(matriks).indices, minlength=jumlah_kolom).astype(np.int64)
+
+def hitung_idf(frekuensi: np.ndarray, jumlah_dokumen: int, smooth_idf: bool = True) -> np.ndarray:
+    """Rumus IDF yang sama dengan TfidfTransformer milik scikit-learn."""
+    frekuensi = frekuensi.astype(np.float64) + int(smooth_idf)
+    jumlah_dokumen = jumlah_dokumen + int(smooth_idf)
+    return np.log(jumlah_dokumen / np.maximum(frekuensi, 1)) + 1
+
+class VectorizerHashing:
+    """
+    TF-IDF di atas HashingVectorizer: term dipetakan ke `n_fitur` kolom tetap tanpa vocabulary,
+    dan IDF dihitung per kolom hash. Memori model konstan berapa pun besar korpusnya.
+    Antarmukanya (fit/transform/idf_/build_analyzer) sama dengan TfidfVectorizer yang dipakai engine.
+    """
+    def __init__(self, n_fitur: int = N_FITUR_HASHING, stop_words='english', smooth_idf: bool = True):
+        self.n_fitur = n_fitur
+        self.stop_words = stop_words
+        self.smooth_idf = smooth_idf
+        self._hashing = HashingVectorizer(n_features=n_fitur, stop_words=stop_words, alternate_sign=False, norm=None)
+        self.idf_ = None
+        self.frekuensi_dokumen = None
+        self.jumlah_dokumen = 0
+
+    def fit(self, dokumen, ukuran_batch: int = UKURAN_BATCH_FIT):
+        """Menghitung IDF per kolom hash secara bertahap, sehingga korpus tidak perlu ditampung sekaligus."""
+        dokumen = list(dokumen)
+        frekuensi = np.zeros(self.n_fitur, dtype=np.int64)
+        for awal in range(0, len(dokumen), ukuran_batch):
+            frekuensi += frekuensi_dokumen(self._hashing.transform(dokumen[awal:awal + ukuran_batch]), self.n_fitur)
+        self.frekuensi_dokumen = frekuensi
+        self.jumlah_dokumen = len(dokumen)
+        self.idf_ = hitung_idf(frekuensi, self.jumlah_dokumen, self.smooth_idf)
+        return self
+
+    def transform(self, dokumen):
+        matriks = self._hashing.transform(dokumen).tocsr()
+        matriks.data *= self.idf_[matriks.indices]
+        return normalize(matriks, norm='l2', copy=False)
+
+    def fit_transform(self, dokumen):
+        return self.fit(dokumen).transform(dokumen)
+
+    def build_analyzer(self):
+        return self._hashing.build_analyzer()
+
+class VectorizerLSA:
+    """
+    TF-IDF yang diproyeksikan ke ruang laten truncated SVD (LSA) berdimensi `rank`.
+    `transform` mengembalikan matriks padat float32 (C-contiguous) yang barisnya ternormalisasi L2,
+    sehingga cosine similarity cukup satu perkalian GEMV. `dasar` adalah TfidfVectorizer sebelum proyeksi.
+    """
+    def __init__(self, rank: int = RANK_LSA, dasar=None, seed: int = 42):
+        self.rank = rank
+        self.dasar = dasar if dasar is not None else TfidfVectorizer(stop_words='english')
+        self.seed = seed
+        self.komponen_ = None # float32 (rank x jumlah term)
+
+    @property
+    def idf_(self):
+        return self.dasar.idf_
+
+    def fit(self, dokumen):
+        matriks = self.dasar.fit_transform(dokumen)
+        # TruncatedSVD mensyaratkan rank < jumlah term
+        rank = max(1, min(self.rank, matriks.shape[1] - 1))
+        svd = TruncatedSVD(n_components=rank, random_state=self.seed)
+        svd.fit(matriks)
+        self.komponen_ = np.ascontiguousarray(svd.components_, dtype=np.float32)
+        return self
+
+    def proyeksi(self, matriks_tfidf) -> np.ndarray:
+        """Memproyeksikan matriks TF-IDF (sparse) ke ruang laten, float32 ternormalisasi L2."""
+        embedding = np.ascontiguousarray(matriks_tfidf @ self.komponen_.T, dtype=np.float32)
+        return normalize(embedding, norm='l2', copy=False)
+
+    def transform(self, dokumen) -> np.ndarray:
+        return self.proyeksi(self.dasar.transform(dokumen))
+
+    def fit_transform(self, dokumen) -> np.ndarray:
+        return self.fit(dokumen).transform(dokumen)
+
+    def build_analyzer(self):
+        return self.dasar.build_analyzer()
+
+def buat_vectorizer(jenis: str = 'tfidf', n_fitur: int = N_FITUR_HASHING, rank: int = RANK_LSA):
+    """
+    Membuat vectorizer sesuai konfigurasi: 'tfidf' (vocabulary penuh), 'hashing' (memori tetap),
+    atau 'lsa' (TF-IDF diproyeksikan ke `rank` dimensi, float32 padat).
+    """
+    if jenis == 'hashing':
+        return VectorizerHashing(n_fitur=n_fitur)
+    if jenis == 'lsa':
+        return VectorizerLSA(rank=rank)
+    if jenis == 'tfidf':
+        return TfidfVectorizer(stop_words='english')
+    raise ValueError(f"Jenis vectorizer tidak dikenal: '{jenis}' (pilihan: {', '.join(JENIS_VECTORIZER)})")
@@ -1,148 +1,41 @@
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.model_selection import train_test_split
-import os
-import numpy as np
+from functools import partial
 import matplotlib.pyplot as plt
+from ruang_evaluasi import ruang_evaluasi_aktif # Data, split, model, dan peringkat bersama evaluasi.py (di-cache)
 
-# --- Konfigurasi & Pemuatan Data ---
-base_path = os.path.dirname(os.path.abspath(__file__))
-latihan_path = os.path.join(base_path, 'data/data_latihan_processed.csv')
-kuesioner_path = os.path.join(base_path, 'data/kuesioner_processed.csv')
+def _relevan_kurva(user_row, df_latihan) -> set:
+    """Ground truth (level & tempat) satu pengguna uji."""
+    user_kebugaran_pref = user_row.get('4. Bagaimana tingkat kebugaran Anda saat ini?', '').lower()
+    user_tempat_pref = user_row.get('11. Apakah Anda lebih suka latihan di rumah atau di gym?', '').lower()
 
-try:
-    df_latihan = pd.read_csv(latihan_path)
-    df_kuesioner = pd.read_csv(kuesioner_path)
-    print("File berhasil dimuat.")
-except FileNotFoundError as e:
-    print(f"Error: File tidak ditemukan. Pastikan path sudah benar. Detail: {e}")
-    exit()
+    user_kebugaran_norm = ''
+    if 'pemula' in user_kebugaran_pref: user_kebugaran_norm = 'pemula'
+    elif 'menengah' in user_kebugaran_pref: user_kebugaran_norm = 'menengah'
+    elif 'lanjut' in user_kebugaran_pref: user_kebugaran_norm = 'lanjut'
 
-# --- Pembagian Data Uji dan Latih ---
-train_df, test_df = train_test_split(df_kuesioner, test_size=0.2, random_state=42)
-print(f"Data kuesioner dibagi: {len(train_df)} data latih, {len(test_df)} data uji.")
+    user_tempat_norm = ''
+    if 'rumah' in user_tempat_pref: user_tempat_norm = 'rumah'
+    elif 'gym' in user_tempat_pref: user_tempat_norm = 'gym'
+    elif 'outdoor' in user_tempat_pref: user_tempat_norm = 'outdoor'
 
-# --- Pra-pemrosesan ---
-df_latihan['fitur_gabungan_program'] = df_latihan['fitur_gabungan_program'].fillna('')
+    return set(df_latihan[
+        (df_latihan['Tingkat Kebugaran Program'].str.lower() == user_kebugaran_norm) &
+        (df_latihan['Tempat Program'].str.lower().str.contains(user_tempat_norm, na=False))
+    ]['ID Program'].astype(str))
 
-# --- Pembangunan Model ---
-tfidf = TfidfVectorizer(stop_words='english')
-tfidf_matrix_latihan = tfidf.fit_transform(df_latihan['fitur_gabungan_program'])
-print(f"Dimensi Matriks TF-IDF Latihan: {tfidf_matrix_latihan.shape}")
-
-def dapatkan_rekomendasi(
-    profil_pengguna_string: str, 
-    profil_pengguna_dict: dict, 
-    candidate_pool_size: int = 200,
-    final_top_n: int = 10) -> pd.DataFrame:
-    """
-    Fungsi rekomendasi yang disempurnakan untuk meningkatkan Recall.
-    """
-    tfidf_matrix_pengguna = tfidf.transform([profil_pengguna_string])
-    cosine_similarities = cosine_similarity(tfidf_matrix_pengguna, tfidf_matrix_latihan).flatten()
-
-    if len(cosine_similarities) < candidate_pool_size:
-        candidate_pool_size = len(cosine_similarities)
-    top_candidate_indices = cosine_similarities.argsort()[-candidate_pool_size:][::-1]
-    
-    df_latihan_temp = df_latihan.iloc[top_candidate_indices].copy()
-    df_latihan_temp['original_similarity'] = cosine_similarities[top_candidate_indices]
-    df_latihan_temp['adjusted_similarity'] = cosine_similarities[top_candidate_indices]
-
-    tempat_preferensi = profil_pengguna_dict.get('tempat', '').lower()
-    kebugaran_preferensi = profil_pengguna_dict.get('kebugaran', '').lower()
-
-    PENALTI_TIDAK_COCOK = 0.25 
-    BONUS_SANGAT_COCOK = 0.1
-
-    user_kebugaran_keyword = ''
-    if 'pemula' in kebugaran_preferensi: user_kebugaran_keyword = 'pemula'
-    elif 'menengah' in kebugaran_preferensi: user_kebugaran_keyword = 'menengah'
-    elif 'lanjut' in kebugaran_preferensi: user_kebugaran_keyword = 'lanjut'
-
-    user_tempat_keyword = ''
-    if 'rumah' in tempat_preferensi: user_tempat_keyword = 'rumah'
-    elif 'gym' in tempat_preferensi: user_tempat_keyword = 'gym'
-    elif 'outdoor' in tempat_preferensi: user_tempat_keyword = 'outdoor'
-
-    for index, row in df_latihan_temp.iterrows():
-        program_tempat = str(row.get('Tempat Program', '')).lower()
-        program_kebugaran = str(row.get('Tingkat Kebugaran Program', '')).lower()
-
-        if user_tempat_keyword:
-            if user_tempat_keyword in program_tempat:
-                df_latihan_temp.loc[index, 'adjusted_similarity'] += BONUS_SANGAT_COCOK
-            else:
-                df_latihan_temp.loc[index, 'adjusted_similarity'] -= PENALTI_TIDAK_COCOK
-
-        if user_kebugaran_keyword:
-            if user_kebugaran_keyword in program_kebugaran:
-                df_latihan_temp.loc[index, 'adjusted_similarity'] += BONUS_SANGAT_COCOK
-            elif any(level in program_kebugaran for level in ['pemula', 'menengah', 'lanjut']):
-                 df_latihan_temp.loc[index, 'adjusted_similarity'] -= PENALTI_TIDAK_COCOK
-
-    sorted_df = df_latihan_temp.sort_values(by='adjusted_similarity', ascending=False)
-    return sorted_df.head(final_top_n)
-
-def evaluasi_untuk_kurva(data_uji, k_values):
+def evaluasi_untuk_kurva(k_values, jumlah_proses=None):
     """
-    Menjalankan evaluasi untuk serangkaian nilai K dan mengembalikan skor untuk plot.
+    Menjalankan evaluasi untuk serangkaian nilai K dan mengembalikan skor untuk plot:
+    (precision per K, recall per K, {k: semua metrik peringkat}).
+    Peringkat engine pengguna uji diambil dari ruang kerja evaluasi (sama dengan evaluasi.py; dihitung sekali
+    sampai K terbesar lalu disimpan); metrik untuk setiap K diambil dari potongan peringkat tersebut.
     """
-    avg_precisions_per_k = []
-    avg_recalls_per_k = []
-
-    for k in k_values:
-        print(f"Mengevaluasi untuk K={k}...")
-        list_precision_for_this_k = []
-        list_recall_for_this_k = []
-        
-        for _, user_row in data_uji.iterrows():
-            user_kebugaran_pref = user_row.get('4. Bagaimana tingkat kebugaran Anda saat ini?', '').lower()
-            user_tempat_pref = user_row.get('11. Apakah Anda lebih suka latihan di rumah atau di gym?', '').lower()
-
-            user_kebugaran_norm = ''
-            if 'pemula' in user_kebugaran_pref: user_kebugaran_norm = 'pemula'
-            elif 'menengah' in user_kebugaran_pref: user_kebugaran_norm = 'menengah'
-            elif 'lanjut' in user_kebugaran_pref: user_kebugaran_norm = 'lanjut'
-
-            user_tempat_norm = ''
-            if 'rumah' in user_tempat_pref: user_tempat_norm = 'rumah'
-            elif 'gym' in user_tempat_pref: user_tempat_norm = 'gym'
-            elif 'outdoor' in user_tempat_pref: user_tempat_norm = 'outdoor'
+    ruang = ruang_evaluasi_aktif()
+    hasil = ruang.hasil_evaluasi(partial(_relevan_kurva, df_latihan=ruang.df_latihan), k_values, jumlah_proses=jumlah_proses)
+    metrik = hasil.metrik(k_values, jumlah_program=len(ruang.df_latihan), matriks_item=ruang.tfidf_matrix_latihan)
 
-            relevant_items = set(df_latihan[
-                (df_latihan['Tingkat Kebugaran Program'].str.lower() == user_kebugaran_norm) &
-                (df_latihan['Tempat Program'].str.lower().str.contains(user_tempat_norm, na=False))
-            ]['ID Program'].astype(str))
-
-            if not relevant_items:
-                continue
-
-            user_profile_string = user_row['fitur_gabungan_pengguna']
-            user_profile_dict = {'tempat': user_tempat_pref, 'kebugaran': user_kebugaran_pref}
-            
-            rekomendasi_df = dapatkan_rekomendasi(
-                profil_pengguna_string=user_profile_string, 
-                profil_pengguna_dict=user_profile_dict, 
-                candidate_pool_size=200,
-                final_top_n=k)
-            recommended_items = set(rekomendasi_df['ID Program'].astype(str))
-
-            true_positives = len(recommended_items.intersection(relevant_items))
-            precision = true_positives / len(recommended_items) if recommended_items else 0
-            recall = true_positives / len(relevant_items) if relevant_items else 0
-            
-            list_precision_for_this_k.append(precision)
-            list_recall_for_this_k.append(recall)
-            
-        avg_prec = np.mean(list_precision_for_this_k) if list_precision_for_this_k else 0
-        avg_rec = np.mean(list_recall_for_this_k) if list_recall_for_this_k else 0
-        
-        avg_precisions_per_k.append(avg_prec)
-        avg_recalls_per_k.append(avg_rec)
-        
-    return avg_precisions_per_k, avg_recalls_per_k
+    avg_precisions_per_k = [metrik[k]['precision'] for k in k_values]
+    avg_recalls_per_k = [metrik[k]['recall'] for k in k_values]
+    return avg_precisions_per_k, avg_recalls_per_k, metrik
 
 # --- Jalankan Evaluasi dan Visualisasi ---
 if __name__ == "__main__":
@@ -151,14 +44,15 @@ if __name__ == "__main__":
     
     print("\nMemulai evaluasi untuk membuat kurva Precision-Recall...")
     
-    precisions, recalls = evaluasi_untuk_kurva(test_df, K_VALUES)
+    precisions, recalls, metrik = evaluasi_untuk_kurva(K_VALUES)
     
     # Tampilkan hasil dalam bentuk tabel
     print("\n--- Hasil Evaluasi per K ---")
-    print(" K | Precision | Recall")
-    print("---|-----------|---------")
+    print(" K | Precision | Recall | nDCG   | MAP    | MRR    | Coverage | ILS")
+    print("---|-----------|--------|--------|--------|--------|----------|-------")
     for i, k in enumerate(K_VALUES):
-        print(f"{k:2d} |  {precisions[i]:.4f}   | {recalls[i]:.4f}")
+        m = metrik[k]
+        print(f"{k:2d} |  {precisions[i]:.4f}   | {recalls[i]:.4f} | {m['ndcg']:.4f} | {m['map']:.4f} | {m['mrr']:.4f} |  {m['coverage']:.4f}  | {m['ils']:.4f}")
     print("----------------------------")
 
     # Buat plot
@@ -176,4 +70,14 @@ if __name__ == "__main__":
     plt.xlim([0.0, max(recalls) * 1.1 if recalls else 1.0])
     plt.ylim([min(precisions) * 0.9 if precisions else 0.0, 1.05])
     plt.grid(True)
+
+    # Metrik peringkat yang memperhitungkan posisi item relevan
+    plt.figure(figsize=(10, 5))
+    for nama, label in (('ndcg', 'nDCG@K'), ('map', 'MAP@K'), ('mrr', 'MRR@K')):
+        plt.plot(list(K_VALUES), [metrik[k][nama] for k in K_VALUES], marker='o', label=label)
+    plt.title('Metrik Peringkat untuk Berbagai Nilai K')
+    plt.xlabel('K')
+    plt.ylabel('Skor')
+    plt.legend()
+    plt.grid(True)
     plt.show()
\ No newline at end of file